@@ -1,7 +1,9 @@
 from fastapi import APIRouter
 
 from .chat import chat_router
+from .events import events_router
 from .health import health_router
+from .live import live_router
 from .minutes import minutes_router
 from .templates import templates_router
 from .transcriptions import transcriptions_router
@@ -11,8 +13,10 @@ router = APIRouter()
 
 router.include_router(health_router)
 router.include_router(transcriptions_router)
+router.include_router(live_router)
 router.include_router(users_router)
 router.include_router(minutes_router)
 router.include_router(templates_router)
 
 router.include_router(chat_router)
+router.include_router(events_router)
@@ -1,13 +1,26 @@
+import asyncio
 import logging
 import uuid
+from collections.abc import AsyncIterator
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy import delete
 from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from backend.api.dependencies import SQLSessionDep, UserDep
+from backend.utils.server_sent_events import (
+    KEEPALIVE,
+    KEEPALIVE_SECONDS,
+    event_stream_response,
+    server_sent_event,
+)
+from common.database.notifications import chat_channel, notification_listener
+from common.database.postgres_database import async_engine
 from common.database.postgres_models import (
     Chat,
+    JobStatus,
     Transcription,
 )
 from common.services.queue_services import get_queue_service
@@ -17,6 +30,7 @@ from common.types import (
     ChatCreateResponse,
     ChatGetAllResponse,
     ChatGetResponse,
+    ChatStreamNotification,
     TaskType,
     WorkerMessage,
 )
@@ -30,6 +44,17 @@ llm_queue_service = get_queue_service(
 logger = logging.getLogger(__name__)
 
 
+def chat_response(chat: Chat) -> ChatGetResponse:
+    return ChatGetResponse(
+        id=chat.id,
+        created_datetime=chat.created_datetime,
+        updated_datetime=chat.updated_datetime,
+        user_content=chat.user_content,
+        assistant_content=chat.assistant_content,
+        status=chat.status,
+    )
+
+
 @chat_router.get("/transcriptions/{transcription_id}/chat", response_model=ChatGetAllResponse)
 async def list_chat(
     transcription_id: uuid.UUID,
@@ -44,19 +69,7 @@ async def list_chat(
     result = await session.exec(query)
     chats = result.all()
 
-    return ChatGetAllResponse(
-        chat=[
-            ChatGetResponse(
-                id=chat.id,
-                created_datetime=chat.created_datetime,
-                updated_datetime=chat.updated_datetime,
-                user_content=chat.user_content,
-                assistant_content=chat.assistant_content,
-                status=chat.status,
-            )
-            for chat in chats
-        ]
-    )
+    return ChatGetAllResponse(chat=[chat_response(chat) for chat in chats])
 
 
 @chat_router.post("/transcriptions/{transcription_id}/chat", response_model=ChatCreateResponse, status_code=201)
@@ -92,14 +105,65 @@ async def get_chat(
     chat = await session.get(Chat, chat_id)
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
-    return ChatGetResponse(
-        id=chat.id,
-        created_datetime=chat.created_datetime,
-        updated_datetime=chat.updated_datetime,
-        user_content=chat.user_content,
-        assistant_content=chat.assistant_content,
-        status=chat.status,
-    )
+    return chat_response(chat)
+
+
+async def read_chat(chat_id: uuid.UUID) -> Chat | None:
+    # a short session of its own, so a stream doesn't hold a database connection while it waits
+    async with AsyncSession(async_engine) as session:
+        return await session.get(Chat, chat_id)
+
+
+async def chat_events(chat_id: uuid.UUID) -> AsyncIterator[str]:
+    async with notification_listener.subscribe(chat_channel(chat_id)) as notifications:
+        # read the chat after subscribing, so the answer so far and the notifications that follow overlap
+        chat = await read_chat(chat_id)
+        if chat is None:
+            return
+        yield server_sent_event("answer", ChatStreamNotification(offset=0, content=chat.assistant_content or ""))
+        while chat.status in (JobStatus.AWAITING_START, JobStatus.IN_PROGRESS):
+            try:
+                payload = await asyncio.wait_for(notifications.get(), KEEPALIVE_SECONDS)
+            except TimeoutError:
+                yield KEEPALIVE
+                continue
+            if payload is None:
+                # the browser reconnects, and starts again from the answer so far
+                return
+            notification = ChatStreamNotification.model_validate_json(payload)
+            if notification.content is not None:
+                yield server_sent_event("answer", notification)
+            elif (chat := await read_chat(chat_id)) is None:
+                return
+    yield server_sent_event("done", chat_response(chat))
+
+
+@chat_router.get(
+    "/transcriptions/{transcription_id}/chat/{chat_id}/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def stream_chat(
+    transcription_id: uuid.UUID,
+    chat_id: uuid.UUID,
+    session: SQLSessionDep,
+    current_user: UserDep,
+) -> StreamingResponse:
+    """Stream the assistant's answer to a chat message as server-sent events, as the worker writes it.
+
+    Each `answer` event replaces the answer from its offset onwards with its content. The last event, `done`, is the
+    chat once the answer is complete or has failed.
+    """
+    transcription = await session.get(Transcription, transcription_id)
+    if not transcription or transcription.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Transcription not found")
+
+    chat = await session.get(Chat, chat_id)
+    if not chat or chat.transcription_id != transcription_id:
+        raise HTTPException(status_code=404, detail="Chat not found")
+    # the stream stays open until the answer is complete, so it mustn't hold a connection from the pool
+    await session.close()
+    return event_stream_response(chat_events(chat_id))
 
 
 @chat_router.delete("/transcriptions/{transcription_id}/chat/{chat_id}", status_code=204)
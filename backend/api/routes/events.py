@@ -0,0 +1,49 @@
+import asyncio
+import logging
+import uuid
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from backend.api.dependencies import SQLSessionDep, UserDep
+from backend.utils.server_sent_events import (
+    KEEPALIVE,
+    KEEPALIVE_SECONDS,
+    event_stream_response,
+    server_sent_event,
+)
+from common.database.notifications import notification_listener, user_channel
+from common.types import JobStatusEvent
+
+events_router = APIRouter(tags=["Events"])
+
+logger = logging.getLogger(__name__)
+
+
+async def job_events(user_id: uuid.UUID) -> AsyncIterator[str]:
+    async with notification_listener.subscribe(user_channel(user_id)) as notifications:
+        # sent straight away, so the browser knows it is connected and can stop polling
+        yield KEEPALIVE
+        while True:
+            try:
+                payload = await asyncio.wait_for(notifications.get(), KEEPALIVE_SECONDS)
+            except TimeoutError:
+                yield KEEPALIVE
+                continue
+            if payload is None:
+                # the browser reconnects, and refetches what it is showing in case it missed events
+                return
+            yield server_sent_event("job", JobStatusEvent.model_validate_json(payload))
+
+
+@events_router.get("/events", response_class=StreamingResponse, responses={200: {"content": {"text/event-stream": {}}}})
+async def stream_events(session: SQLSessionDep, current_user: UserDep) -> StreamingResponse:
+    """Stream status changes and progress of the current user's transcriptions, minutes and chats.
+
+    Each `job` event is a JobStatusEvent, sent as the worker saves a status change, or makes progress.
+    """
+    user_id = current_user.id
+    # the stream stays open for as long as the browser is connected, so it mustn't hold a connection from the pool
+    await session.close()
+    return event_stream_response(job_events(user_id))
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import logging
+import tempfile
+import uuid
+from pathlib import Path
+
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+from sqlalchemy import update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import col
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.api.dependencies import SQLSessionDep, UserDep
+from backend.utils.get_file_s3_key import get_file_s3_key
+from common.database.postgres_database import async_engine
+from common.database.postgres_models import JobStatus, Minute, MinuteVersion, Recording, Transcription, User
+from common.services.live_transcription_service import LiveTranscriber, get_live_adapter
+from common.services.queue_services import get_queue_service
+from common.services.storage_services import get_storage_service
+from common.settings import get_settings
+from common.types import DialogueEntry, TaskType, TranscriptionJobMessageData, WorkerMessage
+
+settings = get_settings()
+
+storage_service = get_storage_service(settings.STORAGE_SERVICE_NAME)
+
+live_router = APIRouter(tags=["Live transcription"])
+transcription_queue_service = get_queue_service(
+    settings.QUEUE_SERVICE_NAME, settings.TRANSCRIPTION_QUEUE_NAME, settings.TRANSCRIPTION_DEADLETTER_QUEUE_NAME
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def create_live_transcription(
+    session: AsyncSession,
+    user: User,
+    template_name: str,
+    template_id: uuid.UUID | None,
+    agenda: str | None,
+    title: str | None,
+) -> tuple[Transcription, Recording, Minute]:
+    recording_id = uuid.uuid4()
+    transcription = Transcription(user_id=user.id, title=title, status=JobStatus.IN_PROGRESS)
+    recording = Recording(
+        id=recording_id,
+        user_id=user.id,
+        s3_file_key=get_file_s3_key(user.email, f"{recording_id}.wav"),
+        transcription_id=transcription.id,
+    )
+    minute = Minute(
+        template_name=template_name, user_template_id=template_id, agenda=agenda, transcription_id=transcription.id
+    )
+    session.add(transcription)
+    session.add(recording)
+    session.add(minute)
+    session.add(MinuteVersion(minute_id=minute.id))
+    await session.commit()
+    return transcription, recording, minute
+
+
+async def save_live_transcript(transcription_id: uuid.UUID, dialogue_entries: list[DialogueEntry]) -> None:
+    """Save the transcript so far, in a short session of its own, as a meeting can run for hours.
+
+    A failed save is only logged. The transcriber keeps the entries, so they are saved with the next window, or when
+    the meeting ends.
+    """
+    try:
+        async with AsyncSession(async_engine) as session:
+            await session.execute(
+                update(Transcription)
+                .where(col(Transcription.id) == transcription_id)
+                .values(dialogue_entries=dialogue_entries)
+            )
+            await session.commit()
+    except SQLAlchemyError:
+        logger.exception("Could not save the live transcript of %s", transcription_id)
+
+
+def is_stop_message(text: str) -> bool:
+    """Whether a text message from the client is `{"type": "stop"}`. Anything else, even invalid JSON, is ignored."""
+    try:
+        control = json.loads(text)
+    except ValueError:
+        logger.warning("Ignoring a live transcription message that isn't JSON")
+        return False
+    return isinstance(control, dict) and control.get("type") == "stop"
+
+
+async def complete_live_transcription(
+    transcription_id: uuid.UUID, minute_id: uuid.UUID, adapter_name: str, transcriber: LiveTranscriber
+) -> None:
+    """Queue the finished transcript for speaker identification and minute generation, as if it had been uploaded."""
+    logger.info(
+        "Live transcription %s finished after %ss of audio", transcription_id, int(transcriber.received_seconds)
+    )
+    async with AsyncSession(async_engine) as session:
+        transcription = await session.get(Transcription, transcription_id)
+        if transcription is None:
+            msg = f"Live transcription {transcription_id} not found"
+            raise ValueError(msg)
+        if not transcriber.dialogue_entries:
+            transcription.status = JobStatus.FAILED
+            transcription.error = "No speech was transcribed during the live meeting"
+            await session.commit()
+            return
+
+        transcription.dialogue_entries = list(transcriber.dialogue_entries)
+        await session.commit()
+    transcription_queue_service.publish_message(
+        WorkerMessage(
+            id=minute_id,
+            type=TaskType.TRANSCRIPTION,
+            data=TranscriptionJobMessageData(
+                transcription_service=adapter_name,
+                live=True,
+                routing_reason="live transcription",
+                audio_duration_seconds=transcriber.received_seconds,
+            ),
+        )
+    )
+
+
+@live_router.websocket("/transcriptions/live")
+async def live_transcription(
+    websocket: WebSocket,
+    session: SQLSessionDep,
+    current_user: UserDep,
+    template_name: str = Query(description="Name of the template to use for the minutes"),
+    template_id: uuid.UUID | None = None,
+    agenda: str | None = None,
+    title: str | None = None,
+) -> None:
+    """Transcribe a meeting while it happens.
+
+    The client sends raw 16-bit little-endian mono PCM at 16kHz as binary messages, and `{"type": "stop"}` as a text
+    message when the meeting ends. The server replies with `{"type": "started", "transcription_id": ...}`, then
+    `{"type": "dialogue_entries", "dialogue_entries": [...]}` as each window is transcribed, and finally
+    `{"type": "completed"}`. The recording is then uploaded, and the transcript is queued for speaker identification
+    and minute generation, as if it had been uploaded.
+    """
+    try:
+        adapter = get_live_adapter()
+    except RuntimeError:
+        logger.exception("Live transcription is not available")
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason="Live transcription is not available")
+        return
+
+    await websocket.accept()
+
+    transcription, recording, minute = await create_live_transcription(
+        session, current_user, template_name, template_id, agenda, title
+    )
+    transcription_id, minute_id, s3_file_key = transcription.id, minute.id, recording.s3_file_key
+    # the meeting can run for hours, so the request's session isn't held for it. Each window is saved in its own
+    await session.close()
+    await websocket.send_json({"type": "started", "transcription_id": str(transcription_id)})
+
+    connected = True
+
+    async def on_entries(entries: list[DialogueEntry]) -> None:
+        nonlocal connected
+        await save_live_transcript(transcription_id, list(transcriber.dialogue_entries))
+        if connected:
+            try:
+                await websocket.send_json({"type": "dialogue_entries", "dialogue_entries": entries})
+            except (WebSocketDisconnect, RuntimeError):
+                connected = False
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        transcriber = LiveTranscriber(adapter=adapter, workdir=Path(tempdir), on_entries=on_entries)
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    connected = False
+                    break
+                if message.get("bytes"):
+                    transcriber.feed(message["bytes"])
+                elif message.get("text") and is_stop_message(message["text"]):
+                    break
+        except WebSocketDisconnect:
+            connected = False
+        finally:
+            # whatever has been received is still transcribed, so a dropped connection does not lose the meeting
+            await transcriber.finish()
+            recording_path = await asyncio.to_thread(transcriber.write_recording, Path(tempdir) / "recording.wav")
+            await storage_service.upload(s3_file_key, recording_path)
+
+    await complete_live_transcription(transcription_id, minute_id, adapter.name, transcriber)
+
+    if connected:
+        await websocket.send_json({"type": "completed", "transcription_id": str(transcription_id)})
+        await websocket.close()
@@ -82,7 +82,13 @@ async def get_user_template(user: UserDep, session: SQLSessionDep, template_id:
         questions=None
         if template.type == TemplateType.DOCUMENT
         else [
-            Question(id=question.id, title=question.title, description=question.description, position=question.position)
+            Question(
+                id=question.id,
+                title=question.title,
+                description=question.description,
+                position=question.position,
+                depends_on_previous=question.depends_on_previous,
+            )
             for question in template.questions
         ],
     )
@@ -101,6 +107,7 @@ async def create_user_template(user: UserDep, session: SQLSessionDep, request: C
                 position=question.position,
                 title=question.title,
                 description=question.description,
+                depends_on_previous=question.depends_on_previous,
             )
             for question in (request.questions or [])
         ],
@@ -139,6 +146,7 @@ async def edit_user_template(
                     existing.title = question.title
                     existing.description = question.description
                     existing.position = question.position
+                    existing.depends_on_previous = question.depends_on_previous
                     continue
 
             session.add(
@@ -147,6 +155,7 @@ async def edit_user_template(
                     position=question.position,
                     title=question.title,
                     description=question.description,
+                    depends_on_previous=question.depends_on_previous,
                 )
             )
         for remaining_question in questions:
@@ -194,6 +203,7 @@ async def duplicate_user_template(user: UserDep, session: SQLSessionDep, templat
                 position=question.position,
                 title=question.title,
                 description=question.description,
+                depends_on_previous=question.depends_on_previous,
             )
             for question in original_template.questions
         ],
@@ -4,7 +4,7 @@ from datetime import UTC, datetime
 from fastapi import APIRouter, HTTPException
 
 from backend.api.dependencies import SQLSessionDep, UserDep
-from common.types import DataRetentionUpdateResponse, GetUserResponse
+from common.types import BatchMinutesUpdateRequest, DataRetentionUpdateResponse, GetUserResponse
 
 users_router = APIRouter(tags=["Users"])
 
@@ -19,6 +19,7 @@ def get_user(user: UserDep) -> GetUserResponse:
         updated_datetime=user.updated_datetime,
         email=user.email,
         data_retention_days=user.data_retention_days,
+        batch_minutes=user.batch_minutes,
     )
 
 
@@ -58,4 +59,35 @@ async def update_data_retention(
         updated_datetime=user.updated_datetime,
         email=user.email,
         data_retention_days=user.data_retention_days,
+        batch_minutes=user.batch_minutes,
+    )
+
+
+@users_router.patch("/users/batch-minutes", response_model=GetUserResponse)
+async def update_batch_minutes(
+    data: BatchMinutesUpdateRequest,
+    session: SQLSessionDep,
+    user: UserDep,
+) -> GetUserResponse:
+    """Opt the current user in or out of having their initial minutes written in a batch, which can take up to a day.
+
+    Args:
+        data: Request body containing batch_minutes
+        current_user: The current authenticated user
+    """
+    user.batch_minutes = data.batch_minutes
+    user.updated_datetime = datetime.now(tz=UTC)
+
+    await session.commit()
+    await session.refresh(user)
+
+    logger.info("Updated batch minutes to %s for user %s", data.batch_minutes, user.id)
+
+    return GetUserResponse(
+        id=user.id,
+        created_datetime=user.created_datetime,
+        updated_datetime=user.updated_datetime,
+        email=user.email,
+        data_retention_days=user.data_retention_days,
+        batch_minutes=user.batch_minutes,
     )
@@ -11,6 +11,7 @@ from fastapi.security import OAuth2PasswordBearer
 
 from backend.api.routes import router as api_router
 from backend.cleanup_job import init_cleanup_scheduler
+from common.database.notifications import notification_listener
 from common.settings import get_settings
 
 settings = get_settings()
@@ -26,6 +27,7 @@ async def lifespan(app_: FastAPI) -> AsyncGenerator[None, None]:  # noqa: ARG001
     yield
 
     log.info("Shutting down...")
+    await notification_listener.close()
 
 
 # init sentry, if used
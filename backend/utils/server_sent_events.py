@@ -0,0 +1,21 @@
+from collections.abc import AsyncIterator
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+# proxies and load balancers close connections that are idle for too long, so a comment is sent this often
+KEEPALIVE_SECONDS = 15
+KEEPALIVE = ": keepalive\n\n"
+
+
+def server_sent_event(event: str, data: BaseModel) -> str:
+    return f"event: {event}\ndata: {data.model_dump_json()}\n\n"
+
+
+def event_stream_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        # stop proxies buffering the stream, which would hold back events
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -4,7 +4,7 @@ from pathlib import Path
 
 import ffmpeg
 
-from common.constants import MONO_CHANNELS, SUPPORTED_FORMATS
+from common.constants import MONO_CHANNELS, SUPPORTED_FORMATS, TARGET_SAMPLE_RATE
 
 logger = logging.getLogger(__name__)
 
@@ -57,6 +57,36 @@ def convert_to_mp3(input_file_path: Path, output_path: Path | None = None) -> Pa
         return output_path
 
 
+def convert_to_draft_mp3(input_file_path: Path, output_path: Path | None = None) -> Path:
+    """
+    Converts audio to a small mono 16kHz MP3 for draft transcription, which is quicker to upload and transcribe.
+
+    Args:
+        input_file_path: Path to input audio file
+        output_path: Optional output path. If None, creates path with _draft suffix
+    """
+    if output_path is None:
+        output_path = input_file_path.with_name(f"{input_file_path.stem}_draft.mp3")
+
+    try:
+        input_stream = ffmpeg.input(input_file_path)
+        output_stream = ffmpeg.output(
+            input_stream,
+            str(output_path),
+            acodec="libmp3lame",
+            loglevel="warning",
+            audio_bitrate="32k",
+            ac=MONO_CHANNELS,
+            ar=TARGET_SAMPLE_RATE,
+        )
+        ffmpeg.run(output_stream, overwrite_output=True)
+    except Exception:
+        logger.exception("Unexpected error occurred in draft MP3 conversion")
+        raise
+    else:
+        return output_path
+
+
 def get_num_audio_channels(file_path: Path) -> int:
     try:
         logger.info("Getting number of audio stream using ffprobe")
@@ -1,9 +1,24 @@
-import logging
-
-from common.audio.generate_speaker_predictions import generate_speaker_predictions
-from common.types import DialogueEntry
-
-logger = logging.getLogger(__name__)
+import re
+
+from common.llm.tokens import chars_for_tokens
+from common.types import DialogueEntry, SpeakerPrediction
+
+# Phrases that usually come just before someone's name, e.g. "my name is Alice" or "thanks, Bob"
+INTRODUCTION_PATTERN = re.compile(
+    r"(?i:\b(?:my name is|my name's|i'm|i am|this is|it's|call me)\s+)(?P<name>[A-Z][a-z]+)"
+)
+ADDRESS_PATTERN = re.compile(
+    r"(?i:\b(?:thanks|thank you|cheers|hi|hello|morning|afternoon|welcome|over to you|go ahead),?\s+)"
+    r"(?P<name>[A-Z][a-z]+)|(?:^|[.?!]\s+)(?P<vocative>[A-Z][a-z]+),\s"
+)
+# Capitalised words that these patterns pick up at the start of sentences, which are not names
+NOT_NAMES = frozenset(
+    "Absolutely Actually Again Alright Also And Anyway Basically But Chair Everyone Finally Fine First Firstly Good "
+    "Great However Indeed Just Like Look Morning Now Obviously Oh Okay Ok Right Secondly So Sorry Sure Thanks Then "
+    "Well Yeah Yes No".split()
+)
+# Characters of context kept either side of a name, and from the turns before and after it
+EXCERPT_CONTEXT_CHARS = 300
 
 
 def group_dialogue_entries_by_speaker(
@@ -97,17 +112,15 @@ def add_speaker_labels_to_dialogue_entries(
     ]
 
 
-async def process_speakers_and_dialogue_entries(
-    dialogue_entries: list[DialogueEntry],
-) -> list[DialogueEntry]:
+def label_dialogue_entries(dialogue_entries: list[DialogueEntry]) -> list[DialogueEntry]:
     """
-    Process dialogue entries by grouping, normalizing, labeling, and predicting speakers.
+    Group, normalize and label speakers, ready for speaker prediction.
 
     Args:
         dialogue_entries: List of DialogueEntry objects or dictionaries
 
     Returns:
-        List of DialogueEntry objects with processed speaker labels
+        List of DialogueEntry objects labelled 'Unknown speaker 0', 'Unknown speaker 1', etc.
     """
 
     # Step 1: Group similar speakers together
@@ -117,26 +130,125 @@ async def process_speakers_and_dialogue_entries(
     normalised_dialogue_entries = normalize_speaker_labels(grouped_dialogue_entries)
 
     # Step 3: Add "Unknown speaker" prefix
-    labelled_dialogue_entries = add_speaker_labels_to_dialogue_entries(normalised_dialogue_entries)
-
-    try:
-        # Step 4: Get speaker predictions
-        speaker_predictions = await generate_speaker_predictions(labelled_dialogue_entries)
-
-        # Step 5: Update entries with predicted names
-        predicted_entries = []
-        for entry in labelled_dialogue_entries:
-            predicted_entries.append(
-                DialogueEntry(
-                    speaker=speaker_predictions.get(entry["speaker"], entry["speaker"]),
-                    text=entry["text"],
-                    start_time=entry["start_time"],
-                    end_time=entry["end_time"],
-                )
-            )
+    return add_speaker_labels_to_dialogue_entries(normalised_dialogue_entries)
+
+
+def apply_speaker_predictions(
+    entries: list[DialogueEntry], predictions: list[SpeakerPrediction]
+) -> list[DialogueEntry]:
+    """
+    Replace speaker labels with predicted names.
+
+    Args:
+        entries: List of labelled DialogueEntry objects
+        predictions: Predicted names for the speaker labels. Labels without a prediction are kept
 
-        return predicted_entries
-    except Exception as e:  # noqa: BLE001 # flagged by ruff - investigate when we have time.
-        logger.error("Error predicting speaker names: %s", str(e))
-        # Return the labeled entries if prediction fails
-        return labelled_dialogue_entries
+    Returns:
+        List of DialogueEntry objects with predicted speaker names
+    """
+    predicted_names = {prediction.original_speaker: prediction.predicted_name for prediction in predictions}
+    return [
+        DialogueEntry(
+            speaker=predicted_names.get(entry["speaker"], entry["speaker"]),
+            text=entry["text"],
+            start_time=entry["start_time"],
+            end_time=entry["end_time"],
+        )
+        for entry in entries
+    ]
+
+
+def _merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _name_matches(text: str, pattern: re.Pattern[str]) -> list[re.Match[str]]:
+    matches = []
+    for match in pattern.finditer(text):
+        groups = match.groupdict()
+        if (groups.get("name") or groups.get("vocative")) not in NOT_NAMES:
+            matches.append(match)
+    return matches
+
+
+def select_speaker_excerpts(
+    entries: list[DialogueEntry], max_tokens: int, opening_seconds: float
+) -> list[DialogueEntry]:
+    """
+    Select the parts of a labelled transcript most likely to reveal who the speakers are, within a token budget.
+
+    In order of priority, the excerpt contains the opening of each speaker's first speech, then the text around
+    self-introductions, then the text around people being addressed by name, along with the end of the turn before and
+    the start of the turn after, as that is often where the person named replies. Cut text is marked with "...".
+
+    Args:
+        entries: List of labelled DialogueEntry objects
+        max_tokens: Estimated token budget of the excerpt
+        opening_seconds: How much of each speaker's first speech to include
+
+    Returns:
+        List of DialogueEntry objects in transcript order, with the text cut down to the selected excerpts
+    """
+    candidates: list[tuple[int, int, int]] = []
+
+    def add_candidate(index: int, start: int, end: int) -> None:
+        start, end = max(start, 0), min(end, len(entries[index]["text"]))
+        if start < end:
+            candidates.append((index, start, end))
+
+    opening_remaining: dict[str, float] = {}
+    for index, entry in enumerate(entries):
+        remaining = opening_remaining.setdefault(entry["speaker"], opening_seconds)
+        if remaining <= 0:
+            continue
+        duration = max(entry["end_time"] - entry["start_time"], 1e-6)
+        add_candidate(index, 0, int(len(entry["text"]) * min(1.0, remaining / duration)))
+        opening_remaining[entry["speaker"]] = remaining - duration
+
+    for pattern in (INTRODUCTION_PATTERN, ADDRESS_PATTERN):
+        for index, entry in enumerate(entries):
+            for match in _name_matches(entry["text"], pattern):
+                add_candidate(index, match.start() - EXCERPT_CONTEXT_CHARS, match.end() + EXCERPT_CONTEXT_CHARS)
+                if index > 0:
+                    previous_length = len(entries[index - 1]["text"])
+                    add_candidate(index - 1, previous_length - EXCERPT_CONTEXT_CHARS, previous_length)
+                if index + 1 < len(entries):
+                    add_candidate(index + 1, 0, EXCERPT_CONTEXT_CHARS)
+
+    budget = chars_for_tokens(max_tokens)
+    used = 0
+    selected: dict[int, list[tuple[int, int]]] = {}
+    for index, start, end in candidates:
+        existing = selected.get(index, [])
+        merged = _merge_ranges([*existing, (start, end)])
+        cost = sum(e - s for s, e in merged) - sum(e - s for s, e in existing)
+        if index not in selected:
+            # speaker label, separators and ellipses
+            cost += len(entries[index]["speaker"]) + 10
+        if used + cost > budget:
+            continue
+        used += cost
+        selected[index] = merged
+
+    excerpt = []
+    for index in sorted(selected):
+        entry = entries[index]
+        text = entry["text"]
+        parts = [text[start:end].strip() for start, end in selected[index]]
+        excerpt_text = " ... ".join(parts)
+        if selected[index][0][0] > 0:
+            excerpt_text = f"...{excerpt_text}"
+        if selected[index][-1][1] < len(text):
+            excerpt_text = f"{excerpt_text}..."
+        excerpt.append(
+            DialogueEntry(
+                speaker=entry["speaker"], text=excerpt_text, start_time=entry["start_time"], end_time=entry["end_time"]
+            )
+        )
+    return excerpt
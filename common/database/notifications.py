@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+from uuid import UUID
+
+import asyncpg
+from sqlalchemy import Select, func, select
+
+from common.database.postgres_database import DB_HOST, DB_NAME, DB_PASSWORD, DB_PORT, DB_USER
+
+logger = logging.getLogger(__name__)
+
+# Postgres rejects notification payloads of this many bytes or more
+MAX_PAYLOAD_BYTES = 8000
+
+
+def chat_channel(chat_id: UUID) -> str:
+    return f"chat_{chat_id}"
+
+
+def user_channel(user_id: UUID) -> str:
+    return f"user_{user_id}"
+
+
+def notification(channel: str, payload: str) -> Select[Any]:
+    """A statement that sends a notification on a channel when its transaction commits.
+
+    Sending it in the transaction that makes the change it announces means listeners never hear of a change before
+    they can read it.
+    """
+    return select(func.pg_notify(channel, payload))
+
+
+class NotificationListener:
+    """A connection per process that LISTENs on the channels its subscribers want, and fans notifications out to them.
+
+    A subscriber gets every notification sent on its channel after it subscribed, so it should subscribe before reading
+    the state the notifications are about.
+    """
+
+    def __init__(self) -> None:
+        self._connection: asyncpg.Connection | None = None
+        self._queues: dict[str, set[asyncio.Queue[str | None]]] = {}
+        self._lock = asyncio.Lock()
+
+    async def _get_connection(self) -> asyncpg.Connection:
+        if self._connection is None or self._connection.is_closed():
+            self._connection = await asyncpg.connect(
+                user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT, database=DB_NAME
+            )
+            self._connection.add_termination_listener(self._terminated)
+            for channel in self._queues:
+                await self._connection.add_listener(channel, self._dispatch)
+        return self._connection
+
+    def _dispatch(self, _connection: asyncpg.Connection, _pid: int, channel: str, payload: str) -> None:
+        for queue in self._queues.get(channel, ()):
+            queue.put_nowait(payload)
+
+    def _terminated(self, _connection: asyncpg.Connection) -> None:
+        logger.warning("Lost the connection listening for notifications")
+        for queues in self._queues.values():
+            for queue in queues:
+                queue.put_nowait(None)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[asyncio.Queue[str | None]]:
+        """Queue the payloads of the notifications on a channel, then None if the connection is lost."""
+        queue: asyncio.Queue[str | None] = asyncio.Queue()
+        async with self._lock:
+            connection = await self._get_connection()
+            if channel not in self._queues:
+                await connection.add_listener(channel, self._dispatch)
+                self._queues[channel] = set()
+            self._queues[channel].add(queue)
+        try:
+            yield queue
+        finally:
+            async with self._lock:
+                self._queues[channel].discard(queue)
+                if not self._queues[channel]:
+                    del self._queues[channel]
+                    if self._connection is not None:
+                        await self._connection.remove_listener(channel, self._dispatch)
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+notification_listener = NotificationListener()
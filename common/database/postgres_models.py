@@ -117,6 +117,8 @@ class User(BaseTableMixin, table=True):
     updated_datetime: datetime = Field(sa_column=updated_datetime_column(), default=None)
     email: str = Field(index=True)
     data_retention_days: int | None = Field(default=30)
+    # whether the user's initial minutes can wait to be written in an LLM batch, which is cheaper
+    batch_minutes: bool = Field(default=False, sa_column_kwargs={"server_default": "false"})
     transcriptions: list["Transcription"] = Relationship(back_populates="user")
 
 
@@ -153,6 +155,10 @@ class Transcription(BaseTableMixin, table=True):
         default=JobStatus.AWAITING_START, sa_column_kwargs={"server_default": JobStatus.AWAITING_START.name}
     )
     error: str | None = Field(default=None)
+    transcription_service: str | None = Field(default=None)
+    transcription_routing_reason: str | None = Field(default=None)
+    # TranscriptAnalysis of the transcript as it was first transcribed
+    analysis: dict | None = Field(default=None, sa_column=Column(JSONB))
     user: User | None = Relationship(back_populates="transcriptions")
     user_id: UUID | None = Field(default=None, foreign_key="user.id")
     minutes: list[Minute] = Relationship(
@@ -175,6 +181,82 @@ class Transcription(BaseTableMixin, table=True):
     )
 
 
+class CircuitState(StrEnum):
+    CLOSED = auto()
+    OPEN = auto()
+    HALF_OPEN = auto()
+
+
+class TranscriptionCircuitBreaker(BaseTableMixin, table=True):
+    __tablename__ = "transcription_circuit_breaker"
+    created_datetime: datetime = Field(sa_column=created_datetime_column(), default=None)
+    updated_datetime: datetime = Field(sa_column=updated_datetime_column(), default=None)
+    adapter_name: str = Field(unique=True)
+    state: CircuitState = Field(
+        default=CircuitState.CLOSED, sa_column_kwargs={"server_default": CircuitState.CLOSED.name}
+    )
+    consecutive_failures: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    opened_at: datetime | None = Field(default=None, sa_column=Column(TIMESTAMP(timezone=True), nullable=True))
+    probe_started_at: datetime | None = Field(default=None, sa_column=Column(TIMESTAMP(timezone=True), nullable=True))
+
+
+class LLMCacheEntry(BaseTableMixin, table=True):
+    __tablename__ = "llm_cache_entry"
+    created_datetime: datetime = Field(sa_column=created_datetime_column(), default=None)
+    # hash of the provider, model, messages and response schema of the request
+    key: str = Field(unique=True)
+    response: str
+    expires_at: datetime = Field(sa_column=Column(TIMESTAMP(timezone=True), nullable=False))
+    last_used_at: datetime = Field(sa_column=Column(TIMESTAMP(timezone=True), nullable=False, index=True))
+
+
+class LLMRateLimit(BaseTableMixin, table=True):
+    """Token buckets of requests and tokens per minute for an LLM deployment, shared by every worker."""
+
+    __tablename__ = "llm_rate_limit"
+    deployment: str = Field(unique=True)
+    available_requests: float
+    available_tokens: float
+    refilled_at: datetime = Field(sa_column=Column(TIMESTAMP(timezone=True), nullable=False))
+    # set from the Retry-After of a rate limited response, no requests are sent until then
+    blocked_until: datetime | None = Field(default=None, sa_column=Column(TIMESTAMP(timezone=True), nullable=True))
+
+
+class LLMCall(BaseTableMixin, table=True):
+    """Usage and latency of an LLM call made for a job. Each attempt at a call that is retried has its own row."""
+
+    __tablename__ = "llm_call"
+    created_datetime: datetime = Field(sa_column=created_datetime_column(), default=None)
+    # the worker message the call was made for, and what it was for
+    job_id: UUID = Field(index=True)
+    task_type: str
+    template: str | None = None
+    call_site: str | None = None
+    # '<provider>/<model name>'
+    model: str
+    prompt_tokens: int
+    cached_tokens: int
+    completion_tokens: int
+    latency_seconds: float
+    # answered from the LLM cache, without calling the model
+    cache_hit: bool = False
+    # name of the exception the attempt failed with
+    error: str | None = None
+
+
+class MinuteBatchRequest(BaseTableMixin, table=True):
+    """The prompt for a minute version's minutes, waiting to be written by the LLM provider's batch API."""
+
+    __tablename__ = "minute_batch_request"
+    created_datetime: datetime = Field(sa_column=created_datetime_column(), default=None)
+    minute_version_id: UUID = Field(foreign_key="minute_version.id", ondelete="CASCADE", unique=True)
+    messages: list[dict[str, str]] = Field(sa_column=Column(JSONB, nullable=False))
+    # the provider's id of the batch the prompt was submitted in, None until it is submitted
+    batch_id: str | None = Field(default=None, index=True)
+    # when the batch was last checked for results
+    polled_at: datetime | None = Field(default=None, sa_column=Column(TIMESTAMP(timezone=True), nullable=True))
+
+
 class TemplateType(StrEnum):
     DOCUMENT = auto()
     FORM = auto()
@@ -186,6 +268,8 @@ class TemplateQuestion(BaseTableMixin, table=True):
     position: int
     title: str
     description: str
+    # whether answering this question needs the answers to the questions before it
+    depends_on_previous: bool = Field(default=False, sa_column_kwargs={"server_default": "false"})
 
     user_template_id: UUID = Field(foreign_key="user_template.id", ondelete="CASCADE")
     user_template: "UserTemplate" = Relationship(back_populates="questions")
@@ -2,6 +2,14 @@ from .azure_apim import AzureAPIMModelAdapter
 from .azure_openai import OpenAIModelAdapter
 from .base import ModelAdapter
 from .gemini import GeminiModelAdapter
+from .load_balanced import LoadBalancedModelAdapter
 from .ollama import OllamaModelAdapter
 
-__all__ = ["AzureAPIMModelAdapter", "GeminiModelAdapter", "ModelAdapter", "OllamaModelAdapter", "OpenAIModelAdapter"]
+__all__ = [
+    "AzureAPIMModelAdapter",
+    "GeminiModelAdapter",
+    "LoadBalancedModelAdapter",
+    "ModelAdapter",
+    "OllamaModelAdapter",
+    "OpenAIModelAdapter",
+]
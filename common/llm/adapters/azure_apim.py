@@ -1,11 +1,16 @@
 import logging
+from collections.abc import AsyncGenerator
+from contextlib import aclosing
 from typing import TypeVar, cast
 
 from openai import AsyncAzureOpenAI
 from openai.types.chat import ChatCompletion, ChatCompletionMessageParam
 from openai.types.chat.chat_completion import Choice
 
+from common.llm.usage import StreamUsage, openai_usage, record_usage
+
 from .base import ModelAdapter
+from .openai_stream import stream_chat_completion
 
 T = TypeVar("T")
 logger = logging.getLogger(__name__)
@@ -37,6 +42,7 @@ class AzureAPIMModelAdapter(ModelAdapter):
             messages=cast(list[ChatCompletionMessageParam], messages),
             response_format=response_format,
         )
+        record_usage(openai_usage(self._deployment, response.usage))
 
         parsed = response.choices[0].message.parsed
         if parsed is None:
@@ -51,15 +57,27 @@ class AzureAPIMModelAdapter(ModelAdapter):
             temperature=0.0,
             max_tokens=16384,
         )
-
         choice = response.choices[0]
-        self.choice_incomplete(choice, response)
+        record_usage(openai_usage(self._deployment, response.usage, truncated=self.choice_incomplete(choice, response)))
         message_content = choice.message.content
         if message_content is None:
             msg = "Azure APIM message.content is None"
             raise ValueError(msg)
         return message_content
 
+    async def chat_stream(self, messages: list[dict[str, str]]) -> AsyncGenerator[str, None]:
+        stream = await self.async_apim_client.chat.completions.create(
+            model=self._deployment,
+            messages=cast(list[ChatCompletionMessageParam], messages),
+            temperature=0.0,
+            max_tokens=16384,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        async with aclosing(stream_chat_completion(stream, StreamUsage(self._deployment, messages))) as texts:
+            async for text in texts:
+                yield text
+
     @staticmethod
     def choice_incomplete(choice: Choice, response: ChatCompletion) -> bool:
         if choice.finish_reason == "length":
@@ -1,13 +1,17 @@
 import logging
+from collections.abc import AsyncGenerator
+from contextlib import aclosing
 from typing import Any, TypeVar, cast
 
 from openai import AsyncAzureOpenAI
 from openai.types.chat import ChatCompletion, ChatCompletionMessageParam
 from openai.types.chat.chat_completion import Choice
 
+from common.llm.usage import StreamUsage, openai_usage, record_usage
 from common.settings import get_settings
 
 from .base import ModelAdapter
+from .openai_stream import stream_chat_completion
 
 settings = get_settings()
 T = TypeVar("T")
@@ -40,6 +44,7 @@ class OpenAIModelAdapter(ModelAdapter):
             response_format=response_format,
             **self._kwargs,
         )
+        record_usage(openai_usage(self._model, response.usage))
         parsed = response.choices[0].message.parsed
         if parsed is None:
             msg = "OpenAI response.parsed is None"
@@ -54,13 +59,26 @@ class OpenAIModelAdapter(ModelAdapter):
             max_tokens=16384,
         )
         choice = response.choices[0]
-        self.choice_incomplete(choice, response)
+        record_usage(openai_usage(self._model, response.usage, truncated=self.choice_incomplete(choice, response)))
         message_content = choice.message.content
         if message_content is None:
             msg = "OpenAI response.content is None"
             raise ValueError(msg)
         return message_content
 
+    async def chat_stream(self, messages: list[dict[str, str]]) -> AsyncGenerator[str, None]:
+        stream = await self.async_azure_client.chat.completions.create(
+            model=self._model,
+            messages=cast(list[ChatCompletionMessageParam], messages),
+            temperature=0.0,
+            max_tokens=16384,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        async with aclosing(stream_chat_completion(stream, StreamUsage(self._model, messages))) as texts:
+            async for text in texts:
+                yield text
+
     @staticmethod
     def choice_incomplete(choice: Choice, response: ChatCompletion) -> bool:
         if choice.finish_reason == "length":
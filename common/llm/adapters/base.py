@@ -1,3 +1,4 @@
+from collections.abc import AsyncGenerator
 from typing import Protocol, TypeVar
 
 from pydantic import BaseModel
@@ -11,3 +12,4 @@ T = TypeVar("T", bound=BaseModel)
 class ModelAdapter(Protocol):
     async def chat(self, messages: list[dict[str, str]]) -> str: ...
     async def structured_chat(self, messages: list[dict[str, str]], response_format: type[T]) -> T: ...
+    def chat_stream(self, messages: list[dict[str, str]]) -> AsyncGenerator[str, None]: ...
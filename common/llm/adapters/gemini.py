@@ -1,4 +1,10 @@
+import asyncio
+import hashlib
 import logging
+import time
+from collections import defaultdict
+from collections.abc import AsyncGenerator
+from contextlib import aclosing
 from typing import Any, TypeVar, cast
 
 from google import genai
@@ -7,13 +13,19 @@ from google.genai.types import (
     Content,
     ContentListUnion,
     ContentUnion,
+    CreateCachedContentConfig,
+    FinishReason,
     GenerateContentConfig,
+    GenerateContentResponse,
+    GenerateContentResponseUsageMetadata,
     HttpOptions,
     ModelContent,
     Part,
     UserContent,
 )
 
+from common.llm.tokens import estimate_tokens
+from common.llm.usage import LLMUsage, StreamUsage, record_usage
 from common.settings import get_settings
 
 from .base import ModelAdapter
@@ -29,14 +41,20 @@ class GeminiModelAdapter(ModelAdapter):
         model: str,
         generate_content_config: GenerateContentConfig,
         http_options: HttpOptions | None = None,
+        location: str | None = None,
         **kwargs: Any,
     ) -> None:
         self.generate_content_config = generate_content_config
         self._model = model
         # Note, env vars GOOGLE_CLOUD_PROJECT and GOOGLE_APPLICATION_CREDENTIALS are automatically used by the client
         # GOOGLE_CLOUD_LOCATION 'should' also be according to docs, but this doesn't appear to be true...
-        self.client = genai.Client(http_options=http_options, vertexai=True, location=settings.GOOGLE_CLOUD_LOCATION)
+        self.client = genai.Client(
+            http_options=http_options, vertexai=True, location=location or settings.GOOGLE_CLOUD_LOCATION
+        )
         self._kwargs = kwargs
+        # explicit context caches of leading prompt messages, by hash of the model and message: (name, use until)
+        self._context_caches: dict[str, tuple[str, float]] = {}
+        self._context_cache_locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
 
     @staticmethod
     def no_safety_settings() -> list[types.SafetySetting]:
@@ -74,18 +92,95 @@ class GeminiModelAdapter(ModelAdapter):
                 logger.warning(msg)
         return gemini_messages, Content(parts=[Part.from_text(text=instruction) for instruction in system_instructions])
 
-    async def structured_chat(self, messages: list[dict[str, str]], response_format: type[T]) -> T:
+    async def _context_cache(self, messages: list[dict[str, str]]) -> tuple[str | None, list[dict[str, str]]]:
+        """Cache a long leading user message, normally the transcript, as explicit Gemini context.
+
+        Returns the name of the cached content, if there is one, and the messages that are not in it.
+        """
+        if (
+            not settings.GEMINI_CONTEXT_CACHE
+            or len(messages) <= 1
+            or messages[0]["role"] != "user"
+            or estimate_tokens(messages[0]["content"]) < settings.GEMINI_CONTEXT_CACHE_MIN_TOKENS
+        ):
+            return None, messages
+        key = hashlib.sha256(f"{self._model}\n{messages[0]['content']}".encode()).hexdigest()
+        async with self._context_cache_locks[key]:
+            cache = self._context_caches.get(key)
+            if cache is None or cache[1] <= time.monotonic():
+                try:
+                    created = await self.client.aio.caches.create(
+                        model=self._model,
+                        config=CreateCachedContentConfig(
+                            contents=[UserContent(parts=[Part.from_text(text=messages[0]["content"])])],
+                            ttl=f"{settings.GEMINI_CONTEXT_CACHE_TTL_SECONDS}s",
+                        ),
+                    )
+                except Exception:
+                    logger.exception("Could not create Gemini context cache, sending the full prompt")
+                    return None, messages
+                now = time.monotonic()
+                self._context_caches = {
+                    cached_key: cached for cached_key, cached in self._context_caches.items() if cached[1] > now
+                }
+                # stop using the cache a little before it expires, so it doesn't expire during a request
+                cache = (created.name, now + settings.GEMINI_CONTEXT_CACHE_TTL_SECONDS * 0.9)
+                self._context_caches[key] = cache
+        return cache[0], messages[1:]
+
+    async def _request(
+        self, messages: list[dict[str, str]], config_update: dict[str, Any] | None = None
+    ) -> tuple[str | None, ContentListUnion, GenerateContentConfig]:
+        """The cached content, contents and config of a request for the messages."""
+        cached_content, messages = await self._context_cache(messages)
         contents, system_instruction = self._convert_openai_messages_to_gemini(messages)
-        response = await self.client.aio.models.generate_content(
-            contents=contents,
+        update: dict[str, Any] = {**(config_update or {})}
+        if cached_content is None:
+            update["system_instruction"] = system_instruction
+        else:
+            # requests using cached content cannot set a system instruction, so it is sent as the first user turn
+            update["cached_content"] = cached_content
+            if system_instruction.parts:
+                contents = [UserContent(parts=system_instruction.parts), *cast(list[ContentUnion], contents)]
+        return cached_content, contents, self.generate_content_config.model_copy(update=update)
+
+    def _forget_context_cache(self, cached_content: str | None) -> None:
+        # the cache may have gone, so a retry creates a new one
+        if cached_content is not None:
+            self._context_caches = {
+                key: cache for key, cache in self._context_caches.items() if cache[0] != cached_content
+            }
+
+    @staticmethod
+    def _truncated(response: GenerateContentResponse) -> bool:
+        return bool(response.candidates) and response.candidates[0].finish_reason == FinishReason.MAX_TOKENS
+
+    def _usage(self, usage: GenerateContentResponseUsageMetadata | None, truncated: bool = False) -> LLMUsage:
+        return LLMUsage(
             model=self._model,
-            config=self.generate_content_config.model_copy(
-                update={
-                    "response_mime_type": "application/json",
-                    "response_schema": response_format,
-                    "system_instruction": system_instruction,
-                }
-            ),
+            prompt_tokens=(usage.prompt_token_count or 0) if usage else 0,
+            cached_tokens=(usage.cached_content_token_count or 0) if usage else 0,
+            completion_tokens=(usage.candidates_token_count or 0) if usage else 0,
+            truncated=truncated,
+        )
+
+    async def _generate_content(
+        self, messages: list[dict[str, str]], config_update: dict[str, Any] | None = None
+    ) -> GenerateContentResponse:
+        cached_content, contents, config = await self._request(messages, config_update)
+        try:
+            response = await self.client.aio.models.generate_content(
+                contents=contents, model=self._model, config=config
+            )
+        except Exception:
+            self._forget_context_cache(cached_content)
+            raise
+        record_usage(self._usage(response.usage_metadata, truncated=self._truncated(response)))
+        return response
+
+    async def structured_chat(self, messages: list[dict[str, str]], response_format: type[T]) -> T:
+        response = await self._generate_content(
+            messages, {"response_mime_type": "application/json", "response_schema": response_format}
         )
         if response.parsed is None:
             msg = "Gemini response.parsed is None"
@@ -93,13 +188,31 @@ class GeminiModelAdapter(ModelAdapter):
         return cast(T, response.parsed)
 
     async def chat(self, messages: list[dict[str, str]]) -> str:
-        contents, system_instruction = self._convert_openai_messages_to_gemini(messages)
-        response = await self.client.aio.models.generate_content(
-            contents=contents,
-            model=self._model,
-            config=self.generate_content_config.model_copy(update={"system_instruction": system_instruction}),
-        )
+        response = await self._generate_content(messages)
         if response.text is None:
             msg = "Gemini response.text is None"
             raise ValueError(msg)
         return response.text
+
+    async def chat_stream(self, messages: list[dict[str, str]]) -> AsyncGenerator[str, None]:
+        cached_content, contents, config = await self._request(messages)
+        usage = StreamUsage(self._model, messages)
+        try:
+            stream = await self.client.aio.models.generate_content_stream(
+                contents=contents, model=self._model, config=config
+            )
+            # each chunk has the usage so far, so the last one received has the usage of the whole stream
+            async with aclosing(cast(AsyncGenerator[GenerateContentResponse], stream)) as chunks:
+                async for chunk in chunks:
+                    if chunk.usage_metadata is not None:
+                        usage.reported = self._usage(chunk.usage_metadata)
+                    if self._truncated(chunk):
+                        usage.truncated = True
+                    if text := chunk.text:
+                        usage.add(text)
+                        yield text
+        except Exception:
+            self._forget_context_cache(cached_content)
+            raise
+        finally:
+            usage.record()
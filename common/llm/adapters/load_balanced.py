@@ -0,0 +1,134 @@
+import logging
+import random
+import time
+from collections.abc import AsyncGenerator, Awaitable, Callable, Collection
+from contextlib import aclosing
+from typing import TypeVar
+
+from pydantic import BaseModel
+
+from common.llm.retry import is_retryable, retry_after_seconds
+from common.llm.tokens import estimate_tokens
+
+from .base import ModelAdapter
+
+T = TypeVar("T", bound=BaseModel)
+R = TypeVar("R")
+logger = logging.getLogger(__name__)
+
+# an endpoint is drained after this many calls to it in a row fail with an error worth retrying
+UNHEALTHY_AFTER_FAILURES = 3
+# for this long, doubling each time it fails again once it is back, up to the max
+DRAIN_SECONDS = 30
+MAX_DRAIN_SECONDS = 600
+
+
+class Endpoint:
+    """One of the endpoints a load balanced model is served from, and the calls being made to it."""
+
+    def __init__(self, name: str, adapter: ModelAdapter, weight: float) -> None:
+        self.name = name
+        self.adapter = adapter
+        self.weight = weight
+        # estimated prompt tokens of the calls to the endpoint that haven't finished
+        self.outstanding_tokens = 0
+        self.consecutive_failures = 0
+        # time.monotonic() until which the endpoint is not sent calls
+        self.drained_until = 0.0
+
+    def load(self, tokens: int) -> float:
+        """The endpoint's share of the outstanding tokens if it is sent a call with this many tokens."""
+        return (self.outstanding_tokens + tokens) / self.weight
+
+    def succeeded(self) -> None:
+        self.consecutive_failures = 0
+
+    def failed(self, error: Exception) -> None:
+        # errors that will not go away, such as a prompt that is too long, are the fault of the call, not the endpoint
+        if not is_retryable(error):
+            return
+        self.consecutive_failures += 1
+        drain_seconds = retry_after_seconds(error)
+        if self.consecutive_failures >= UNHEALTHY_AFTER_FAILURES:
+            drain_seconds = max(
+                drain_seconds or 0,
+                min(DRAIN_SECONDS * 2 ** (self.consecutive_failures - UNHEALTHY_AFTER_FAILURES), MAX_DRAIN_SECONDS),
+            )
+        if drain_seconds:
+            logger.warning(
+                "Draining LLM endpoint %s for %.0fs after %s", self.name, drain_seconds, type(error).__name__
+            )
+            self.drained_until = max(self.drained_until, time.monotonic() + drain_seconds)
+
+
+class LoadBalancedModelAdapter(ModelAdapter):
+    """Spreads the calls to a model over several endpoints serving it, such as deployments in different regions.
+
+    Each call goes to the healthy endpoint with the fewest outstanding tokens for its weight, so endpoints with more
+    quota get more of the traffic. If the endpoint fails with an error worth retrying, the call moves on to the next
+    healthy endpoint. An endpoint that asks for calls to be retried later, or keeps failing, is drained of new calls
+    for a while. If every endpoint is drained, calls go to the one that comes back soonest.
+
+    The endpoints' state is kept by each adapter, so by each worker process.
+    """
+
+    def __init__(self, endpoints: list[Endpoint]) -> None:
+        if not endpoints:
+            msg = "LoadBalancedModelAdapter needs at least one endpoint"
+            raise ValueError(msg)
+        self.endpoints = endpoints
+
+    def healthy_endpoints(self, exclude: Collection[Endpoint] = ()) -> list[Endpoint]:
+        now = time.monotonic()
+        return [endpoint for endpoint in self.endpoints if endpoint.drained_until <= now and endpoint not in exclude]
+
+    def choose_endpoint(self, tokens: int, exclude: Collection[Endpoint] = ()) -> Endpoint:
+        healthy = self.healthy_endpoints(exclude)
+        if not healthy:
+            return min(self.endpoints, key=lambda endpoint: endpoint.drained_until)
+        # shuffled, so that endpoints with the same load take turns
+        random.shuffle(healthy)
+        return min(healthy, key=lambda endpoint: endpoint.load(tokens))
+
+    async def _call(self, messages: list[dict[str, str]], call: Callable[[ModelAdapter], Awaitable[R]]) -> R:
+        tokens = sum(estimate_tokens(message["content"]) for message in messages)
+        tried: list[Endpoint] = []
+        while True:
+            endpoint = self.choose_endpoint(tokens, exclude=tried)
+            endpoint.outstanding_tokens += tokens
+            try:
+                result = await call(endpoint.adapter)
+            except Exception as e:
+                endpoint.failed(e)
+                tried.append(endpoint)
+                if not is_retryable(e) or not self.healthy_endpoints(exclude=tried):
+                    raise
+                logger.warning("LLM endpoint %s failed with %s, trying another", endpoint.name, type(e).__name__)
+                continue
+            finally:
+                endpoint.outstanding_tokens -= tokens
+            endpoint.succeeded()
+            return result
+
+    async def chat(self, messages: list[dict[str, str]]) -> str:
+        return await self._call(messages, lambda adapter: adapter.chat(messages))
+
+    async def structured_chat(self, messages: list[dict[str, str]], response_format: type[T]) -> T:
+        return await self._call(messages, lambda adapter: adapter.structured_chat(messages, response_format))
+
+    async def chat_stream(self, messages: list[dict[str, str]]) -> AsyncGenerator[str, None]:
+        """Stream the response from a single endpoint, as once part of it is sent it cannot move to another."""
+        tokens = sum(estimate_tokens(message["content"]) for message in messages)
+        endpoint = self.choose_endpoint(tokens)
+        endpoint.outstanding_tokens += tokens
+        try:
+            async with aclosing(endpoint.adapter.chat_stream(messages)) as texts:
+                async for text in texts:
+                    yield text
+        except Exception as e:
+            endpoint.failed(e)
+            raise
+        else:
+            endpoint.succeeded()
+        finally:
+            endpoint.outstanding_tokens -= tokens
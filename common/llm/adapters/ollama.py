@@ -1,5 +1,7 @@
 import json
 import logging
+from collections.abc import AsyncGenerator
+from contextlib import aclosing
 from typing import Any
 
 from openai import AsyncOpenAI
@@ -11,9 +13,11 @@ from openai.types.chat import (
     ChatCompletionUserMessageParam,
 )
 
+from common.llm.usage import StreamUsage, openai_usage, record_usage
 from common.settings import get_settings
 
 from .base import ModelAdapter, T
+from .openai_stream import stream_chat_completion
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -68,6 +72,7 @@ class OllamaModelAdapter(ModelAdapter):
             response_format={"type": "json_object"},
             temperature=self._kwargs.get("temperature", 0.0),
         )
+        record_usage(openai_usage(self._model, response.usage))
 
         content = response.choices[0].message.content
         if content is None:
@@ -89,8 +94,10 @@ class OllamaModelAdapter(ModelAdapter):
                 messages=openai_messages,
                 temperature=0.0,
             )
+            choice = response.choices[0]
+            record_usage(openai_usage(self._model, response.usage, truncated=choice.finish_reason == "length"))
 
-            content = response.choices[0].message.content
+            content = choice.message.content
             if content is None:
                 msg = "Received empty response from Ollama"
                 raise ValueError(msg)
@@ -98,3 +105,19 @@ class OllamaModelAdapter(ModelAdapter):
         except Exception as e:
             logger.error("Ollama chat failed: %s: %s", type(e).__name__, str(e))
             raise
+
+    async def chat_stream(self, messages: list[dict[str, str]]) -> AsyncGenerator[str, None]:
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=self._model,
+                messages=[self._convert_to_openai_message(msg) for msg in messages],
+                temperature=0.0,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            async with aclosing(stream_chat_completion(stream, StreamUsage(self._model, messages))) as texts:
+                async for text in texts:
+                    yield text
+        except Exception as e:
+            logger.error("Ollama chat stream failed: %s: %s", type(e).__name__, str(e))
+            raise
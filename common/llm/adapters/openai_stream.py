@@ -0,0 +1,39 @@
+import logging
+from collections.abc import AsyncGenerator
+
+from openai import AsyncStream
+from openai.types.chat import ChatCompletionChunk
+
+from common.llm.usage import StreamUsage, openai_usage
+
+logger = logging.getLogger(__name__)
+
+
+async def stream_chat_completion(
+    stream: AsyncStream[ChatCompletionChunk], usage: StreamUsage
+) -> AsyncGenerator[str, None]:
+    """Yield the text of a streamed chat completion as it arrives.
+
+    The stream is requested with usage included, which comes in a final chunk with no choices. Stopping early closes
+    the HTTP response, so the model stops generating.
+    """
+    try:
+        async for chunk in stream:
+            if chunk.usage is not None:
+                usage.reported = openai_usage(usage.model, chunk.usage)
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if text := choice.delta.content:
+                usage.add(text)
+                yield text
+            if choice.finish_reason == "length":
+                usage.truncated = True
+                logger.warning(
+                    "max output tokens reached: ID: %s completion_tokens (estimated) %s",
+                    chunk.id,
+                    usage.completion_tokens,
+                )
+    finally:
+        await stream.close()
+        usage.record()
@@ -0,0 +1,118 @@
+import json
+import logging
+from typing import Any, Literal, NamedTuple, Protocol, cast
+
+from openai import AsyncAzureOpenAI, AsyncOpenAI
+
+from common.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# statuses of an OpenAI batch that has not finished. Batches that have finished, failed, expired or been cancelled have
+# the responses they got in their output file, and the errors in their error file
+RUNNING_BATCH_STATUSES = frozenset({"validating", "in_progress", "finalizing", "cancelling"})
+SUCCESS_STATUS_CODE = 200
+
+
+class BatchResult(NamedTuple):
+    """The response to one request of a batch, or why it failed."""
+
+    custom_id: str
+    response: str | None
+    error: str | None
+
+
+class BatchClient(Protocol):
+    """An LLM provider's batch API, which answers requests at a lower price, within a day instead of straight away."""
+
+    async def submit(self, requests: dict[str, list[dict[str, str]]]) -> str:
+        """Submit chat requests, keyed by an id of the caller's, as a batch, returning the provider's id for it."""
+        ...
+
+    async def results(self, batch_id: str) -> list[BatchResult] | None:
+        """The results of a batch, or None if it has not finished. Requests without a result were not answered."""
+        ...
+
+
+class OpenAIBatchClient:
+    """The batch API of OpenAI, or of a Global Batch deployment of Azure OpenAI."""
+
+    def __init__(self, client: AsyncOpenAI, model: str, endpoint: str = "/chat/completions") -> None:
+        self.client = client
+        self.model = model
+        # Azure OpenAI batches are sent to /chat/completions, OpenAI batches to /v1/chat/completions
+        self.endpoint = endpoint
+
+    async def submit(self, requests: dict[str, list[dict[str, str]]]) -> str:
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": self.endpoint,
+                    "body": {"model": self.model, "messages": messages, "temperature": 0.0, "max_tokens": 16384},
+                }
+            )
+            for custom_id, messages in requests.items()
+        ]
+        batch_file = await self.client.files.create(file=("requests.jsonl", "\n".join(lines).encode()), purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint=cast(Literal["/v1/chat/completions"], self.endpoint),
+            completion_window="24h",
+        )
+        return batch.id
+
+    async def results(self, batch_id: str) -> list[BatchResult] | None:
+        batch = await self.client.batches.retrieve(batch_id)
+        if batch.status in RUNNING_BATCH_STATUSES:
+            return None
+        logger.info("Batch %s is %s", batch_id, batch.status)
+        results = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                content = await self.client.files.content(file_id)
+                results.extend(parse_result(json.loads(line)) for line in content.text.splitlines() if line.strip())
+        return results
+
+
+def parse_result(result: dict[str, Any]) -> BatchResult:
+    """Parse a line of the output or error file of an OpenAI batch."""
+    custom_id = result["custom_id"]
+    response = result.get("response") or {}
+    body = response.get("body") or {}
+    if result.get("error") or response.get("status_code") != SUCCESS_STATUS_CODE:
+        error = result.get("error") or body.get("error") or {}
+        return BatchResult(custom_id, None, error.get("message") or f"status {response.get('status_code')}")
+    choice = body["choices"][0]
+    if choice.get("finish_reason") != "stop":
+        return BatchResult(custom_id, None, f"the response stopped with finish reason {choice.get('finish_reason')}")
+    if not (content := choice["message"].get("content")):
+        return BatchResult(custom_id, None, "the response has no content")
+    return BatchResult(custom_id, content, None)
+
+
+def batch_supported() -> bool:
+    """Whether the BEST model, that minutes are written with, has a batch API to write them with."""
+    return settings.BEST_LLM_PROVIDER == "openai" and bool(
+        settings.AZURE_OPENAI_BATCH_DEPLOYMENT and settings.AZURE_OPENAI_ENDPOINT and settings.AZURE_OPENAI_API_KEY
+    )
+
+
+def create_batch_client() -> BatchClient:
+    """Creates a client for the batch API of the BEST model."""
+    if not batch_supported():
+        msg = (
+            f"Batches are not supported for {settings.BEST_LLM_PROVIDER}. They need the openai provider, with "
+            "AZURE_OPENAI_BATCH_DEPLOYMENT, AZURE_OPENAI_ENDPOINT and AZURE_OPENAI_API_KEY set"
+        )
+        raise ValueError(msg)
+    return OpenAIBatchClient(
+        AsyncAzureOpenAI(
+            azure_endpoint=cast(str, settings.AZURE_OPENAI_ENDPOINT),
+            api_key=settings.AZURE_OPENAI_API_KEY,
+            api_version=settings.AZURE_OPENAI_API_VERSION,
+        ),
+        model=cast(str, settings.AZURE_OPENAI_BATCH_DEPLOYMENT),
+    )
@@ -0,0 +1,207 @@
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Protocol
+
+from pydantic import BaseModel
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from common.database.postgres_database import async_engine
+from common.database.postgres_models import LLMCacheEntry
+from common.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def cache_key(model_id: str, messages: list[dict[str, str]], response_format: type[BaseModel] | None) -> str:
+    """Hash of everything that determines the response to a request."""
+    request = {
+        "model": model_id,
+        "messages": messages,
+        "response_schema": response_format.model_json_schema() if response_format else None,
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+
+class CacheMetrics:
+    """Process-wide hit and miss counters for the LLM cache."""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        logger.debug("LLM cache %s. Hits %s, misses %s", "hit" if hit else "miss", self.hits, self.misses)
+
+
+cache_metrics = CacheMetrics()
+
+
+class LLMCache(Protocol):
+    async def get(self, key: str) -> str | None: ...
+    async def set(self, key: str, response: str) -> None: ...
+
+
+class MemoryLLMCache:
+    """Least recently used cache in the memory of this process."""
+
+    def __init__(self, ttl_seconds: int, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    async def get(self, key: str) -> str | None:
+        if (entry := self._entries.get(key)) is None:
+            return None
+        expires_at, response = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    async def set(self, key: str, response: str) -> None:
+        self._entries[key] = (time.time() + self.ttl_seconds, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class DiskLLMCache:
+    """Cache with a file per response, which can be shared by the processes on a machine.
+
+    A file's modification time is when it was last used, so the least recently used files are evicted first.
+    """
+
+    def __init__(self, directory: str, ttl_seconds: int, max_entries: int) -> None:
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+    def _get(self, key: str) -> str | None:
+        path = self.directory / f"{key}.json"
+        try:
+            entry = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        if entry["expires_at"] < time.time():
+            path.unlink(missing_ok=True)
+            return None
+        path.touch()
+        return entry["response"]
+
+    def _set(self, key: str, response: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.directory / f"{key}.tmp"
+        temporary_path.write_text(json.dumps({"expires_at": time.time() + self.ttl_seconds, "response": response}))
+        # replace atomically, so other processes never read a partly written file
+        temporary_path.replace(self.directory / f"{key}.json")
+
+        paths = list(self.directory.glob("*.json"))
+        if len(paths) > self.max_entries:
+            paths.sort(key=lambda path: path.stat().st_mtime)
+            for path in paths[: len(paths) - self.max_entries]:
+                path.unlink(missing_ok=True)
+
+    async def get(self, key: str) -> str | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, response: str) -> None:
+        try:
+            await asyncio.to_thread(self._set, key, response)
+        except OSError:
+            logger.exception("Could not write to the LLM cache in %s", self.directory)
+
+
+class PostgresLLMCache:
+    """Cache in the llm_cache_entry table, shared by every worker and the backend.
+
+    The cache fails open: if it cannot be read or written, requests are sent to the LLM as normal.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+    async def get(self, key: str) -> str | None:
+        now = datetime.now(UTC)
+        try:
+            async with AsyncSession(async_engine) as session:
+                entry = (
+                    await session.exec(
+                        select(LLMCacheEntry).where(LLMCacheEntry.key == key, col(LLMCacheEntry.expires_at) > now)
+                    )
+                ).first()
+                if entry is None:
+                    return None
+                await session.execute(
+                    update(LLMCacheEntry).where(col(LLMCacheEntry.id) == entry.id).values(last_used_at=now)
+                )
+                await session.commit()
+                return entry.response
+        except SQLAlchemyError:
+            logger.exception("Could not read from the LLM cache")
+            return None
+
+    async def set(self, key: str, response: str) -> None:
+        now = datetime.now(UTC)
+        expires_at = now + timedelta(seconds=self.ttl_seconds)
+        try:
+            async with AsyncSession(async_engine) as session:
+                await session.execute(
+                    insert(LLMCacheEntry)
+                    .values(key=key, response=response, expires_at=expires_at, last_used_at=now)
+                    .on_conflict_do_update(
+                        index_elements=[LLMCacheEntry.key],
+                        set_={"response": response, "expires_at": expires_at, "last_used_at": now},
+                    )
+                )
+                least_recently_used = (
+                    select(LLMCacheEntry.id)
+                    .order_by(col(LLMCacheEntry.last_used_at).desc())
+                    .offset(self.max_entries)
+                    .scalar_subquery()
+                )
+                await session.execute(
+                    delete(LLMCacheEntry).where(
+                        (col(LLMCacheEntry.expires_at) <= now) | col(LLMCacheEntry.id).in_(least_recently_used)
+                    )
+                )
+                await session.commit()
+        except SQLAlchemyError:
+            logger.exception("Could not write to the LLM cache")
+
+
+@functools.cache
+def get_llm_cache() -> LLMCache | None:
+    """The LLM cache chosen by LLM_CACHE_BACKEND, or None if the cache is disabled."""
+    if settings.LLM_CACHE_BACKEND is None:
+        return None
+    if settings.LLM_CACHE_BACKEND == "memory":
+        return MemoryLLMCache(settings.LLM_CACHE_TTL_SECONDS, settings.LLM_CACHE_MAX_ENTRIES)
+    if settings.LLM_CACHE_BACKEND == "disk":
+        return DiskLLMCache(settings.LLM_CACHE_DIR, settings.LLM_CACHE_TTL_SECONDS, settings.LLM_CACHE_MAX_ENTRIES)
+    if settings.LLM_CACHE_BACKEND == "postgres":
+        return PostgresLLMCache(settings.LLM_CACHE_TTL_SECONDS, settings.LLM_CACHE_MAX_ENTRIES)
+    msg = f"Unsupported LLM cache backend: {settings.LLM_CACHE_BACKEND}"
+    raise ValueError(msg)
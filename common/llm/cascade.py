@@ -0,0 +1,30 @@
+import logging
+
+from common.llm.client import ChatBot, FastOrBestLLM, create_default_chatbot
+from common.quality_checks import QualityCheck, first_failure
+from common.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+async def cascade_chat(
+    messages: list[dict[str, str]], fast_or_best: FastOrBestLLM, checks: list[QualityCheck], call_site: str
+) -> tuple[str, ChatBot]:
+    """Write a response, returning it with the chatbot that wrote it, so the conversation can carry on.
+
+    With LLM_CASCADE, the response is written by the FAST model, and only written again by the BEST model if it fails
+    one of the checks. Otherwise, it is written by the model asked for. Escalated calls have their own call site in the
+    LLM telemetry, so how often each call site escalates can be seen.
+    """
+    if not settings.LLM_CASCADE:
+        chatbot = create_default_chatbot(fast_or_best)
+        return await chatbot.chat(messages, call_site=call_site), chatbot
+
+    chatbot = create_default_chatbot(FastOrBestLLM.FAST)
+    response = await chatbot.chat(messages, call_site=call_site)
+    if (failure := first_failure(response, checks)) is None:
+        return response, chatbot
+    logger.info("Escalating %s to the BEST model, as %s", call_site, failure)
+    chatbot = create_default_chatbot(FastOrBestLLM.BEST)
+    return await chatbot.chat(messages, call_site=f"{call_site}_escalated"), chatbot
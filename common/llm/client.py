@@ -1,3 +1,8 @@
+import asyncio
+import logging
+import weakref
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from contextlib import aclosing
 from enum import Enum, auto
 from typing import TypeVar
 
@@ -6,18 +11,72 @@ from google.genai.types import (
 )
 from pydantic import BaseModel
 from tenacity import (
+    RetryCallState,
     retry,
     stop_after_attempt,
-    wait_random_exponential,
 )
 
-from common.llm.adapters import AzureAPIMModelAdapter, GeminiModelAdapter, ModelAdapter, OpenAIModelAdapter
+from common.llm.adapters import (
+    AzureAPIMModelAdapter,
+    GeminiModelAdapter,
+    LoadBalancedModelAdapter,
+    ModelAdapter,
+    OpenAIModelAdapter,
+)
+from common.llm.adapters.load_balanced import Endpoint
+from common.llm.cache import cache_key, cache_metrics, get_llm_cache
+from common.llm.rate_limiter import rate_limiter
+from common.llm.retry import (
+    MAX_RETRY_AFTER_SECONDS,
+    is_retryable,
+    retry_after_seconds,
+    retry_after_too_long,
+    wait_before_retry,
+)
+from common.llm.telemetry import record_llm_call
+from common.llm.tokens import estimate_tokens
+from common.llm.usage import collect_usage
 from common.prompts import get_hallucination_detection_messages
-from common.settings import get_settings
+from common.settings import Settings, get_settings
 from common.types import LLMHallucination, LLMHallucinationList
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 T = TypeVar("T", bound=BaseModel)
+R = TypeVar("R")
+
+# shared adapters, by event loop and then by (model type, model name, temperature)
+_adapters: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple[str, str, float], ModelAdapter]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _should_retry(retry_state: RetryCallState) -> bool:
+    """Retry a chatbot's call that failed with an error worth retrying.
+
+    If the provider asked for a longer wait than is honoured, the call is only retried on the chatbot's alternate
+    deployment, and fails if it has none to switch to.
+    """
+    error = retry_state.outcome.exception() if retry_state.outcome else None
+    if error is None or not is_retryable(error):
+        return False
+    if retry_after_too_long(error) and retry_state.args[0].failover is None:
+        logger.warning(
+            "Not retrying %s, as the provider asked for a wait of %ss", type(error).__name__, retry_after_seconds(error)
+        )
+        return False
+    return True
+
+
+def _fail_over_or_wait(retry_state: RetryCallState) -> float:
+    """Retry a chatbot's failed call straight away on its alternate deployment, if it has one to switch to."""
+    chatbot = retry_state.args[0]
+    if chatbot.fail_over():
+        return 0
+    return wait_before_retry(retry_state)
+
+
+_retry_llm_call = retry(retry=_should_retry, wait=_fail_over_or_wait, stop=stop_after_attempt(6))
 
 
 class ChatBot:
@@ -33,131 +92,310 @@ class ChatBot:
     Attributes:
         adapter (ModelAdapter): The underlying adapter interface that handles communication
             with the conversational model(s).
+        model_id (str | None): Identifies the deployment of the model, as '<provider>/<model name>',
+            in the LLM cache, rate limits and telemetry. None means the cache and rate limits are not used.
+        cache_responses (bool): Whether responses can be cached. Only true for deterministic models.
+        failover (tuple[ModelAdapter, str] | None): The adapter and model_id of an alternate deployment. The first
+            time a call fails with an error worth retrying, the chatbot switches to it for the rest of the conversation.
     """
 
-    def __init__(self, adapter: ModelAdapter) -> None:
+    def __init__(
+        self,
+        adapter: ModelAdapter,
+        model_id: str | None = None,
+        cache_responses: bool = False,
+        failover: tuple[ModelAdapter, str] | None = None,
+    ) -> None:
         self.adapter = adapter
+        self.model_id = model_id
+        self.cache_responses = cache_responses
+        self.failover = failover
         self.messages: list[dict[str, str]] = []
 
+    def fail_over(self) -> bool:
+        """Switch to the alternate deployment, if there is one to switch to."""
+        if self.failover is None:
+            return False
+        logger.warning("Failing over from %s to %s", self.model_id, self.failover[1])
+        self.adapter, self.model_id = self.failover
+        self.failover = None
+        return True
+
+    def _cache_key(self, messages: list[dict[str, str]], response_format: type[BaseModel] | None) -> str | None:
+        if self.model_id is None or not self.cache_responses or get_llm_cache() is None:
+            return None
+        return cache_key(self.model_id, messages, response_format)
+
+    async def _acquire_rate_limit(self, messages: list[dict[str, str]]) -> None:
+        if self.model_id is not None:
+            await rate_limiter.acquire(self.model_id, sum(estimate_tokens(message["content"]) for message in messages))
+
+    async def _block_if_rate_limited(self, error: Exception) -> None:
+        if self.model_id is not None and (seconds := retry_after_seconds(error)) is not None and seconds > 0:
+            # a wait longer than is honoured fails over or fails the call, so every worker isn't held up for it
+            await rate_limiter.block(self.model_id, min(seconds, MAX_RETRY_AFTER_SECONDS))
+
+    async def _rate_limited(self, messages: list[dict[str, str]], call: Callable[[], Awaitable[R]]) -> R:
+        """Make a call to the model once its deployment's rate limit allows it."""
+        await self._acquire_rate_limit(messages)
+        try:
+            return await call()
+        except Exception as e:
+            await self._block_if_rate_limited(e)
+            raise
+
+    @property
+    def _telemetry_model(self) -> str:
+        return self.model_id or type(self.adapter).__name__
+
+    async def _cached_response(self, key: str | None) -> str | None:
+        if key is None or (cache := get_llm_cache()) is None:
+            return None
+        response = await cache.get(key)
+        cache_metrics.record(hit=response is not None)
+        return response
+
+    async def _cache_response(self, key: str | None, response: str) -> None:
+        if key is not None and (cache := get_llm_cache()) is not None:
+            await cache.set(key, response)
+
     async def hallucination_check(self) -> list[LLMHallucination]:
         if settings.HALLUCINATION_CHECK:
             result = await self.structured_chat(
-                messages=get_hallucination_detection_messages(), response_format=LLMHallucinationList
+                messages=get_hallucination_detection_messages(),
+                response_format=LLMHallucinationList,
+                call_site="hallucination",
             )
             return result.hallucinations
         return []
 
-    @retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(6))
-    async def chat(self, messages: list[dict[str, str]]) -> str:
-        response = await self.adapter.chat(messages=self.messages + messages)
+    @_retry_llm_call
+    async def chat(self, messages: list[dict[str, str]], call_site: str | None = None) -> str:
+        """call_site names what the response is for, such as 'title' or 'section_2', in the call's telemetry."""
+        request = self.messages + messages
+        key = self._cache_key(request, None)
+        async with record_llm_call(self._telemetry_model, call_site) as telemetry:
+            response = await self._cached_response(key)
+            telemetry.cache_hit = response is not None
+            if response is None:
+                with collect_usage() as usage:
+                    response = await self._rate_limited(request, lambda: self.adapter.chat(messages=request))
+                # a response cut short at the maximum output tokens is asked for again next time
+                if not any(call.truncated for call in usage):
+                    await self._cache_response(key, response)
         self.messages.extend(messages)
         self.messages.append({"role": "assistant", "content": response})
         return response
 
-    @retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(6))
-    async def structured_chat(self, messages: list[dict[str, str]], response_format: type[T]) -> T:
-        response = await self.adapter.structured_chat(messages=messages, response_format=response_format)
+    async def chat_stream(
+        self, messages: list[dict[str, str]], call_site: str | None = None
+    ) -> AsyncGenerator[str, None]:
+        """Stream the response to the messages, adding it to the conversation once it is complete.
+
+        Unlike chat, the request is not retried, as the start of the response may already have been used. Closing the
+        iterator early, for example with contextlib.aclosing, stops the model generating the rest.
+        """
+        request = self.messages + messages
+        key = self._cache_key(request, None)
+        async with record_llm_call(self._telemetry_model, call_site) as telemetry:
+            response = await self._cached_response(key)
+            telemetry.cache_hit = response is not None
+            if response is not None:
+                yield response
+            else:
+                await self._acquire_rate_limit(request)
+                parts: list[str] = []
+                with collect_usage() as usage:
+                    try:
+                        async with aclosing(self.adapter.chat_stream(request)) as texts:
+                            async for text in texts:
+                                parts.append(text)
+                                yield text
+                    except Exception as e:
+                        await self._block_if_rate_limited(e)
+                        raise
+                response = "".join(parts)
+                # as with chat, a response cut short at the maximum output tokens is asked for again next time
+                if not any(call.truncated for call in usage):
+                    await self._cache_response(key, response)
+        self.messages.extend(messages)
+        self.messages.append({"role": "assistant", "content": response})
+
+    @_retry_llm_call
+    async def structured_chat(
+        self, messages: list[dict[str, str]], response_format: type[T], call_site: str | None = None
+    ) -> T:
+        request = self.messages + messages
+        key = self._cache_key(request, response_format)
+        async with record_llm_call(self._telemetry_model, call_site) as telemetry:
+            if (cached := await self._cached_response(key)) is not None:
+                telemetry.cache_hit = True
+                response = response_format.model_validate_json(cached)
+            else:
+                response = await self._rate_limited(
+                    request, lambda: self.adapter.structured_chat(messages=request, response_format=response_format)
+                )
+                await self._cache_response(key, response.model_dump_json())
         self.messages.extend(messages)
         self.messages.append({"role": "assistant", "content": response.model_dump_json()})
         return response
 
 
-def create_chatbot(model_type: str, model_name: str, temperature: float) -> ChatBot:
+def create_endpoint_adapter(
+    model_type: str, model_name: str, temperature: float, endpoint_settings: Settings
+) -> ModelAdapter:
     """
-    Creates and returns a chatbot instance based on the specified model type and name.
+    Creates and returns a new model adapter for one endpoint of the specified model type and name.
 
-    This function initializes a ChatBot instance by selecting the appropriate model adapter
-    based on the provided model type. It supports "openai", "ollama" and "gemini" model types. Additional
-    settings required for model initialization are sourced from application settings or passed
-    as keyword arguments. If an unsupported model type is specified, a ValueError is raised.
+    This function initializes a model adapter, with its own HTTP client, by selecting the
+    appropriate adapter class based on the provided model type. It supports "openai", "ollama",
+    "azure_apim" and "gemini" model types. Additional settings required for model initialization
+    are sourced from the endpoint's settings. If an unsupported model type is specified, a
+    ValueError is raised.
 
     Args:
         model_type: A string specifying the type of the model. Supported values are "openai",
             "ollama" and "gemini".
         model_name: A string indicating the name of the model to be used.
-        **kwargs: Additional keyword arguments to be passed to the model api call, if required.
+        temperature: The sampling temperature of the model.
+        endpoint_settings: The application settings, with any the endpoint overrides.
 
     Returns:
-        ChatBot: An instance of the ChatBot class configured with the appropriate model adapter.
+        ModelAdapter: A new adapter for the model.
 
     Raises:
         ValueError: If the specified model type is unsupported.
     """
     if model_type == "openai":
-        if not settings.AZURE_OPENAI_API_KEY:
+        if not endpoint_settings.AZURE_OPENAI_API_KEY:
             msg = "AZURE_OPENAI_API_KEY is required for openai model"
             raise ValueError(msg)
-        if not settings.AZURE_OPENAI_API_VERSION:
+        if not endpoint_settings.AZURE_OPENAI_API_VERSION:
             msg = "AZURE_OPENAI_API_VERSION is required for openai model"
             raise ValueError(msg)
-        if not settings.AZURE_DEPLOYMENT:
+        if not endpoint_settings.AZURE_DEPLOYMENT:
             msg = "AZURE_DEPLOYMENT is required for openai model"
             raise ValueError(msg)
-        if not settings.AZURE_OPENAI_ENDPOINT:
+        if not endpoint_settings.AZURE_OPENAI_ENDPOINT:
             msg = "AZURE_OPENAI_ENDPOINT is required for openai model"
             raise ValueError(msg)
 
-        return ChatBot(
-            OpenAIModelAdapter(
-                model=model_name,
-                api_key=settings.AZURE_OPENAI_API_KEY,
-                api_version=settings.AZURE_OPENAI_API_VERSION,
-                azure_deployment=settings.AZURE_DEPLOYMENT,
-                azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
-                temperature=temperature,
-            )
+        return OpenAIModelAdapter(
+            model=model_name,
+            api_key=endpoint_settings.AZURE_OPENAI_API_KEY,
+            api_version=endpoint_settings.AZURE_OPENAI_API_VERSION,
+            azure_deployment=endpoint_settings.AZURE_DEPLOYMENT,
+            azure_endpoint=endpoint_settings.AZURE_OPENAI_ENDPOINT,
+            temperature=temperature,
         )
     elif model_type == "ollama":
         from common.llm.adapters.ollama import OllamaModelAdapter
 
-        return ChatBot(
-            OllamaModelAdapter(
-                model=model_name,
-                base_url=settings.OLLAMA_BASE_URL,
-                temperature=temperature,
-            )
+        return OllamaModelAdapter(
+            model=model_name,
+            base_url=endpoint_settings.OLLAMA_BASE_URL,
+            temperature=temperature,
         )
     elif model_type == "azure_apim":
-        if not settings.AZURE_APIM_URL:
+        if not endpoint_settings.AZURE_APIM_URL:
             msg = "AZURE_APIM_URL is required for azure_apim model"
             raise ValueError(msg)
-        if not settings.AZURE_APIM_DEPLOYMENT:
+        if not endpoint_settings.AZURE_APIM_DEPLOYMENT:
             msg = "AZURE_APIM_DEPLOYMENT is required for azure_apim model"
             raise ValueError(msg)
-        if not settings.AZURE_APIM_API_VERSION:
+        if not endpoint_settings.AZURE_APIM_API_VERSION:
             msg = "AZURE_APIM_API_VERSION is required for azure_apim model"
             raise ValueError(msg)
-        if not settings.AZURE_APIM_ACCESS_TOKEN:
+        if not endpoint_settings.AZURE_APIM_ACCESS_TOKEN:
             msg = "AZURE_APIM_ACCESS_TOKEN is required for azure_apim model"
             raise ValueError(msg)
-        if not settings.AZURE_APIM_SUBSCRIPTION_KEY:
+        if not endpoint_settings.AZURE_APIM_SUBSCRIPTION_KEY:
             msg = "AZURE_APIM_SUBSCRIPTION_KEY is required for azure_apim model"
             raise ValueError(msg)
 
-        return ChatBot(
-            AzureAPIMModelAdapter(
-                url=settings.AZURE_APIM_URL,
-                deployment=settings.AZURE_APIM_DEPLOYMENT,
-                api_version=settings.AZURE_APIM_API_VERSION,
-                access_token=settings.AZURE_APIM_ACCESS_TOKEN,
-                subscription_key=settings.AZURE_APIM_SUBSCRIPTION_KEY,
-            )
+        return AzureAPIMModelAdapter(
+            url=endpoint_settings.AZURE_APIM_URL,
+            deployment=endpoint_settings.AZURE_APIM_DEPLOYMENT,
+            api_version=endpoint_settings.AZURE_APIM_API_VERSION,
+            access_token=endpoint_settings.AZURE_APIM_ACCESS_TOKEN,
+            subscription_key=endpoint_settings.AZURE_APIM_SUBSCRIPTION_KEY,
         )
     elif model_type == "gemini":
-        return ChatBot(
-            GeminiModelAdapter(
-                model=model_name,
-                generate_content_config=GenerateContentConfig(
-                    safety_settings=GeminiModelAdapter.no_safety_settings(),
-                    temperature=temperature,
-                ),
-            )
+        return GeminiModelAdapter(
+            model=model_name,
+            generate_content_config=GenerateContentConfig(
+                safety_settings=GeminiModelAdapter.no_safety_settings(),
+                temperature=temperature,
+            ),
+            location=endpoint_settings.GOOGLE_CLOUD_LOCATION,
         )
     else:
         msg = f"Unsupported model type: {model_type}"
         raise ValueError(msg)
 
 
+def create_adapter(model_type: str, model_name: str, temperature: float) -> ModelAdapter:
+    """
+    Creates a new adapter for a model. A model served from several endpoints in LLM_ENDPOINTS gets an adapter that
+    balances its calls over them.
+    """
+    endpoints = settings.LLM_ENDPOINTS.get(f"{model_type}/{model_name}")
+    if not endpoints:
+        return create_endpoint_adapter(model_type, model_name, temperature, settings)
+    return LoadBalancedModelAdapter(
+        [
+            Endpoint(
+                name=endpoint.name,
+                adapter=create_endpoint_adapter(
+                    model_type, model_name, temperature, settings.model_copy(update=endpoint.settings)
+                ),
+                weight=endpoint.weight or endpoint.tokens_per_minute or 1,
+            )
+            for endpoint in endpoints
+        ]
+    )
+
+
+def get_adapter(model_type: str, model_name: str, temperature: float) -> ModelAdapter:
+    """
+    Returns the shared adapter for a model, creating it the first time it is asked for.
+
+    Adapters are reused so that their HTTP clients keep their connection pools between calls. An async HTTP client
+    can only be used on the event loop it was first used on, so adapters are shared per event loop. Outside an event
+    loop, a new adapter is returned each time.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return create_adapter(model_type, model_name, temperature)
+    loop_adapters = _adapters.setdefault(loop, {})
+    key = (model_type, model_name, temperature)
+    if key not in loop_adapters:
+        loop_adapters[key] = create_adapter(model_type, model_name, temperature)
+    return loop_adapters[key]
+
+
+def create_chatbot(model_type: str, model_name: str, temperature: float) -> ChatBot:
+    """
+    Creates a chatbot, with a conversation of its own, around the shared adapter for the model.
+
+    Chatbots are cheap to create, so a new one should be made for each conversation. Responses are only cached at
+    temperature 0, where the same request should get the same response. If the model has an alternate deployment in
+    LLM_FAILOVER, the chatbot fails over to it.
+    """
+    model_id = f"{model_type}/{model_name}"
+    failover = None
+    if alternate := settings.LLM_FAILOVER.get(model_id):
+        alternate_type, alternate_name = alternate.split("/", 1)
+        failover = (get_adapter(alternate_type, alternate_name, temperature), alternate)
+    return ChatBot(
+        get_adapter(model_type, model_name, temperature),
+        model_id=model_id,
+        cache_responses=temperature == 0,
+        failover=failover,
+    )
+
+
 class FastOrBestLLM(Enum):
     FAST = auto()
     BEST = auto()
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import random
+from datetime import UTC, datetime, timedelta
+from typing import NamedTuple
+from uuid import uuid4
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from common.database.postgres_database import async_engine
+from common.database.postgres_models import LLMRateLimit
+from common.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# waits are spread by up to this fraction, so workers that were waiting for the same bucket don't all retry at once
+WAIT_JITTER = 0.1
+
+
+class Bucket(NamedTuple):
+    requests: float
+    tokens: float
+    refilled_at: datetime
+    blocked_until: datetime | None
+
+
+def take(
+    bucket: Bucket, now: datetime, tokens: int, requests_per_minute: int | None, tokens_per_minute: int | None
+) -> tuple[Bucket, float]:
+    """Refill the buckets for the time since they were last refilled, then take a request and its tokens from them.
+
+    Returns the new buckets, and 0 if the request can be sent now, or else how many seconds to wait before trying again,
+    in which case nothing is taken.
+    """
+    minutes = max((now - bucket.refilled_at).total_seconds(), 0) / 60
+    requests = min(bucket.requests + minutes * requests_per_minute, requests_per_minute) if requests_per_minute else 0
+    available_tokens = min(bucket.tokens + minutes * tokens_per_minute, tokens_per_minute) if tokens_per_minute else 0
+    refilled = Bucket(requests, available_tokens, now, bucket.blocked_until)
+
+    if bucket.blocked_until is not None and bucket.blocked_until > now:
+        return refilled, (bucket.blocked_until - now).total_seconds()
+    waits = [0.0]
+    if requests_per_minute and requests < 1:
+        waits.append((1 - requests) / requests_per_minute * 60)
+    # a request bigger than the whole bucket waits for the bucket to be full
+    tokens = min(tokens, tokens_per_minute or 0)
+    if tokens_per_minute and available_tokens < tokens:
+        waits.append((tokens - available_tokens) / tokens_per_minute * 60)
+    if (wait := max(waits)) > 0:
+        return refilled, wait
+    return Bucket(requests - 1 if requests_per_minute else 0, available_tokens - tokens, now, bucket.blocked_until), 0.0
+
+
+class LLMRateLimiter:
+    """Token buckets of requests and prompt tokens per minute for each LLM deployment, in the llm_rate_limit table.
+
+    Every worker takes from the same buckets before calling a deployment, so together they send requests at just under
+    the deployment's quota, instead of each retrying after being rate limited. The limiter fails open: if its state
+    cannot be read or written, requests are sent straight away.
+    """
+
+    async def acquire(self, deployment: str, tokens: int) -> None:
+        """Wait until a request with this many (estimated) prompt tokens can be sent to the deployment."""
+        requests_per_minute = settings.LLM_REQUESTS_PER_MINUTE.get(deployment)
+        tokens_per_minute = settings.LLM_TOKENS_PER_MINUTE.get(deployment)
+        if not requests_per_minute and not tokens_per_minute:
+            return
+        while True:
+            try:
+                wait = await self._take(deployment, tokens, requests_per_minute, tokens_per_minute)
+            except SQLAlchemyError:
+                logger.exception("Could not take from the rate limit of %s, sending the request", deployment)
+                return
+            if wait <= 0:
+                return
+            logger.info("Rate limit of %s reached, waiting %.1fs", deployment, wait)
+            await asyncio.sleep(wait * (1 + random.uniform(0, WAIT_JITTER)))  # noqa: S311
+
+    async def block(self, deployment: str, seconds: float) -> None:
+        """Stop every worker sending requests to the deployment for this long, as asked by a Retry-After."""
+        blocked_until = datetime.now(UTC) + timedelta(seconds=seconds)
+        logger.warning("%s is rate limiting requests, blocking it for %.1fs", deployment, seconds)
+        try:
+            async with AsyncSession(async_engine) as session:
+                await session.execute(
+                    insert(LLMRateLimit)
+                    .values(
+                        id=uuid4(),
+                        deployment=deployment,
+                        available_requests=0,
+                        available_tokens=0,
+                        refilled_at=datetime.now(UTC),
+                        blocked_until=blocked_until,
+                    )
+                    .on_conflict_do_update(
+                        index_elements=["deployment"],
+                        set_={
+                            "blocked_until": func.greatest(
+                                func.coalesce(col(LLMRateLimit.blocked_until), blocked_until), blocked_until
+                            )
+                        },
+                    )
+                )
+                await session.commit()
+        except SQLAlchemyError:
+            logger.exception("Could not block %s in its rate limit", deployment)
+
+    @staticmethod
+    async def _take(
+        deployment: str, tokens: int, requests_per_minute: int | None, tokens_per_minute: int | None
+    ) -> float:
+        now = datetime.now(UTC)
+        async with AsyncSession(async_engine) as session:
+            await session.execute(
+                insert(LLMRateLimit)
+                .values(
+                    id=uuid4(),
+                    deployment=deployment,
+                    available_requests=requests_per_minute or 0,
+                    available_tokens=tokens_per_minute or 0,
+                    refilled_at=now,
+                )
+                .on_conflict_do_nothing(index_elements=["deployment"])
+            )
+            limit = (
+                await session.exec(select(LLMRateLimit).where(LLMRateLimit.deployment == deployment).with_for_update())
+            ).one()
+            bucket, wait = take(
+                Bucket(limit.available_requests, limit.available_tokens, limit.refilled_at, limit.blocked_until),
+                now,
+                tokens,
+                requests_per_minute,
+                tokens_per_minute,
+            )
+            limit.available_requests = bucket.requests
+            limit.available_tokens = bucket.tokens
+            limit.refilled_at = bucket.refilled_at
+            session.add(limit)
+            await session.commit()
+        return wait
+
+
+rate_limiter = LLMRateLimiter()
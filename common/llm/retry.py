@@ -0,0 +1,109 @@
+import logging
+import random
+import re
+from collections.abc import Mapping
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+
+import openai
+from google.genai import errors as genai_errors
+from tenacity import RetryCallState, wait_random_exponential
+
+logger = logging.getLogger(__name__)
+
+# 4xx statuses that can succeed if the same request is sent again: timeout, conflict and rate limited
+RETRYABLE_CLIENT_STATUS_CODES = frozenset({408, 409, 429})
+RATE_LIMITED_STATUS_CODE = 429
+SERVER_ERROR_STATUS_CODE = 500
+# waits asked for by a provider are lengthened by up to this fraction, or a second if more, so that the workers it
+# asked don't all retry at once
+RETRY_JITTER = 0.1
+# the longest wait asked for by a provider that is honoured, the same as the longest backoff. A longer one, such as
+# for an exhausted quota, fails the call over to another deployment, or fails it, rather than holding the worker
+MAX_RETRY_AFTER_SECONDS = 60
+
+_backoff = wait_random_exponential(min=1, max=MAX_RETRY_AFTER_SECONDS)
+# durations like '1s', '6m0s' or '20ms', as in OpenAI's x-ratelimit-reset-* headers
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNIT_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def status_code(error: BaseException) -> int | None:
+    """The HTTP status of the response an LLM client error came from, if it came from one."""
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code
+    if isinstance(error, genai_errors.APIError):
+        return error.code
+    return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an LLM call that failed with this error could succeed if it is made again.
+
+    Requests the provider rejected, such as a prompt that is too long or a missing deployment, and responses stopped by
+    the content filter or the token limit, fail the same way every time. Anything else, including connection errors
+    and empty responses, is worth another attempt.
+    """
+    if isinstance(error, openai.ContentFilterFinishReasonError | openai.LengthFinishReasonError):
+        return False
+    code = status_code(error)
+    return code is None or code >= SERVER_ERROR_STATUS_CODE or code in RETRYABLE_CLIENT_STATUS_CODES
+
+
+def parse_duration(duration: str) -> float | None:
+    parts = _DURATION_PART.findall(duration)
+    if not parts or "".join(number + unit for number, unit in parts) != duration:
+        return None
+    return sum(float(number) * _DURATION_UNIT_SECONDS[unit] for number, unit in parts)
+
+
+def rate_limit_reset_seconds(headers: Mapping[str, str]) -> float | None:
+    """The time until the rate limits in OpenAI's x-ratelimit-reset-* headers reset."""
+    resets = [
+        seconds
+        for header in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+        if (reset := headers.get(header)) and (seconds := parse_duration(reset)) is not None
+    ]
+    return max(resets, default=None)
+
+
+def retry_after_seconds(error: BaseException) -> float | None:
+    """How long the provider asked for before an LLM call that failed with this error is retried, if it said.
+
+    This is the Retry-After of the response, or for a rate limited response without one, the time until the rate
+    limits it reached reset.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if retry_after_ms := headers.get("retry-after-ms"):
+            return float(retry_after_ms) / 1000
+        if retry_after := headers.get("retry-after"):
+            try:
+                return float(retry_after)
+            except ValueError:
+                return (parsedate_to_datetime(retry_after) - datetime.now(UTC)).total_seconds()
+    except (TypeError, ValueError):
+        logger.warning("Could not parse Retry-After header of %s", type(error).__name__)
+        return None
+    # the reset headers are sent with every response, so only a rate limited one says which limit was reached
+    return rate_limit_reset_seconds(headers) if status_code(error) == RATE_LIMITED_STATUS_CODE else None
+
+
+def retry_after_too_long(error: BaseException) -> bool:
+    """Whether the provider asked for a longer wait than MAX_RETRY_AFTER_SECONDS before the call is retried."""
+    seconds = retry_after_seconds(error)
+    return seconds is not None and seconds > MAX_RETRY_AFTER_SECONDS
+
+
+def wait_before_retry(retry_state: RetryCallState) -> float:
+    """Wait as long as the provider asked before retrying a failed LLM call, or back off exponentially if it didn't.
+
+    The wait is never longer than MAX_RETRY_AFTER_SECONDS.
+    """
+    error = retry_state.outcome.exception() if retry_state.outcome else None
+    if error is not None and (seconds := retry_after_seconds(error)) is not None:
+        seconds = min(max(seconds, 0), MAX_RETRY_AFTER_SECONDS)
+        return seconds + random.uniform(0, max(seconds * RETRY_JITTER, 1))  # noqa: S311
+    return _backoff(retry_state)
@@ -0,0 +1,199 @@
+import argparse
+import logging
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import UTC, datetime, timedelta
+from typing import NamedTuple
+from uuid import UUID
+
+from sqlalchemy import Integer, func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from common.database.postgres_database import SessionLocal, async_engine
+from common.database.postgres_models import LLMCall
+from common.llm.usage import collect_usage
+from common.settings import get_settings
+from common.types import TaskType
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class LLMJob(NamedTuple):
+    id: UUID
+    task_type: TaskType
+    template: str | None
+
+
+# the job the LLM calls made in the current context are for, if any
+_current_job: ContextVar[LLMJob | None] = ContextVar("llm_job", default=None)
+
+
+@contextmanager
+def llm_job(job_id: UUID, task_type: TaskType, template: str | None = None) -> Iterator[None]:
+    """Record the LLM calls made inside the block, including by the tasks it starts, against a job.
+
+    Calls made outside of a job, for example by evals, are not recorded.
+    """
+    token = _current_job.set(LLMJob(job_id, task_type, template))
+    try:
+        yield
+    finally:
+        _current_job.reset(token)
+
+
+class LLMCallTelemetry:
+    """Set by the caller while an LLM call is made, for what it is recorded with."""
+
+    def __init__(self) -> None:
+        self.cache_hit = False
+
+
+@asynccontextmanager
+async def record_llm_call(model: str, call_site: str | None) -> AsyncIterator[LLMCallTelemetry]:
+    """Record the tokens used and time taken by the LLM call made inside the block, and whether it failed.
+
+    The usage is whatever the adapters report inside the block, so a response from the LLM cache uses no tokens.
+    """
+    job = _current_job.get()
+    if job is None or not settings.LLM_TELEMETRY:
+        yield LLMCallTelemetry()
+        return
+
+    telemetry = LLMCallTelemetry()
+    error: str | None = None
+    started = time.monotonic()
+    with collect_usage() as usage:
+        try:
+            yield telemetry
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            call = LLMCall(
+                job_id=job.id,
+                task_type=job.task_type.name.lower(),
+                template=job.template,
+                call_site=call_site,
+                model=model,
+                prompt_tokens=sum(u.prompt_tokens for u in usage),
+                cached_tokens=sum(u.cached_tokens for u in usage),
+                completion_tokens=sum(u.completion_tokens for u in usage),
+                latency_seconds=time.monotonic() - started,
+                cache_hit=telemetry.cache_hit,
+                error=error,
+            )
+            await save_llm_call(call)
+
+
+async def save_llm_call(call: LLMCall) -> None:
+    """Telemetry is only for reporting, so if a call cannot be saved the error is logged rather than raised."""
+    try:
+        async with AsyncSession(async_engine) as session:
+            session.add(call)
+            await session.commit()
+    except SQLAlchemyError:
+        logger.exception("Could not record LLM call %s of job %s", call.call_site, call.job_id)
+
+
+def call_cost(model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> float | None:
+    """The cost of tokens used with a model, at its LLM_PRICES, or None if it has no price."""
+    if (prices := settings.LLM_PRICES.get(model)) is None:
+        return None
+    input_price, cached_input_price, output_price = prices
+    return (
+        (prompt_tokens - cached_tokens) * input_price
+        + cached_tokens * cached_input_price
+        + completion_tokens * output_price
+    ) / 1_000_000
+
+
+class CallSiteReport(NamedTuple):
+    task_type: str
+    template: str | None
+    call_site: str | None
+    model: str
+    calls: int
+    failed_calls: int
+    cache_hits: int
+    prompt_tokens: int
+    cached_tokens: int
+    completion_tokens: int
+    total_latency_seconds: float
+    p50_latency_seconds: float
+    p95_latency_seconds: float
+
+    @property
+    def cost(self) -> float | None:
+        return call_cost(self.model, self.prompt_tokens, self.cached_tokens, self.completion_tokens)
+
+
+def call_site_reports(since: datetime) -> list[CallSiteReport]:
+    """Totals and latencies of the LLM calls made since a time, by template, call site and model."""
+    group = (col(LLMCall.task_type), col(LLMCall.template), col(LLMCall.call_site), col(LLMCall.model))
+    latency = col(LLMCall.latency_seconds)
+    with SessionLocal() as session:
+        rows = session.exec(
+            select(
+                *group,
+                func.count(),
+                func.count(col(LLMCall.error)),
+                func.sum(func.cast(col(LLMCall.cache_hit), Integer)),
+                func.sum(col(LLMCall.prompt_tokens)),
+                func.sum(col(LLMCall.cached_tokens)),
+                func.sum(col(LLMCall.completion_tokens)),
+                func.sum(latency),
+                func.percentile_cont(0.5).within_group(latency),
+                func.percentile_cont(0.95).within_group(latency),
+            )
+            .where(col(LLMCall.created_datetime) >= since)
+            .group_by(*group)
+        ).all()
+    return [CallSiteReport(*row) for row in rows]
+
+
+def format_report(reports: list[CallSiteReport]) -> str:
+    """A table of the reports by template, with the templates that cost the most, and then take longest, first."""
+    by_template: dict[str, list[CallSiteReport]] = {}
+    for report in reports:
+        by_template.setdefault(report.template or report.task_type, []).append(report)
+
+    def total_cost(template_reports: list[CallSiteReport]) -> float:
+        return sum(report.cost or 0 for report in template_reports)
+
+    lines = [
+        f"{'template / call site':<40} {'model':<30} {'calls':>6} {'failed':>6} {'cached':>6} {'prompt':>10} "
+        f"{'completion':>10} {'cost':>9} {'seconds':>9} {'p50':>6} {'p95':>6}"
+    ]
+    for template, template_reports in sorted(
+        by_template.items(),
+        key=lambda item: (total_cost(item[1]), sum(report.total_latency_seconds for report in item[1])),
+        reverse=True,
+    ):
+        lines.append(
+            f"{template:<40} {'':<30} {sum(r.calls for r in template_reports):>6} "
+            f"{sum(r.failed_calls for r in template_reports):>6} {sum(r.cache_hits for r in template_reports):>6} "
+            f"{sum(r.prompt_tokens for r in template_reports):>10} "
+            f"{sum(r.completion_tokens for r in template_reports):>10} {total_cost(template_reports):>9.2f} "
+            f"{sum(r.total_latency_seconds for r in template_reports):>9.0f}"
+        )
+        for report in sorted(template_reports, key=lambda r: (r.cost or 0, r.total_latency_seconds), reverse=True):
+            cost = "-" if report.cost is None else f"{report.cost:.2f}"
+            lines.append(
+                f"  {report.call_site or '-':<38} {report.model:<30} {report.calls:>6} {report.failed_calls:>6} "
+                f"{report.cache_hits:>6} {report.prompt_tokens:>10} {report.completion_tokens:>10} {cost:>9} "
+                f"{report.total_latency_seconds:>9.0f} {report.p50_latency_seconds:>6.1f} "
+                f"{report.p95_latency_seconds:>6.1f}"
+            )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report the cost and latency of LLM calls by template")
+    parser.add_argument("--days", type=float, default=7, help="Report on the calls made in this many days")
+    args = parser.parse_args()
+    print(format_report(call_site_reports(datetime.now(UTC) - timedelta(days=args.days))))  # noqa: T201
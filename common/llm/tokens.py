@@ -0,0 +1,18 @@
+from common.database.postgres_models import DialogueEntry
+from common.format_transcript import transcript_as_speaker_and_utterance
+
+# A rough average for English text with the models we use. Good enough for budgeting prompts, where being a few percent
+# out does not matter, and it avoids depending on each provider's tokenizer.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def estimate_transcript_tokens(transcript: list[DialogueEntry]) -> int:
+    return estimate_tokens(transcript_as_speaker_and_utterance(transcript))
+
+
+def chars_for_tokens(tokens: int) -> int:
+    return tokens * CHARS_PER_TOKEN
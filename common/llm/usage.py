@@ -0,0 +1,105 @@
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import NamedTuple
+
+from openai.types import CompletionUsage
+
+from common.llm.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUsage(NamedTuple):
+    model: str
+    prompt_tokens: int
+    # prompt tokens read from the provider's prompt cache, which are billed at a discount
+    cached_tokens: int
+    completion_tokens: int
+    # whether the response was cut short at the maximum output tokens
+    truncated: bool = False
+
+
+# the lists collecting the usage of the LLM calls made in the current context, innermost last
+_collected_usage: ContextVar[tuple[list[LLMUsage], ...]] = ContextVar("collected_usage", default=())
+
+
+def openai_usage(model: str, usage: CompletionUsage | None, truncated: bool = False) -> LLMUsage:
+    if usage is None:
+        return LLMUsage(model=model, prompt_tokens=0, cached_tokens=0, completion_tokens=0, truncated=truncated)
+    details = usage.prompt_tokens_details
+    return LLMUsage(
+        model=model,
+        prompt_tokens=usage.prompt_tokens,
+        cached_tokens=(details.cached_tokens or 0) if details else 0,
+        completion_tokens=usage.completion_tokens,
+        truncated=truncated,
+    )
+
+
+def record_usage(usage: LLMUsage) -> None:
+    logger.info(
+        "LLM call to %s: %s prompt tokens (%s cached), %s completion tokens",
+        usage.model,
+        usage.prompt_tokens,
+        usage.cached_tokens,
+        usage.completion_tokens,
+    )
+    for collected in _collected_usage.get():
+        collected.append(usage)
+
+
+class StreamUsage:
+    """Usage of a streamed response, counted as it arrives.
+
+    Providers only report usage at the end of a stream, so if a stream is stopped part way through, an estimate of the
+    tokens it used is recorded instead.
+    """
+
+    def __init__(self, model: str, messages: list[dict[str, str]]) -> None:
+        self.model = model
+        self.prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+        self.reported: LLMUsage | None = None
+        self.truncated = False
+        self._completion: list[str] = []
+
+    @property
+    def completion_tokens(self) -> int:
+        return estimate_tokens("".join(self._completion))
+
+    def add(self, text: str) -> None:
+        self._completion.append(text)
+
+    def record(self) -> None:
+        usage = self.reported or LLMUsage(
+            model=self.model,
+            prompt_tokens=self.prompt_tokens,
+            cached_tokens=0,
+            completion_tokens=self.completion_tokens,
+        )
+        record_usage(usage._replace(truncated=self.truncated))
+
+
+@contextmanager
+def collect_usage() -> Iterator[list[LLMUsage]]:
+    """Collect the usage of every LLM call made inside the block, including by the tasks it starts.
+
+    Blocks can be nested, each collects the calls made inside it.
+    """
+    collected: list[LLMUsage] = []
+    token = _collected_usage.set((*_collected_usage.get(), collected))
+    try:
+        yield collected
+    finally:
+        _collected_usage.reset(token)
+
+
+def summarise_usage(usages: list[LLMUsage]) -> str:
+    prompt_tokens = sum(usage.prompt_tokens for usage in usages)
+    cached_tokens = sum(usage.cached_tokens for usage in usages)
+    return (
+        f"{len(usages)} LLM calls, {prompt_tokens} prompt tokens of which {cached_tokens} cached "
+        f"({cached_tokens / prompt_tokens if prompt_tokens else 0:.0%}), "
+        f"{sum(usage.completion_tokens for usage in usages)} completion tokens"
+    )
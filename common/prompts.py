@@ -5,9 +5,16 @@ from common.format_transcript import transcript_as_index_speaker_and_utterance,
 
 
 def get_transcript_messages(transcript: list[DialogueEntry]) -> dict[str, str]:
+    """The transcript, as the first message of every prompt about a meeting.
+
+    The message is the same, byte for byte, in every call made for a meeting, and the instructions for each call come
+    after it, so providers can cache it as a shared prompt prefix. The transcript items are indexed so that citations
+    can refer to them.
+    """
     return {
         "role": "user",
-        "content": f"Here is the meeting transcript:\n{transcript_as_speaker_and_utterance(transcript)}",
+        "content": "Here is the meeting transcript. Each line starts with the index of the transcript item in square "
+        f"brackets:\n{transcript_as_index_speaker_and_utterance(transcript)}",
     }
 
 
@@ -19,6 +26,7 @@ def get_ai_edit_initial_messages(
     minutes: str, edit_instructions: str, transcript: list[DialogueEntry]
 ) -> list[dict[str, str]]:
     return [
+        get_transcript_messages(transcript),
         {
             "role": "system",
             "content": "You are a meeting minutes editor. You are given a transcript of a meeting and a summary of that meeting. "
@@ -28,7 +36,6 @@ def get_ai_edit_initial_messages(
             "Your output should be in HTML format and must not contain any code fences or other formatting. "
             "Do not reformat anything in square brackets, but keep them in their original style, for example [1][2][3] should remain as [1][2][3] rather than be [1-3]",
         },
-        get_transcript_messages(transcript),
         get_minutes_messages(minutes),
         {
             "role": "user",
@@ -37,14 +44,16 @@ def get_ai_edit_initial_messages(
     ]
 
 
-def get_chat_with_transcript_system_message(transcript: list[DialogueEntry]) -> dict[str, str]:
-    return {
-        "role": "system",
-        "content": f"""You are given a transcript of a meeting. Your role is to respond to the user's requests about the transcript.
+def get_chat_with_transcript_messages(transcript: list[DialogueEntry]) -> list[dict[str, str]]:
+    return [
+        get_transcript_messages(transcript),
+        {
+            "role": "system",
+            "content": """You are given a transcript of a meeting. Your role is to respond to the user's requests about the transcript.
 Your answers should only use the information contained in the transcript. Do not reference anything outside of the transcript.
-You should add citations where necessary. Each citation should be of the form [n] where n is the index of the transcript item. Each citation should be one number surrounded by square brackets. For example, you must do [80][81] not [80, 81]
-Here is the meeting transcript:\n{transcript_as_index_speaker_and_utterance(transcript)}""",
-    }
+You should add citations where necessary. Each citation should be of the form [n] where n is the index of the transcript item. Each citation should be one number surrounded by square brackets. For example, you must do [80][81] not [80, 81]""",
+        },
+    ]
 
 
 def get_basic_minutes_prompt(
@@ -57,11 +66,11 @@ def get_basic_minutes_prompt(
     """
     prompt = """Provide a simple summary of the meeting."""
     return [
+        get_transcript_messages(transcript),
         {
             "role": "system",
             "content": prompt,
         },
-        get_transcript_messages(transcript),
     ]
 
 
@@ -73,23 +82,23 @@ def get_sections_from_transcript_prompt(
 The sections should be in the order they appear in the transcript. Please think carefully about what the sections should be and based on the content of the transcript. The sections tend to be the high level topics of discussion."""
 
     return [
+        get_transcript_messages(transcript),
         {
             "role": "system",
             "content": system_message,
         },
-        get_transcript_messages(transcript),
     ]
 
 
 def get_meeting_detection_prompt(transcript: list[DialogueEntry]) -> list[dict[str, str]]:
     return [
+        get_transcript_messages(transcript),
         {
             "role": "system",
             "content": "Your task is to identify if the transcript appears to be a long meeting between "
             "multiple parties, involving a substantial amount of discussion between multiple speakers."
             " Return True if the transcript appears to be a long meeting, and False if it appears to be a short meeting.",
         },
-        get_transcript_messages(transcript),
     ]
 
 
@@ -120,18 +129,40 @@ def get_section_for_agenda_prompt(section: str) -> dict[str, str]:
     return {"role": "user", "content": f"The item of the meeting that you will be contributing to is: {section}"}
 
 
+def get_meeting_outline_prompt(sections: list[str], current_section: int) -> dict[str, str]:
+    outline = "\n".join(
+        f"{i}. {section}{' (this item)' if i - 1 == current_section else ''}" for i, section in enumerate(sections, 1)
+    )
+    return {
+        "role": "user",
+        "content": "For context, the items of the whole meeting are listed below. You have only been given the part "
+        "of the transcript for this item. Cover only this item, and leave the others to their own parts of the "
+        f"minute.\n{outline}",
+    }
+
+
+def get_section_consistency_prompt(draft: str) -> list[dict[str, str]]:
+    return [
+        {
+            "role": "user",
+            "content": "The sections of the minutes below were written separately. Make the names, titles, terms and "
+            "formatting consistent across the sections, and remove any point that is repeated in more than one "
+            "section, keeping it in the section it belongs to. Do not add, remove or reword anything else, and keep "
+            "the sections in the same order. Respond with the full minutes only."
+            f"\n\n{draft}",
+        }
+    ]
+
+
 def get_citations_prompt(initial_draft: str, transcript: list[DialogueEntry]) -> list[dict[str, str]]:
     return [
+        get_transcript_messages(transcript),
         {
             "role": "user",
             "content": f"""<task>
-Add citations to the provided meeting summary which reference items in the transcript.
+Add citations to the provided meeting summary which reference items in the transcript above.
 </task>
 
-<transcript>
-{transcript_as_index_speaker_and_utterance(transcript)}
-</transcript>
-
 <meeting_summary>
 {initial_draft}
 </meeting_summary>
@@ -149,7 +180,7 @@ Do not add citations to lists of attendees.
 Output the meeting summary unchanged except for the addition of citations.
 </output>
 """,
-        }
+        },
     ]
 
 
@@ -157,6 +188,27 @@ def string_to_system_message(string: str) -> dict[str, str]:
     return {"role": "system", "content": string}
 
 
+speaker_identification_instructions = """Speakers:
+Based on the conversation content, identify the names of the speakers, who are currently labelled 'Unknown speaker 0', 'Unknown speaker 1', etc.
+Only make high-confidence identifications, otherwise keep the original speaker label. Pay careful attention to whether the speaker is saying their own name or referring to another speaker.
+Do not use any names that are not in the transcript.
+For each speaker, provide the original speaker label and your identified name (this will be the original speaker label if you are not confident)."""
+
+
+def get_transcript_analysis_prompt(transcript: list[DialogueEntry]) -> list[dict[str, str]]:
+    system_message = f"""You are an expert at analysing meeting transcripts. Read the transcript once and provide everything below.
+
+{speaker_identification_instructions}
+
+Title:
+Generate a short title for the meeting.
+
+Sections:
+Generate a list of sections that the meeting should be split into. The sections should be in the order they appear in the transcript. Please think carefully about what the sections should be and based on the content of the transcript. The sections tend to be the high level topics of discussion."""
+
+    return [get_transcript_messages(transcript), string_to_system_message(system_message)]
+
+
 def get_meeting_title_prompt(transcript: list[DialogueEntry]) -> list[dict[str, str]]:
     prompt = f"""<task>
 Generate a short title for the meeting
@@ -166,3 +218,31 @@ Generate a short title for the meeting
 {transcript_as_speaker_and_utterance(transcript)}
 </transcript>"""
     return [{"role": "user", "content": prompt}]
+
+
+def get_speaker_excerpt_analysis_prompt(excerpt: list[DialogueEntry]) -> list[dict[str, str]]:
+    system_message = f"""You are an expert at analysing meeting transcripts. You are given excerpts of a long meeting: the first words of each speaker, and the passages where people introduce themselves or address each other by name. Text that was cut is marked with "...".
+
+{speaker_identification_instructions}"""
+
+    return [
+        string_to_system_message(system_message),
+        {
+            "role": "user",
+            "content": f"Here are the excerpts of the meeting transcript:\n{transcript_as_speaker_and_utterance(excerpt)}",
+        },
+    ]
+
+
+def get_chunk_notes_prompt(
+    chunk: list[DialogueEntry], part: int, total_parts: int, time_range: str
+) -> list[dict[str, str]]:
+    system_message = f"""You are an expert meeting note taker. You are given part {part} of {total_parts} of the transcript of a long meeting, covering {time_range}. Consecutive parts overlap slightly at the edges.
+
+Write detailed notes of this part, which will later be combined with the notes of the other parts to write the minutes of the whole meeting. The notes must:
+- Follow the order of the discussion
+- Attribute points to the speakers who made them, using their names or labels exactly as they appear in the transcript
+- Keep every decision, action, figure, date and disagreement
+- Keep as much detail as possible. Do not add an introduction or a conclusion, and do not summarise the meeting as a whole"""
+
+    return [get_transcript_messages(chunk), string_to_system_message(system_message)]
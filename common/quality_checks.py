@@ -0,0 +1,103 @@
+import re
+from collections.abc import Callable
+
+from common.database.postgres_models import DialogueEntry
+
+# a cheap check of an LLM response, that returns why the response fails it, or None if it passes
+QualityCheck = Callable[[str], str | None]
+
+# a response that starts like this is the model declining to do what it was asked
+REFUSAL_PATTERN = re.compile(
+    r"^\W*(I'm sorry|I am sorry|I apologi[sz]e|I can't|I cannot|I'm unable|I am unable|I'm not able|As an AI)",
+    re.IGNORECASE,
+)
+HEADING_PATTERN = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$", re.MULTILINE)
+CITATION_PATTERN = re.compile(r"\[(\d+)(?:-(\d+))?\]")
+# fraction of the template's headings, or the source's citations, a response must keep
+MIN_HEADING_COVERAGE = 0.8
+MIN_CITATION_COVERAGE = 0.5
+# length of minutes, or a section of them, relative to the transcript they are written from
+MIN_MINUTES_LENGTH_RATIO = 0.02
+# length of edited minutes relative to the minutes before the edit
+MIN_EDIT_LENGTH_RATIO = 0.25
+MAX_EDIT_LENGTH_RATIO = 4
+# length of minutes made consistent relative to the sections they were made from, which only lose repeated points
+MIN_CONSISTENCY_LENGTH_RATIO = 0.8
+MAX_CONSISTENCY_LENGTH_RATIO = 1.2
+
+
+def word_count(text: str) -> int:
+    return len(text.split())
+
+
+def transcript_word_count(transcript: list[DialogueEntry]) -> int:
+    return sum(word_count(entry["text"]) for entry in transcript)
+
+
+def check_not_refusal(response: str) -> str | None:
+    if REFUSAL_PATTERN.match(response):
+        return "the response is a refusal"
+    return None
+
+
+def check_length(reference_words: int, min_ratio: float, max_ratio: float | None = None) -> QualityCheck:
+    """Check a response is long enough, and not too long, for the text it was written from."""
+
+    def check(response: str) -> str | None:
+        ratio = word_count(response) / max(reference_words, 1)
+        if ratio < min_ratio:
+            return f"the response is {ratio:.1%} of the length of its source, less than {min_ratio:.1%}"
+        if max_ratio is not None and ratio > max_ratio:
+            return f"the response is {ratio:.0%} of the length of its source, more than {max_ratio:.0%}"
+        return None
+
+    return check
+
+
+def _normalise_heading(heading: str) -> str:
+    return re.sub(r"\W+", " ", heading).strip().lower()
+
+
+def check_headings(markdown_template: str) -> QualityCheck:
+    """Check a response keeps the headings of the markdown template it was asked to follow."""
+    headings = {_normalise_heading(heading) for heading in HEADING_PATTERN.findall(markdown_template)} - {""}
+
+    def check(response: str) -> str | None:
+        if not headings:
+            return None
+        kept = headings & {_normalise_heading(heading) for heading in HEADING_PATTERN.findall(response)}
+        if len(kept) / len(headings) < MIN_HEADING_COVERAGE:
+            return f"the response has {len(kept)} of the template's {len(headings)} headings"
+        return None
+
+    return check
+
+
+def cited_items(text: str) -> set[int]:
+    """The transcript items cited in a text, with ranges like [3-5] expanded."""
+    items: set[int] = set()
+    for start, end in CITATION_PATTERN.findall(text):
+        items.update(range(int(start), int(end or start) + 1))
+    return items
+
+
+def check_citations_kept(source: str) -> QualityCheck:
+    """Check a response rewritten from a source keeps most of the source's citations."""
+    source_items = cited_items(source)
+
+    def check(response: str) -> str | None:
+        if not source_items:
+            return None
+        kept = source_items & cited_items(response)
+        if len(kept) / len(source_items) < MIN_CITATION_COVERAGE:
+            return f"the response keeps {len(kept)} of the {len(source_items)} transcript items cited in its source"
+        return None
+
+    return check
+
+
+def first_failure(response: str, checks: list[QualityCheck]) -> str | None:
+    for check in checks:
+        if (failure := check(response)) is not None:
+            return failure
+    return None
@@ -0,0 +1,38 @@
+import logging
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import Select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+
+from common.database.notifications import notification, user_channel
+from common.database.postgres_database import SessionLocal
+from common.types import JobStatusEvent
+
+logger = logging.getLogger(__name__)
+
+
+def job_event_notification(user_id: UUID, event: JobStatusEvent) -> Select[Any]:
+    return notification(user_channel(user_id), event.model_dump_json())
+
+
+def add_job_event(session: Session, user_id: UUID | None, event: JobStatusEvent) -> None:
+    """Send the event when the session's transaction, which saves the change it is about, commits."""
+    if user_id is not None:
+        session.execute(job_event_notification(user_id, event))
+
+
+def send_job_event(user_id: UUID | None, event: JobStatusEvent) -> None:
+    """Send an event about progress that isn't saved.
+
+    Progress events only save the browser waiting, so if one cannot be sent the error is logged rather than raised.
+    """
+    if user_id is None:
+        return
+    try:
+        with SessionLocal() as session:
+            add_job_event(session, user_id, event)
+            session.commit()
+    except SQLAlchemyError:
+        logger.exception("Could not send %s event for %s", event.job_type, event.id)
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import wave
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import BinaryIO
+
+from common.convert_american_to_british_spelling import convert_american_to_british_spelling
+from common.services.transcription_services import TranscriptionAdapter, load_adapters
+from common.services.transcription_services.adapter import AdapterType
+from common.settings import get_settings
+from common.types import DialogueEntry
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# live audio is expected as raw 16-bit little-endian mono PCM at 16kHz
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+CHANNELS = 1
+BYTES_PER_SECOND = SAMPLE_RATE * SAMPLE_WIDTH * CHANNELS
+# trailing audio shorter than this at the end of a meeting is not worth transcribing
+MIN_FINAL_WINDOW_SECONDS = 1
+
+
+def get_live_adapter() -> type[TranscriptionAdapter]:
+    adapter = load_adapters().get(settings.LIVE_TRANSCRIPTION_SERVICE)
+    if not adapter or not adapter.is_available():
+        msg = f"Live transcription service {settings.LIVE_TRANSCRIPTION_SERVICE} is not available"
+        raise RuntimeError(msg)
+    if adapter.adapter_type != AdapterType.SYNCHRONOUS:
+        msg = f"Live transcription service {adapter.name} must be synchronous"
+        raise RuntimeError(msg)
+    return adapter
+
+
+def write_wav(path: Path, pcm: bytes | BinaryIO) -> None:
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(CHANNELS)
+        wav_file.setsampwidth(SAMPLE_WIDTH)
+        wav_file.setframerate(SAMPLE_RATE)
+        if isinstance(pcm, bytes):
+            wav_file.writeframes(pcm)
+            return
+        while chunk := pcm.read(60 * BYTES_PER_SECOND):
+            wav_file.writeframes(chunk)
+
+
+class LiveTranscriber:
+    """Transcribes a live audio stream in consecutive fixed-length windows.
+
+    Audio is appended to a PCM file on disk as it arrives, so the full recording can be uploaded at the end of the
+    meeting. Each complete window is transcribed in the background by a synchronous adapter, with timestamps offset to
+    the start of the window, and the resulting entries are passed to `on_entries` as they are finalised.
+
+    Speaker labels come from per-window diarization, so the same person may get different labels in different
+    windows. Speaker identification after the meeting is expected to reconcile these.
+    """
+
+    def __init__(
+        self,
+        adapter: type[TranscriptionAdapter],
+        workdir: Path,
+        on_entries: Callable[[list[DialogueEntry]], Awaitable[None]],
+        window_seconds: int | None = None,
+    ) -> None:
+        self.adapter = adapter
+        self.workdir = workdir
+        self.on_entries = on_entries
+        self.window_bytes = (window_seconds or settings.LIVE_TRANSCRIPTION_WINDOW_SECONDS) * BYTES_PER_SECOND
+        self.dialogue_entries: list[DialogueEntry] = []
+        self.recording_pcm_path = workdir / "recording.pcm"
+        self._recording = self.recording_pcm_path.open("wb")
+        self._pending = bytearray()
+        self._received_bytes = 0
+        self._windows: asyncio.Queue[tuple[int, bytes] | None] = asyncio.Queue()
+        self._worker = asyncio.create_task(self._transcribe_windows())
+
+    @property
+    def received_seconds(self) -> float:
+        return self._received_bytes / BYTES_PER_SECOND
+
+    def feed(self, pcm: bytes) -> None:
+        self._recording.write(pcm)
+        self._pending.extend(pcm)
+        self._received_bytes += len(pcm)
+        while len(self._pending) >= self.window_bytes:
+            self._queue_window(bytes(self._pending[: self.window_bytes]))
+            del self._pending[: self.window_bytes]
+
+    async def finish(self) -> list[DialogueEntry]:
+        """Transcribe any remaining audio, and wait for every window to be transcribed."""
+        if len(self._pending) >= MIN_FINAL_WINDOW_SECONDS * BYTES_PER_SECOND:
+            self._queue_window(bytes(self._pending))
+        self._pending.clear()
+        self._recording.close()
+        await self._windows.put(None)
+        await self._worker
+        return self.dialogue_entries
+
+    def write_recording(self, path: Path) -> Path:
+        with self.recording_pcm_path.open("rb") as pcm:
+            write_wav(path, pcm)
+        return path
+
+    def _queue_window(self, pcm: bytes) -> None:
+        # windows are always cut from the start of the pending audio
+        self._windows.put_nowait((self._received_bytes - len(self._pending), pcm))
+
+    async def _transcribe_windows(self) -> None:
+        while (window := await self._windows.get()) is not None:
+            start_byte, pcm = window
+            offset = start_byte / BYTES_PER_SECOND
+            window_path = self.workdir / f"window_{start_byte}.wav"
+            try:
+                await asyncio.to_thread(write_wav, window_path, pcm)
+                transcription_job = await self.adapter.start(audio_file_path_or_recording=window_path)
+            except Exception:
+                # a single failed window should not end the meeting, the gap is visible in the transcript
+                logger.exception("Failed to transcribe live window starting at %ss", offset)
+                continue
+            finally:
+                window_path.unlink(missing_ok=True)
+
+            entries = [
+                DialogueEntry(
+                    speaker=entry["speaker"],
+                    text=convert_american_to_british_spelling(entry["text"]),
+                    start_time=entry["start_time"] + offset,
+                    end_time=entry["end_time"] + offset,
+                )
+                for entry in transcription_job.transcript or []
+            ]
+            if entries:
+                self.dialogue_entries.extend(entries)
+                try:
+                    await self.on_entries(entries)
+                except Exception:
+                    # the entries are kept, so failing to save or send them does not stop the meeting being transcribed
+                    logger.exception("Failed to handle live entries starting at %ss", offset)
@@ -0,0 +1,165 @@
+import logging
+from datetime import UTC, datetime, timedelta
+from typing import NamedTuple, cast
+from uuid import UUID
+
+from sqlalchemy import delete, update
+from sqlmodel import col, select
+
+from common.database.postgres_database import SessionLocal
+from common.database.postgres_models import ContentSource, MinuteBatchRequest, MinuteVersion, User
+from common.llm.batch import BatchClient, BatchResult, batch_supported
+from common.llm.tokens import estimate_transcript_tokens
+from common.services.template_manager import TemplateManager
+from common.settings import get_settings
+from common.templates.types import SimpleTemplate
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# how long a worker has to save the minutes of a finished batch before its prompts are collected again, in case the
+# worker died before saving them
+FINISH_LEASE = timedelta(hours=1)
+
+
+class BatchedMinutes(NamedTuple):
+    """The prompt for a minute version's minutes, and the result of the batch it was submitted in."""
+
+    minute_version_id: UUID
+    messages: list[dict[str, str]]
+    result: BatchResult | None
+
+
+class MinuteBatchService:
+    """Writes initial minutes that can wait with the LLM provider's batch API, which is cheaper.
+
+    Prompts wait in the minute_batch_request table until there are MINUTE_BATCH_SIZE of them, or the oldest has waited
+    MINUTE_BATCH_MAX_WAIT_SECONDS, and are then submitted together. Each submitted batch is checked every
+    MINUTE_BATCH_POLL_SECONDS, by whichever worker gets to it first, until it finishes.
+    """
+
+    @classmethod
+    def batch_template(cls, minute_version: MinuteVersion) -> type[SimpleTemplate] | None:
+        """The template to write a minute version's minutes with in a batch, or None if they can't wait for one.
+
+        Only initial minutes of users who opted in, or of templates in MINUTE_BATCH_TEMPLATES, are batched. They must
+        be written in a single call, so from a SimpleTemplate, and from a transcript that doesn't need condensing.
+        """
+        minute = minute_version.minute
+        transcript = minute.transcription.dialogue_entries
+        template = cast(type[SimpleTemplate] | None, TemplateManager.templates.get(minute.template_name))
+        if (
+            not settings.MINUTE_BATCH
+            or not batch_supported()
+            or minute_version.content_source != ContentSource.INITIAL_GENERATION
+            or minute.user_template_id is not None
+            or template is None
+            or SimpleTemplate not in template.__mro__
+            or not transcript
+            or estimate_transcript_tokens(transcript) > settings.MINUTE_TRANSCRIPT_MAX_TOKENS
+        ):
+            return None
+        if minute.template_name in settings.MINUTE_BATCH_TEMPLATES:
+            return template
+        user_id = minute.transcription.user_id
+        with SessionLocal() as session:
+            user = session.get(User, user_id) if user_id else None
+        return template if user and user.batch_minutes else None
+
+    @classmethod
+    def add(cls, minute_version_id: UUID, messages: list[dict[str, str]]) -> None:
+        with SessionLocal() as session:
+            session.add(MinuteBatchRequest(minute_version_id=minute_version_id, messages=messages))
+            session.commit()
+
+    @classmethod
+    def remove(cls, minute_version_id: UUID) -> None:
+        """Remove a prompt once the minutes written from it are saved."""
+        with SessionLocal() as session:
+            session.execute(
+                delete(MinuteBatchRequest).where(col(MinuteBatchRequest.minute_version_id) == minute_version_id)
+            )
+            session.commit()
+
+    @classmethod
+    async def submit_pending(cls, client: BatchClient) -> None:
+        """Submit the prompts waiting for a batch, if there are enough of them or they have waited long enough."""
+        with SessionLocal() as session:
+            requests = session.exec(
+                select(MinuteBatchRequest)
+                .where(col(MinuteBatchRequest.batch_id).is_(None))
+                .order_by(col(MinuteBatchRequest.created_datetime))
+                .limit(settings.MINUTE_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not requests:
+                return
+            waited = datetime.now(UTC) - requests[0].created_datetime
+            if len(requests) < settings.MINUTE_BATCH_SIZE and waited < timedelta(
+                seconds=settings.MINUTE_BATCH_MAX_WAIT_SECONDS
+            ):
+                return
+            # the rows stay locked while the batch is submitted, so no other worker submits them too
+            batch_id = await client.submit({str(request.minute_version_id): request.messages for request in requests})
+            submitted_at = datetime.now(UTC)
+            for request in requests:
+                request.batch_id = batch_id
+                request.polled_at = submitted_at
+                session.add(request)
+            session.commit()
+        logger.info("Submitted %s minute prompts in batch %s", len(requests), batch_id)
+
+    @classmethod
+    def _claim_batch(cls, batch_id: str, polled_before: datetime) -> bool:
+        """Claim checking a batch until the next poll, unless another worker has claimed it since it was last due."""
+        with SessionLocal() as session:
+            claimed = session.execute(
+                update(MinuteBatchRequest)
+                .where(col(MinuteBatchRequest.batch_id) == batch_id, col(MinuteBatchRequest.polled_at) < polled_before)
+                .values(polled_at=datetime.now(UTC))
+            )
+            session.commit()
+        return claimed.rowcount > 0
+
+    @classmethod
+    async def collect_finished(cls, client: BatchClient) -> list[BatchedMinutes]:
+        """Check the submitted batches that are due a poll, returning the prompts of those that have finished.
+
+        The caller must save the minutes of each prompt returned, and then remove it. Prompts that are not removed
+        within the FINISH_LEASE are returned again.
+        """
+        polled_before = datetime.now(UTC) - timedelta(seconds=settings.MINUTE_BATCH_POLL_SECONDS)
+        with SessionLocal() as session:
+            batch_ids = session.exec(
+                select(MinuteBatchRequest.batch_id)
+                .where(col(MinuteBatchRequest.batch_id).is_not(None), col(MinuteBatchRequest.polled_at) < polled_before)
+                .distinct()
+            ).all()
+
+        finished: list[BatchedMinutes] = []
+        for batch_id in batch_ids:
+            if batch_id is None or not cls._claim_batch(batch_id, polled_before):
+                continue
+            results = await client.results(batch_id)
+            if results is None:
+                continue
+            results_by_id = {result.custom_id: result for result in results}
+            with SessionLocal() as session:
+                requests = session.exec(
+                    select(MinuteBatchRequest).where(col(MinuteBatchRequest.batch_id) == batch_id)
+                ).all()
+                finished.extend(
+                    BatchedMinutes(
+                        request.minute_version_id, request.messages, results_by_id.get(str(request.minute_version_id))
+                    )
+                    for request in requests
+                )
+                # not polled again while the minutes are saved
+                session.execute(
+                    update(MinuteBatchRequest)
+                    .where(col(MinuteBatchRequest.batch_id) == batch_id)
+                    .values(polled_at=datetime.now(UTC) + FINISH_LEASE)
+                )
+                session.commit()
+            logger.info("Batch %s finished with %s results for %s prompts", batch_id, len(results), len(requests))
+        return finished
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import uuid
 from typing import cast
@@ -10,18 +11,36 @@ from common.convert_american_to_british_spelling import convert_american_to_brit
 from common.database.postgres_database import SessionLocal
 from common.database.postgres_models import DialogueEntry, Hallucination, JobStatus, Minute, MinuteVersion, UserTemplate
 from common.format_transcript import transcript_as_speaker_and_utterance
+from common.llm.batch import BatchClient
+from common.llm.cascade import cascade_chat
 from common.llm.client import FastOrBestLLM, create_default_chatbot
+from common.llm.telemetry import llm_job
+from common.llm.usage import collect_usage, summarise_usage
 from common.prompts import (
     get_ai_edit_initial_messages,
     get_basic_minutes_prompt,
 )
+from common.quality_checks import (
+    MAX_EDIT_LENGTH_RATIO,
+    MIN_EDIT_LENGTH_RATIO,
+    check_citations_kept,
+    check_length,
+    check_not_refusal,
+    word_count,
+)
+from common.services.job_events import add_job_event
+from common.services.minute_batch_service import BatchedMinutes, MinuteBatchService
 from common.services.template_manager import TemplateManager
 from common.settings import get_settings
+from common.templates.types import SimpleTemplate
 from common.templates.user_template import generate_user_template
 from common.types import (
+    JobStatusEvent,
+    JobType,
     LLMHallucination,
     MeetingType,
     MinuteAndHallucinations,
+    TaskType,
 )
 
 settings = get_settings()
@@ -72,6 +91,12 @@ class MinuteHandlerService:
                     for hallucination in hallucinations
                 ]
             session.add(minute_version)
+            if status:
+                add_job_event(
+                    session,
+                    minute_version.minute.transcription.user_id,
+                    JobStatusEvent(job_type=JobType.MINUTE_VERSION, id=minute_version_id, status=status),
+                )
             session.commit()
 
     @classmethod
@@ -120,6 +145,7 @@ class MinuteHandlerService:
         except Exception as e:
             raise MinuteGenerationFailedError from e
         try:
+            cls.update_minute_version(minute_version.id, status=JobStatus.IN_PROGRESS)
             dialogue_entries = minute_version.minute.transcription.dialogue_entries
             if not dialogue_entries:
                 msg = f"Transcription for minute {minute_version.minute_id} has no dialogue entries"
@@ -127,7 +153,20 @@ class MinuteHandlerService:
 
             meeting_type = cls.predict_meeting(dialogue_entries)
             logger.info("%s: Predicted minute version %s", minute_version.minute_id, meeting_type)
-            html_content, hallucinations = await cls.generate_minutes(meeting_type, minute_version.minute)
+            if meeting_type == MeetingType.standard and (
+                batch_template := MinuteBatchService.batch_template(minute_version)
+            ):
+                MinuteBatchService.add(
+                    minute_version.id, batch_template.prompt(dialogue_entries, minute_version.minute.agenda)
+                )
+                logger.info("%s: Minutes will be written in the next batch", minute_version.minute_id)
+                return
+            with (
+                llm_job(minute_version.id, TaskType.MINUTE, minute_version.minute.template_name),
+                collect_usage() as usage,
+            ):
+                html_content, hallucinations = await cls.generate_minutes(meeting_type, minute_version.minute)
+            logger.info("%s: Generated minute with %s", minute_version.minute_id, summarise_usage(usage))
             cls.update_minute_version(
                 minute_version.id,
                 html_content=html_content,
@@ -138,6 +177,52 @@ class MinuteHandlerService:
             cls.update_minute_version(minute_version.id, status=JobStatus.FAILED, error=str(e))
             raise MinuteGenerationFailedError from e
 
+    @classmethod
+    async def process_minute_batches(cls, client: BatchClient) -> None:
+        """Submit the minute prompts waiting for a batch, and finish the minutes of the batches that have finished."""
+        await MinuteBatchService.submit_pending(client)
+        semaphore = asyncio.Semaphore(settings.MINUTE_BATCH_FINISH_CONCURRENCY)
+
+        async def finish(batched_minutes: BatchedMinutes) -> None:
+            async with semaphore:
+                await cls.finish_batched_minutes(batched_minutes)
+
+        await asyncio.gather(
+            *(finish(batched_minutes) for batched_minutes in await MinuteBatchService.collect_finished(client))
+        )
+
+    @classmethod
+    async def finish_batched_minutes(cls, batched_minutes: BatchedMinutes) -> None:
+        """Check the minutes a batch wrote for hallucinations, add their citations, and save them."""
+        minute_version_id, messages, result = batched_minutes
+        try:
+            if result is None or result.response is None:
+                msg = result.error if result else "The batch finished without writing the minutes"
+                raise MinuteGenerationFailedError(msg)
+            minute_version = await cls.get_minute_version(minute_version_id)
+            minute = minute_version.minute
+            transcript = minute.transcription.dialogue_entries or []
+            template = cast(type[SimpleTemplate], TemplateManager.get_template(minute.template_name))
+            # the conversation the batch had, so the hallucination check can follow on from it
+            chatbot = create_default_chatbot(FastOrBestLLM.BEST)
+            chatbot.messages = [*messages, {"role": "assistant", "content": result.response}]
+            with (
+                llm_job(minute_version_id, TaskType.MINUTE, minute.template_name),
+                collect_usage() as usage,
+            ):
+                minutes, hallucinations = await template.finish(transcript, result.response, chatbot, cite=True)
+            logger.info("%s: Finished batched minute with %s", minute.id, summarise_usage(usage))
+            cls.update_minute_version(
+                minute_version_id,
+                html_content=cast(str, mistune.html(convert_american_to_british_spelling(minutes))),
+                hallucinations=hallucinations,
+                status=JobStatus.COMPLETED,
+            )
+        except Exception as e:
+            logger.exception("Batched minutes for MinuteVersion id %s failed", minute_version_id)
+            cls.update_minute_version(minute_version_id, status=JobStatus.FAILED, error=str(e))
+        MinuteBatchService.remove(minute_version_id)
+
     @classmethod
     async def process_minute_edit_message(cls, source_minute_version_id: UUID, target_minute_version_id: UUID) -> None:
         try:
@@ -154,16 +239,18 @@ class MinuteHandlerService:
             raise MinuteGenerationFailedError(msg)
 
         try:
+            cls.update_minute_version(target_minute_version.id, status=JobStatus.IN_PROGRESS)
             transcript = source_minute_version.minute.transcription.dialogue_entries
             if not transcript:
                 msg = "Source minute version has no transcript"
                 raise MinuteGenerationFailedError(msg)
 
-            edited_string, hallucinations = await cls.edit_minutes_with_ai(
-                minutes=source_minute_version.html_content,
-                edit_instructions=target_minute_version.ai_edit_instructions,
-                transcript=transcript,
-            )
+            with llm_job(target_minute_version.id, TaskType.EDIT, source_minute_version.minute.template_name):
+                edited_string, hallucinations = await cls.edit_minutes_with_ai(
+                    minutes=source_minute_version.html_content,
+                    edit_instructions=target_minute_version.ai_edit_instructions,
+                    transcript=transcript,
+                )
             cls.update_minute_version(
                 minute_version_id=target_minute_version.id,
                 status=JobStatus.COMPLETED,
@@ -241,7 +328,7 @@ class MinuteHandlerService:
         transcript: list[DialogueEntry],
     ) -> MinuteAndHallucinations:
         chatbot = create_default_chatbot(FastOrBestLLM.FAST)
-        choice = await chatbot.chat(messages=get_basic_minutes_prompt(transcript))
+        choice = await chatbot.chat(messages=get_basic_minutes_prompt(transcript), call_site="basic_minutes")
         hallucinations = await chatbot.hallucination_check()
         return choice, hallucinations
 
@@ -263,9 +350,15 @@ class MinuteHandlerService:
         edit_instructions: str,
         transcript: list[DialogueEntry],
     ) -> MinuteAndHallucinations:
-        chatbot = create_default_chatbot(FastOrBestLLM.FAST)
-        edited_minutes = await chatbot.chat(
-            messages=get_ai_edit_initial_messages(minutes, edit_instructions, transcript)
+        edited_minutes, chatbot = await cascade_chat(
+            get_ai_edit_initial_messages(minutes, edit_instructions, transcript),
+            FastOrBestLLM.FAST,
+            [
+                check_not_refusal,
+                check_length(word_count(minutes), MIN_EDIT_LENGTH_RATIO, MAX_EDIT_LENGTH_RATIO),
+                check_citations_kept(minutes),
+            ],
+            call_site="ai_edit",
         )
         edited_minutes = edited_minutes.removeprefix("```html").removesuffix("```")
         hallucinations = await chatbot.hallucination_check()
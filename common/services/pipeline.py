@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Collection, Mapping
+from enum import StrEnum, auto
+from graphlib import TopologicalSorter
+from typing import Any, NamedTuple
+
+import sentry_sdk
+
+logger = logging.getLogger(__name__)
+
+
+class FailurePolicy(StrEnum):
+    # the stage's error fails the whole pipeline
+    FAIL = auto()
+    # the stage's fallback value is used as its output, and the rest of the pipeline carries on
+    FALLBACK = auto()
+
+
+class Stage:
+    """A step in a pipeline.
+
+    `run` is called with the outputs of the stages in `depends_on`, keyed by stage name, once they have all finished.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[Mapping[str, Any]], Awaitable[Any]],
+        depends_on: Collection[str] = (),
+        on_failure: FailurePolicy = FailurePolicy.FAIL,
+        fallback: Any = None,
+        timeout_seconds: float | None = None,
+    ) -> None:
+        self.name = name
+        self.run = run
+        self.depends_on = depends_on
+        self.on_failure = on_failure
+        self.fallback = fallback
+        self.timeout_seconds = timeout_seconds
+
+
+class PipelineResult(NamedTuple):
+    outputs: dict[str, Any]
+    stage_seconds: dict[str, float]
+    # stages that failed and used their fallback value
+    fallbacks: list[str]
+
+
+async def run_pipeline(
+    name: str, stages: list[Stage], on_progress: Callable[[float], None] | None = None
+) -> PipelineResult:
+    """Run a graph of stages, starting each one as soon as the stages it depends on have finished.
+
+    Independent stages run concurrently. If a stage with the FAIL policy raises, the stages still running are cancelled
+    and its error is raised. `on_progress` is called with the fraction of the stages that have finished, as each one
+    finishes.
+    """
+    stages_by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        if unknown := set(stage.depends_on) - stages_by_name.keys():
+            msg = f"Stage {stage.name} depends on unknown stages {sorted(unknown)}"
+            raise ValueError(msg)
+    # raises graphlib.CycleError if the stages depend on each other
+    order = list(TopologicalSorter({stage.name: stage.depends_on for stage in stages}).static_order())
+
+    tasks: dict[str, asyncio.Task[Any]] = {}
+    stage_seconds: dict[str, float] = {}
+    fallbacks: list[str] = []
+
+    async def run_stage(stage: Stage) -> Any:
+        inputs = {dependency: await tasks[dependency] for dependency in stage.depends_on}
+        started_at = time.perf_counter()
+        try:
+            async with asyncio.timeout(stage.timeout_seconds):
+                output = await stage.run(inputs)
+        except Exception:
+            if stage.on_failure == FailurePolicy.FAIL:
+                raise
+            logger.exception("Stage %s of %s failed, using its fallback", stage.name, name)
+            fallbacks.append(stage.name)
+            output = stage.fallback
+        finally:
+            stage_seconds[stage.name] = time.perf_counter() - started_at
+        if on_progress is not None:
+            on_progress(len(stage_seconds) / len(stages))
+        return output
+
+    started_at = time.perf_counter()
+    with sentry_sdk.start_transaction(op="process", name=name) as transaction:
+        try:
+            async with asyncio.TaskGroup() as group:
+                for stage_name in order:
+                    tasks[stage_name] = group.create_task(run_stage(stages_by_name[stage_name]))
+        except ExceptionGroup as e:
+            # raise the stage's own error, as callers would see if the stages were run one after another
+            raise e.exceptions[0] from e
+        finally:
+            transaction.set_data("stage_seconds", stage_seconds)
+            transaction.set_data("fallbacks", fallbacks)
+
+    logger.info(
+        "Pipeline %s finished in %.1fs. Stage durations: %s",
+        name,
+        time.perf_counter() - started_at,
+        ", ".join(f"{stage_name}={seconds:.1f}s" for stage_name, seconds in stage_seconds.items()),
+    )
+    return PipelineResult(
+        outputs={stage_name: task.result() for stage_name, task in tasks.items()},
+        stage_seconds=stage_seconds,
+        fallbacks=fallbacks,
+    )
@@ -1,25 +1,91 @@
+import asyncio
 import logging
+import time
+from collections.abc import Callable
+from contextlib import aclosing
+from datetime import UTC, datetime
+from functools import partial
 from uuid import UUID
 
+from sqlalchemy import Select, update
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import selectinload
 from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from common.audio.speakers import process_speakers_and_dialogue_entries
-from common.database.postgres_database import SessionLocal
+from common.audio.speakers import apply_speaker_predictions, label_dialogue_entries
+from common.database.notifications import MAX_PAYLOAD_BYTES, chat_channel, notification
+from common.database.postgres_database import SessionLocal, async_engine
 from common.database.postgres_models import Chat, JobStatus, Minute, Transcription
-from common.generate_meeting_title import generate_meeting_title
-from common.llm.client import FastOrBestLLM, create_default_chatbot
-from common.prompts import get_chat_with_transcript_system_message
+from common.llm.client import ChatBot, FastOrBestLLM, create_default_chatbot
+from common.llm.telemetry import llm_job
+from common.prompts import get_chat_with_transcript_messages
 from common.services.exceptions import InteractionFailedError, TranscriptionFailedError
+from common.services.job_events import add_job_event, send_job_event
+from common.services.pipeline import FailurePolicy, Stage, run_pipeline
 from common.services.transcription_services.transcription_manager import TranscriptionServiceManager
 from common.settings import get_settings
 from common.templates.citations import combine_consecutive_citations
-from common.types import DialogueEntry, TranscriptionJobMessageData
+from common.transcript_analysis import analyse_transcript
+from common.types import (
+    ChatStreamNotification,
+    DialogueEntry,
+    JobStatusEvent,
+    JobType,
+    TaskType,
+    TranscriptAnalysis,
+    TranscriptionJobMessageData,
+)
 
 settings = get_settings()
 transcription_manager = TranscriptionServiceManager()
 logger = logging.getLogger(__name__)
 
+# JSON escapes a character in at most 6 bytes, so notifications with this much of an answer are never too long
+CHAT_NOTIFICATION_CHARS = (MAX_PAYLOAD_BYTES - 100) // 6
+
+
+def chat_notification(chat_id: UUID, offset: int, content: str | None) -> Select:
+    return notification(chat_channel(chat_id), ChatStreamNotification(offset=offset, content=content).model_dump_json())
+
+
+async def save_chat_answer_so_far(chat_id: UUID, answer: str, saved: int) -> None:
+    """Save the answer so far, and notify streaming clients of the text added since it was last saved."""
+    async with AsyncSession(async_engine) as session:
+        await session.execute(
+            update(Chat).where(col(Chat.id) == chat_id).values(assistant_content=answer, status=JobStatus.IN_PROGRESS)
+        )
+        for offset in range(saved, len(answer), CHAT_NOTIFICATION_CHARS):
+            await session.execute(chat_notification(chat_id, offset, answer[offset : offset + CHAT_NOTIFICATION_CHARS]))
+        await session.commit()
+
+
+async def stream_chat_answer(chat_id: UUID, chatbot: ChatBot, messages: list[dict[str, str]]) -> str:
+    """Write the answer to a chat, saving it as it is generated so it can be streamed to the browser."""
+    parts: list[str] = []
+    saved = 0
+    saved_at = float("-inf")
+    try:
+        async with aclosing(chatbot.chat_stream(messages, call_site="chat")) as texts:
+            async for text in texts:
+                parts.append(text)
+                if time.monotonic() - saved_at < settings.CHAT_STREAM_SAVE_INTERVAL_SECONDS:
+                    continue
+                answer = "".join(parts)
+                try:
+                    await save_chat_answer_so_far(chat_id, answer, saved)
+                    saved = len(answer)
+                except SQLAlchemyError:
+                    logger.exception("Could not save the answer so far to chat %s", chat_id)
+                saved_at = time.monotonic()
+    except Exception:
+        if parts:
+            raise
+        # nothing has been sent yet, so the answer can be retried without streaming
+        logger.exception("Streaming the answer to chat %s failed, retrying without streaming", chat_id)
+        return await chatbot.chat(messages=messages, call_site="chat")
+    return "".join(parts)
+
 
 class TranscriptionHandlerService:
     @classmethod
@@ -66,7 +132,7 @@ class TranscriptionHandlerService:
                     msg = f"Transcription {chat.transcription_id} has no dialogue entries"
                     raise InteractionFailedError(msg)
 
-                chat_history = [get_chat_with_transcript_system_message(dialogue_entries)]
+                chat_history = get_chat_with_transcript_messages(dialogue_entries)
                 for entry in chats:
                     chat_history.append(
                         {
@@ -74,7 +140,8 @@ class TranscriptionHandlerService:
                             "content": entry.user_content,
                         }
                     )
-                    if entry.assistant_content:
+                    # a retried chat may have part of an answer saved already
+                    if entry.assistant_content and entry.id != chat_id:
                         chat_history.append(
                             {
                                 "role": "assistant",
@@ -82,10 +149,17 @@ class TranscriptionHandlerService:
                             }
                         )
 
-                chat_response = await chatbot.chat(messages=chat_history)
+                with llm_job(chat_id, TaskType.INTERACTIVE):
+                    chat_response = await stream_chat_answer(chat_id, chatbot, chat_history)
                 chat_response = combine_consecutive_citations(chat_response)
                 chat.assistant_content = chat_response
                 chat.status = JobStatus.COMPLETED
+                session.execute(chat_notification(chat_id, len(chat_response), None))
+                add_job_event(
+                    session,
+                    chat.transcription.user_id,
+                    JobStatusEvent(job_type=JobType.CHAT, id=chat_id, status=JobStatus.COMPLETED),
+                )
 
                 session.add(chat)
                 session.commit()
@@ -99,6 +173,12 @@ class TranscriptionHandlerService:
                         chat_to_update.status = JobStatus.FAILED
                         chat_to_update.error = msg
                         session.add(chat_to_update)
+                        session.execute(chat_notification(chat_id, 0, None))
+                        add_job_event(
+                            session,
+                            chat_to_update.transcription.user_id,
+                            JobStatusEvent(job_type=JobType.CHAT, id=chat_id, status=JobStatus.FAILED),
+                        )
                         session.commit()
             except Exception:
                 logger.exception("Error updating chat status. Maybe it doesn't exist?")
@@ -132,6 +212,10 @@ class TranscriptionHandlerService:
         transcript: list[DialogueEntry] | None = None,
         title: str | None = None,
         error: str | None = None,
+        transcription_service: str | None = None,
+        routing_reason: str | None = None,
+        analysis: TranscriptAnalysis | None = None,
+        stage: str | None = None,
     ) -> None:
         with SessionLocal() as session:
             transcription = session.get(Transcription, transcription_id)
@@ -146,7 +230,53 @@ class TranscriptionHandlerService:
                 transcription.error = error
             if title:
                 transcription.title = title
+            if transcription_service:
+                transcription.transcription_service = transcription_service
+            if routing_reason:
+                transcription.transcription_routing_reason = routing_reason
+            if analysis:
+                transcription.analysis = analysis.model_dump()
             session.add(transcription)
+            if status:
+                add_job_event(
+                    session,
+                    transcription.user_id,
+                    JobStatusEvent(job_type=JobType.TRANSCRIPTION, id=transcription_id, status=status, stage=stage),
+                )
+            session.commit()
+
+    @classmethod
+    def send_transcription_progress(
+        cls, transcription: Transcription, stage: str, progress: float | None = None
+    ) -> None:
+        send_job_event(
+            transcription.user_id,
+            JobStatusEvent(
+                job_type=JobType.TRANSCRIPTION,
+                id=transcription.id,
+                status=JobStatus.IN_PROGRESS,
+                stage=stage,
+                progress=progress,
+            ),
+        )
+
+    @classmethod
+    def save_draft_transcript(cls, transcription: Transcription, transcript: list[DialogueEntry]) -> None:
+        """Save a draft transcript, unless the transcription has already finished."""
+        with SessionLocal() as session:
+            result = session.execute(
+                update(Transcription)
+                .where(col(Transcription.id) == transcription.id, col(Transcription.status) == JobStatus.IN_PROGRESS)
+                .values(dialogue_entries=transcript, updated_datetime=datetime.now(UTC))
+            )
+            if result.rowcount:
+                add_job_event(
+                    session,
+                    transcription.user_id,
+                    JobStatusEvent(
+                        job_type=JobType.TRANSCRIPTION, id=transcription.id, status=JobStatus.IN_PROGRESS, stage="draft"
+                    ),
+                )
             session.commit()
 
     @classmethod
@@ -160,21 +290,40 @@ class TranscriptionHandlerService:
             raise TranscriptionFailedError from e
 
         try:
-            if async_transcription_message_data:
+            if async_transcription_message_data and async_transcription_message_data.live:
+                # transcribed while the meeting happened, and saved as it went, as it is too long for a queue message
+                if not transcription.dialogue_entries:
+                    msg = f"Live transcription {transcription.id} has no saved transcript"
+                    raise ValueError(msg)
+                transcription_job = async_transcription_message_data.model_copy(
+                    update={"transcript": transcription.dialogue_entries}
+                )
+            elif async_transcription_message_data:
                 transcription_job = await transcription_manager.check_transcription(
                     adapter_name=async_transcription_message_data.transcription_service,
                     async_transcription_message_data=async_transcription_message_data,
                 )
             else:
                 # it's a new transcription job
-                cls.update_transcription(transcription.id, JobStatus.IN_PROGRESS)
-                transcription_job = await transcription_manager.perform_transcription_steps(transcription=transcription)
+                cls.update_transcription(transcription.id, JobStatus.IN_PROGRESS, stage="transcription")
+                transcription_job = await transcription_manager.perform_transcription_steps(
+                    transcription=transcription, on_draft=partial(cls.save_draft_transcript, transcription)
+                )
 
             if transcription_job.transcript:
-                dialogue_entries = await cls.identify_speakers(transcription_job.transcript)
-                meeting_title = await generate_meeting_title(transcript=dialogue_entries)
+                with llm_job(transcription.id, TaskType.TRANSCRIPTION):
+                    dialogue_entries, analysis = await cls.enrich_transcript(
+                        transcription_job.transcript,
+                        on_progress=partial(cls.send_transcription_progress, transcription, "post_transcription"),
+                    )
                 cls.update_transcription(
-                    transcription.id, status=JobStatus.COMPLETED, transcript=dialogue_entries, title=meeting_title
+                    transcription.id,
+                    status=JobStatus.COMPLETED,
+                    transcript=dialogue_entries,
+                    title=analysis.title if analysis else None,
+                    analysis=analysis,
+                    transcription_service=transcription_job.transcription_service,
+                    routing_reason=transcription_job.routing_reason,
                 )
 
         except Exception as e:
@@ -190,11 +339,27 @@ class TranscriptionHandlerService:
             return transcription_job
 
     @classmethod
-    async def identify_speakers(cls, dialogue_entries: list[DialogueEntry]) -> list[DialogueEntry]:
-        try:
-            dialogue_entries = await process_speakers_and_dialogue_entries(dialogue_entries)
+    async def enrich_transcript(
+        cls, transcript: list[DialogueEntry], on_progress: Callable[[float], None] | None = None
+    ) -> tuple[list[DialogueEntry], TranscriptAnalysis | None]:
+        """Label speakers in a new transcript, and analyse it to predict their names and a title.
 
-        except Exception:
-            # Do not break flow if this step fails
-            logger.exception("Error processing dialogue entries")
-        return dialogue_entries
+        If the analysis fails, the transcript is kept with its unknown speaker labels, as it does not break the flow.
+        """
+        result = await run_pipeline(
+            "post_transcription",
+            [
+                Stage("labels", lambda _: asyncio.to_thread(label_dialogue_entries, transcript)),
+                Stage(
+                    "analysis",
+                    lambda outputs: analyse_transcript(outputs["labels"]),
+                    depends_on=["labels"],
+                    on_failure=FailurePolicy.FALLBACK,
+                ),
+            ],
+            on_progress=on_progress,
+        )
+        labelled_entries, analysis = result.outputs["labels"], result.outputs["analysis"]
+        if analysis is None:
+            return labelled_entries, None
+        return apply_speaker_predictions(labelled_entries, analysis.speakers), analysis
@@ -1,8 +1,45 @@
+import importlib
+import logging
+from typing import TYPE_CHECKING, Any
+
 from .adapter import TranscriptionAdapter
-from .aws import AWSTranscribeAdapter
-from .azure import AzureSpeechAdapter
-from .azure_async import AzureBatchTranscriptionAdapter
-from .whisply_local import WhisplyLocalAdapter
+
+if TYPE_CHECKING:
+    from .aws import AWSTranscribeAdapter  # noqa: TC004
+    from .azure import AzureSpeechAdapter  # noqa: TC004
+    from .azure_async import AzureBatchTranscriptionAdapter  # noqa: TC004
+    from .whisply_local import WhisplyLocalAdapter  # noqa: TC004
+
+logger = logging.getLogger(__name__)
+
+# Adapters are imported lazily, as some have dependencies that are only installed in the worker or locally
+_adapter_modules = {
+    "AWSTranscribeAdapter": ".aws",
+    "AzureBatchTranscriptionAdapter": ".azure_async",
+    "AzureSpeechAdapter": ".azure",
+    "WhisplyLocalAdapter": ".whisply_local",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _adapter_modules:
+        return getattr(importlib.import_module(_adapter_modules[name], __name__), name)
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
+
+
+def load_adapters() -> dict[str, type[TranscriptionAdapter]]:
+    """Import every adapter whose dependencies are installed, keyed by adapter name."""
+    adapters: dict[str, type[TranscriptionAdapter]] = {}
+    for class_name in _adapter_modules:
+        try:
+            adapter = __getattr__(class_name)
+        except ImportError as e:
+            logger.info("Transcription adapter %s cannot be imported: %s", class_name, e)
+        else:
+            adapters[adapter.name] = adapter
+    return adapters
+
 
 __all__ = [
     "AWSTranscribeAdapter",
@@ -10,4 +47,5 @@ __all__ = [
     "AzureSpeechAdapter",
     "TranscriptionAdapter",
     "WhisplyLocalAdapter",
+    "load_adapters",
 ]
@@ -11,6 +11,7 @@ from common.database.postgres_models import Recording
 from common.services.exceptions import TranscriptionFailedError
 from common.services.transcription_services.adapter import AdapterType, TranscriptionAdapter
 from common.services.transcription_services.azure_common import TOO_MANY_REQUESTS, convert_to_dialogue_entries
+from common.services.transcription_services.circuit_breaker import record_failed_attempt, stop_if_circuit_open
 from common.settings import get_settings
 from common.types import TranscriptionJobMessageData
 
@@ -35,7 +36,8 @@ class AzureSpeechAdapter(TranscriptionAdapter):
     @retry(
         retry=retry_if_exception_type((httpx.HTTPStatusError, httpx.TimeoutException)),
         wait=wait_exponential(multiplier=1, min=4, max=10),
-        stop=stop_after_attempt(5),
+        stop=stop_after_attempt(5) | stop_if_circuit_open(name),
+        after=record_failed_attempt(name),
     )
     async def start(cls, audio_file_path_or_recording: Path | Recording) -> TranscriptionJobMessageData:
         """Transcribe using Azure Speech-to-Text API."""
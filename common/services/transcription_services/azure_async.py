@@ -16,6 +16,7 @@ from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_ex
 from common.database.postgres_models import DialogueEntry, Recording
 from common.services.storage_services import get_storage_service
 from common.services.transcription_services.adapter import AdapterType, TranscriptionAdapter
+from common.services.transcription_services.circuit_breaker import record_failed_attempt, stop_if_circuit_open
 from common.settings import get_settings
 from common.types import TranscriptionJobMessageData
 
@@ -62,7 +63,8 @@ class AzureBatchTranscriptionAdapter(TranscriptionAdapter):
     @retry(
         retry=retry_if_exception_type((httpx.HTTPStatusError, httpx.TimeoutException)),
         wait=wait_exponential(multiplier=1, min=4, max=10),
-        stop=stop_after_attempt(5),
+        stop=stop_after_attempt(5) | stop_if_circuit_open(name),
+        after=record_failed_attempt(name),
     )
     async def start(cls, audio_file_path_or_recording: Path | Recording) -> TranscriptionJobMessageData:
         """
@@ -0,0 +1,209 @@
+import logging
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import httpx
+from sqlalchemy import and_, case, literal, or_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import col, select
+from tenacity import RetryCallState, RetryError
+
+from common.database.postgres_database import SessionLocal
+from common.database.postgres_models import CircuitState, TranscriptionCircuitBreaker
+from common.services.transcription_services.router import is_throttling_error
+from common.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+INTERNAL_SERVER_ERROR = 500
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """Whether an error means the provider itself is unhealthy, as opposed to a problem with a particular recording."""
+    if isinstance(error, RetryError) and (last_error := error.last_attempt.exception()):
+        return is_provider_failure(last_error)
+    if is_throttling_error(error) or isinstance(error, httpx.TimeoutException):
+        return True
+    if getattr(getattr(error, "response", None), "status_code", 0) >= INTERNAL_SERVER_ERROR:
+        return True
+    return error.__cause__ is not None and is_provider_failure(error.__cause__)
+
+
+class CircuitBreaker:
+    """Per-adapter circuit breaker, shared by every worker through the transcription_circuit_breaker table.
+
+    CLOSED: jobs are sent to the adapter as normal. After `failure_threshold` consecutive provider failures the circuit
+    opens.
+    OPEN: the adapter is skipped by routing, and in-progress retries against it stop early. Once `recovery_seconds` have
+    passed, the next job to be routed to it claims a single probe and the circuit becomes HALF_OPEN.
+    HALF_OPEN: only the probe is sent to the adapter. If it succeeds the circuit closes, if it fails it opens again. A
+    probe that never reports back is reclaimed after another `recovery_seconds`.
+
+    The breaker fails open: if its state cannot be read or written, adapters are treated as available.
+    """
+
+    def __init__(self, failure_threshold: int | None = None, recovery_seconds: int | None = None) -> None:
+        self.failure_threshold = failure_threshold or settings.TRANSCRIPTION_CIRCUIT_BREAKER_FAILURE_THRESHOLD
+        self.recovery_seconds = recovery_seconds or settings.TRANSCRIPTION_CIRCUIT_BREAKER_RECOVERY_SECONDS
+
+    @property
+    def recovery_cutoff(self) -> datetime:
+        return datetime.now(UTC) - timedelta(seconds=self.recovery_seconds)
+
+    def unavailable(self) -> set[str]:
+        """Names of adapters that new jobs should not be routed to."""
+        cutoff = self.recovery_cutoff
+        try:
+            with SessionLocal() as session:
+                circuits = session.exec(
+                    select(TranscriptionCircuitBreaker).where(
+                        col(TranscriptionCircuitBreaker.state) != CircuitState.CLOSED
+                    )
+                ).all()
+        except SQLAlchemyError:
+            logger.exception("Could not read circuit breaker state, treating all circuits as closed")
+            return set()
+        return {circuit.adapter_name for circuit in circuits if not self._probe_due(circuit, cutoff)}
+
+    def is_open(self, adapter_name: str) -> bool:
+        return adapter_name in self.unavailable()
+
+    def acquire(self, adapter_name: str) -> bool:
+        """Check that a job can be sent to the adapter, claiming the recovery probe if one is due.
+
+        Returns False if the circuit is open, or if another worker has already claimed the probe.
+        """
+        cutoff = self.recovery_cutoff
+        try:
+            with SessionLocal() as session:
+                claimed = session.execute(
+                    update(TranscriptionCircuitBreaker)
+                    .where(
+                        col(TranscriptionCircuitBreaker.adapter_name) == adapter_name,
+                        or_(
+                            and_(
+                                col(TranscriptionCircuitBreaker.state) == CircuitState.OPEN,
+                                col(TranscriptionCircuitBreaker.opened_at) <= cutoff,
+                            ),
+                            and_(
+                                col(TranscriptionCircuitBreaker.state) == CircuitState.HALF_OPEN,
+                                col(TranscriptionCircuitBreaker.probe_started_at) <= cutoff,
+                            ),
+                        ),
+                    )
+                    .values(
+                        state=CircuitState.HALF_OPEN,
+                        probe_started_at=datetime.now(UTC),
+                        updated_datetime=datetime.now(UTC),
+                    )
+                )
+                session.commit()
+                if claimed.rowcount:
+                    logger.info("Circuit for %s is half open, sending a probe job", adapter_name)
+                    return True
+                circuit = session.exec(
+                    select(TranscriptionCircuitBreaker).where(TranscriptionCircuitBreaker.adapter_name == adapter_name)
+                ).first()
+        except SQLAlchemyError:
+            logger.exception("Could not update circuit breaker for %s, treating it as closed", adapter_name)
+            return True
+        return circuit is None or circuit.state == CircuitState.CLOSED
+
+    def record_success(self, adapter_name: str) -> None:
+        try:
+            with SessionLocal() as session:
+                closed = session.execute(
+                    update(TranscriptionCircuitBreaker)
+                    .where(
+                        col(TranscriptionCircuitBreaker.adapter_name) == adapter_name,
+                        or_(
+                            col(TranscriptionCircuitBreaker.state) != CircuitState.CLOSED,
+                            col(TranscriptionCircuitBreaker.consecutive_failures) > 0,
+                        ),
+                    )
+                    .values(
+                        state=CircuitState.CLOSED,
+                        consecutive_failures=0,
+                        opened_at=None,
+                        probe_started_at=None,
+                        updated_datetime=datetime.now(UTC),
+                    )
+                )
+                session.commit()
+        except SQLAlchemyError:
+            logger.exception("Could not record success in circuit breaker for %s", adapter_name)
+            return
+        if closed.rowcount:
+            logger.info("Circuit for %s is closed", adapter_name)
+
+    def record_failure(self, adapter_name: str) -> None:
+        now = datetime.now(UTC)
+        failures = col(TranscriptionCircuitBreaker.consecutive_failures) + 1
+        state = col(TranscriptionCircuitBreaker.state)
+        # a failed probe re-opens the circuit straight away
+        trips = or_(state == CircuitState.HALF_OPEN, failures >= self.failure_threshold)
+        opens_now = self.failure_threshold <= 1
+        statement = (
+            insert(TranscriptionCircuitBreaker)
+            .values(
+                id=uuid4(),
+                adapter_name=adapter_name,
+                consecutive_failures=1,
+                state=CircuitState.OPEN if opens_now else CircuitState.CLOSED,
+                opened_at=now if opens_now else None,
+            )
+            .on_conflict_do_update(
+                index_elements=["adapter_name"],
+                set_={
+                    "consecutive_failures": failures,
+                    "state": case((trips, literal(CircuitState.OPEN, state.type)), else_=state),
+                    "opened_at": case(
+                        (and_(trips, state != CircuitState.OPEN), now),
+                        else_=col(TranscriptionCircuitBreaker.opened_at),
+                    ),
+                    "updated_datetime": now,
+                },
+            )
+            .returning(col(TranscriptionCircuitBreaker.state), col(TranscriptionCircuitBreaker.consecutive_failures))
+        )
+        try:
+            with SessionLocal() as session:
+                new_state, consecutive_failures = session.execute(statement).one()
+                session.commit()
+        except SQLAlchemyError:
+            logger.exception("Could not record failure in circuit breaker for %s", adapter_name)
+            return
+        if new_state == CircuitState.OPEN:
+            logger.warning("Circuit for %s is open after %s consecutive failures", adapter_name, consecutive_failures)
+
+    @staticmethod
+    def _probe_due(circuit: TranscriptionCircuitBreaker, cutoff: datetime) -> bool:
+        if circuit.state == CircuitState.OPEN:
+            return circuit.opened_at is not None and circuit.opened_at <= cutoff
+        return circuit.probe_started_at is not None and circuit.probe_started_at <= cutoff
+
+
+circuit_breaker = CircuitBreaker()
+
+
+def stop_if_circuit_open(adapter_name: str) -> Callable[[RetryCallState], bool]:
+    """A tenacity stop condition, so that retries stop as soon as any worker opens the adapter's circuit."""
+
+    def stop(retry_state: RetryCallState) -> bool:  # noqa: ARG001
+        return circuit_breaker.is_open(adapter_name)
+
+    return stop
+
+
+def record_failed_attempt(adapter_name: str) -> Callable[[RetryCallState], None]:
+    """A tenacity after hook that counts each failed attempt towards opening the adapter's circuit."""
+
+    def after(retry_state: RetryCallState) -> None:
+        error = retry_state.outcome.exception() if retry_state.outcome else None
+        if error is not None and is_provider_failure(error):
+            circuit_breaker.record_failure(adapter_name)
+
+    return after
@@ -0,0 +1,56 @@
+import logging
+
+import sentry_sdk
+
+logger = logging.getLogger(__name__)
+
+
+class HedgeMetrics:
+    """Process-wide counters for hedged transcription requests.
+
+    The extra audio and cost assume the losing request is billed in full, as the audio has already been sent to the
+    provider by the time it is cancelled.
+    """
+
+    def __init__(self) -> None:
+        self.eligible_jobs = 0
+        self.hedged_jobs = 0
+        self.secondary_wins = 0
+        self.extra_audio_seconds = 0.0
+        self.extra_cost = 0.0
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged_jobs / self.eligible_jobs if self.eligible_jobs else 0.0
+
+    def record_eligible(self) -> None:
+        self.eligible_jobs += 1
+
+    def record_hedge(
+        self, primary: str, secondary: str, winner: str, audio_seconds: float, extra_cost: float | None
+    ) -> None:
+        self.hedged_jobs += 1
+        self.secondary_wins += winner == secondary
+        self.extra_audio_seconds += audio_seconds
+        self.extra_cost += extra_cost or 0.0
+        logger.info(
+            "Hedged transcription of %ss of audio from %s to %s, %s won. Hedge rate %.2f, extra audio %ss, extra cost "
+            "%.4f",
+            int(audio_seconds),
+            primary,
+            secondary,
+            winner,
+            self.hedge_rate,
+            int(self.extra_audio_seconds),
+            self.extra_cost,
+        )
+        with sentry_sdk.start_transaction(op="process", name="transcription_hedge") as transaction:
+            transaction.set_data("primary", primary)
+            transaction.set_data("secondary", secondary)
+            transaction.set_data("winner", winner)
+            transaction.set_data("audio_seconds", audio_seconds)
+            transaction.set_data("extra_cost", extra_cost)
+            transaction.set_data("hedge_rate", self.hedge_rate)
+
+
+hedge_metrics = HedgeMetrics()
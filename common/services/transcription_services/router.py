@@ -0,0 +1,260 @@
+import bisect
+import logging
+import statistics
+import time
+from collections import deque
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from enum import StrEnum, auto
+from typing import NamedTuple
+
+from tenacity import RetryError
+
+from common.services.transcription_services.adapter import TranscriptionAdapter
+from common.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+TOO_MANY_REQUESTS = 429
+THROTTLING_ERROR_CODES = {"ThrottlingException", "TooManyRequestsException", "LimitExceededException"}
+
+# number of recent outcomes kept per adapter
+STATS_WINDOW = 50
+# an adapter that returned a 429 is skipped for this long
+THROTTLE_COOLDOWN_SECONDS = 120
+# used until an adapter has completed a transcription in this process
+DEFAULT_REAL_TIME_FACTOR = 0.5
+# each in-flight job makes an adapter look this much slower
+IN_FLIGHT_PENALTY = 0.25
+# caps how much a high error rate can inflate the expected latency
+MIN_SUCCESS_RATE = 0.1
+# upper bounds, in seconds of audio, of the buckets used for latency percentiles
+DURATION_BUCKETS = (300, 900, 1800, 3600)
+# minimum completed jobs in a bucket before its percentiles are used
+MIN_BUCKET_SAMPLES = 5
+
+
+class RoutingObjective(StrEnum):
+    ORDERED = auto()
+    FASTEST = auto()
+    CHEAPEST = auto()
+    FASTEST_UNDER_BUDGET = auto()
+
+
+class RoutingDecision(NamedTuple):
+    adapter: type[TranscriptionAdapter]
+    reason: str
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """Whether an error raised by an adapter means the provider is rate limiting us."""
+    if isinstance(error, RetryError) and (last_error := error.last_attempt.exception()):
+        return is_throttling_error(last_error)
+    response = getattr(error, "response", None)
+    # httpx.HTTPStatusError
+    if getattr(response, "status_code", None) == TOO_MANY_REQUESTS:
+        return True
+    # botocore ClientError
+    if isinstance(response, dict) and response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES:
+        return True
+    return error.__cause__ is not None and is_throttling_error(error.__cause__)
+
+
+class _Outcome(NamedTuple):
+    real_time_factor: float | None
+    failed: bool
+
+
+class AdapterStats:
+    """Rolling statistics for a single adapter, as observed by this process."""
+
+    def __init__(self, window: int = STATS_WINDOW) -> None:
+        self._window = window
+        self._outcomes: deque[_Outcome] = deque(maxlen=window)
+        self._latencies: dict[int, deque[float]] = {}
+        self.in_flight = 0
+        self.last_throttled_at: float | None = None
+
+    @staticmethod
+    def duration_bucket(audio_seconds: float) -> int:
+        return bisect.bisect_left(DURATION_BUCKETS, audio_seconds)
+
+    def record_success(self, audio_seconds: float, elapsed_seconds: float) -> None:
+        real_time_factor = elapsed_seconds / audio_seconds if audio_seconds > 0 else None
+        self._outcomes.append(_Outcome(real_time_factor=real_time_factor, failed=False))
+        bucket = self.duration_bucket(audio_seconds)
+        self._latencies.setdefault(bucket, deque(maxlen=self._window)).append(elapsed_seconds)
+
+    def latency_percentile(self, audio_seconds: float, percentile: int) -> float | None:
+        """Percentile of wall-clock latency for recordings in the same duration bucket.
+
+        Falls back to the percentile real-time factor across all durations if the bucket has too few samples, and
+        None if nothing has completed yet. Percentiles outside 1 to 99 are clamped to it, as there are no cut points
+        beyond them.
+        """
+        # quantiles(n=100) returns the 99 cut points between the 1st and 99th percentiles
+        index = min(max(percentile, 1), 99) - 1
+        latencies = self._latencies.get(self.duration_bucket(audio_seconds), ())
+        if len(latencies) >= MIN_BUCKET_SAMPLES:
+            return statistics.quantiles(latencies, n=100, method="inclusive")[index]
+        factors = [outcome.real_time_factor for outcome in self._outcomes if outcome.real_time_factor is not None]
+        if len(factors) >= MIN_BUCKET_SAMPLES:
+            return statistics.quantiles(factors, n=100, method="inclusive")[index] * audio_seconds
+        return None
+
+    def record_failure(self, *, throttled: bool) -> None:
+        self._outcomes.append(_Outcome(real_time_factor=None, failed=True))
+        if throttled:
+            self.last_throttled_at = time.monotonic()
+
+    @property
+    def real_time_factor(self) -> float | None:
+        """Median seconds of processing per second of audio, or None if nothing has completed yet."""
+        factors = [outcome.real_time_factor for outcome in self._outcomes if outcome.real_time_factor is not None]
+        return statistics.median(factors) if factors else None
+
+    @property
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(outcome.failed for outcome in self._outcomes) / len(self._outcomes)
+
+    def is_throttling(self) -> bool:
+        return (
+            self.last_throttled_at is not None and time.monotonic() - self.last_throttled_at < THROTTLE_COOLDOWN_SECONDS
+        )
+
+
+class TranscriptionRouter:
+    """Chooses between the adapters that can handle a recording, according to a routing objective.
+
+    The router keeps rolling statistics per adapter (real-time factor, error rate, in-flight jobs and recent 429s).
+    Adapters that have been throttled recently are skipped unless every candidate is throttling. Ties are broken by the
+    order in TRANSCRIPTION_SERVICES, so with no statistics each objective falls back to the configured order.
+    """
+
+    def __init__(
+        self,
+        objective: RoutingObjective | None = None,
+        prices_per_hour: dict[str, float] | None = None,
+        budget_per_hour: float | None = None,
+    ) -> None:
+        self.objective = objective or RoutingObjective(settings.TRANSCRIPTION_ROUTING_OBJECTIVE)
+        self.prices_per_hour = (
+            prices_per_hour if prices_per_hour is not None else settings.TRANSCRIPTION_PRICES_PER_AUDIO_HOUR
+        )
+        self.budget_per_hour = (
+            budget_per_hour if budget_per_hour is not None else settings.TRANSCRIPTION_ROUTING_BUDGET_PER_AUDIO_HOUR
+        )
+        self._stats: dict[str, AdapterStats] = {}
+
+    def stats(self, adapter_name: str) -> AdapterStats:
+        return self._stats.setdefault(adapter_name, AdapterStats())
+
+    def expected_seconds(self, adapter: type[TranscriptionAdapter], duration_seconds: float) -> float:
+        stats = self.stats(adapter.name)
+        real_time_factor = stats.real_time_factor or DEFAULT_REAL_TIME_FACTOR
+        # failed attempts have to be repeated, and in-flight jobs compete for the same capacity
+        return (
+            real_time_factor
+            * duration_seconds
+            * (1 + IN_FLIGHT_PENALTY * stats.in_flight)
+            / max(1 - stats.error_rate, MIN_SUCCESS_RATE)
+        )
+
+    def expected_cost(self, adapter: type[TranscriptionAdapter], duration_seconds: float) -> float | None:
+        price = self.prices_per_hour.get(adapter.name)
+        return None if price is None else price * duration_seconds / 3600
+
+    def route(self, candidates: Sequence[type[TranscriptionAdapter]], duration_seconds: float) -> RoutingDecision:
+        if not candidates:
+            msg = "No candidate transcription adapters to route between"
+            raise RuntimeError(msg)
+
+        healthy = [adapter for adapter in candidates if not self.stats(adapter.name).is_throttling()]
+        throttled = [adapter.name for adapter in candidates if adapter not in healthy]
+        if not healthy:
+            healthy = list(candidates)
+
+        adapter, reason = self._choose(healthy, duration_seconds)
+        if throttled:
+            reason = f"{reason}; skipped throttled adapters: {', '.join(throttled)}"
+            if len(throttled) == len(candidates):
+                reason = f"{reason} (all candidates throttled)"
+        logger.info("Routed %ss of audio to %s: %s", int(duration_seconds), adapter.name, reason)
+        return RoutingDecision(adapter=adapter, reason=reason)
+
+    def _choose(
+        self, candidates: Sequence[type[TranscriptionAdapter]], duration_seconds: float
+    ) -> tuple[type[TranscriptionAdapter], str]:
+        match self.objective:
+            case RoutingObjective.ORDERED:
+                return candidates[0], f"first configured adapter supporting {int(duration_seconds)}s of audio"
+            case RoutingObjective.FASTEST:
+                return self._fastest(candidates, duration_seconds)
+            case RoutingObjective.CHEAPEST:
+                return self._cheapest(candidates, duration_seconds)
+            case RoutingObjective.FASTEST_UNDER_BUDGET:
+                if self.budget_per_hour is None:
+                    adapter, reason = self._fastest(candidates, duration_seconds)
+                    return adapter, f"{reason}; no budget configured"
+                budget = self.budget_per_hour * duration_seconds / 3600
+                affordable = [
+                    adapter
+                    for adapter in candidates
+                    if (cost := self.expected_cost(adapter, duration_seconds)) is not None and cost <= budget
+                ]
+                if not affordable:
+                    adapter, reason = self._cheapest(candidates, duration_seconds)
+                    return adapter, f"{reason}; no adapter within budget of {budget:.4f}"
+                adapter, reason = self._fastest(affordable, duration_seconds)
+                return adapter, f"{reason} within budget of {budget:.4f}"
+            case _:
+                msg = f"Unknown routing objective {self.objective}"
+                raise ValueError(msg)
+
+    def _fastest(
+        self, candidates: Sequence[type[TranscriptionAdapter]], duration_seconds: float
+    ) -> tuple[type[TranscriptionAdapter], str]:
+        adapter = min(candidates, key=lambda candidate: self.expected_seconds(candidate, duration_seconds))
+        stats = self.stats(adapter.name)
+        return adapter, (
+            f"fastest: expected {self.expected_seconds(adapter, duration_seconds):.0f}s "
+            f"(rtf={stats.real_time_factor or DEFAULT_REAL_TIME_FACTOR:.2f}, "
+            f"error_rate={stats.error_rate:.2f}, in_flight={stats.in_flight})"
+        )
+
+    def _cheapest(
+        self, candidates: Sequence[type[TranscriptionAdapter]], duration_seconds: float
+    ) -> tuple[type[TranscriptionAdapter], str]:
+        def cost_or_inf(candidate: type[TranscriptionAdapter]) -> float:
+            cost = self.expected_cost(candidate, duration_seconds)
+            return float("inf") if cost is None else cost
+
+        adapter = min(candidates, key=cost_or_inf)
+        cost = self.expected_cost(adapter, duration_seconds)
+        if cost is None:
+            return adapter, "cheapest: no prices configured for any candidate"
+        return adapter, f"cheapest: expected cost {cost:.4f}"
+
+    @contextmanager
+    def track(self, adapter_name: str, duration_seconds: float, *, completes_job: bool) -> Iterator[None]:
+        """Count a call to an adapter as in flight, and record its outcome.
+
+        Asynchronous adapters only submit a job here, so their latency is recorded separately via `record_success`
+        once the transcript is available.
+        """
+        stats = self.stats(adapter_name)
+        stats.in_flight += 1
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            stats.record_failure(throttled=is_throttling_error(e))
+            raise
+        else:
+            if completes_job:
+                stats.record_success(duration_seconds, time.monotonic() - started)
+        finally:
+            stats.in_flight -= 1
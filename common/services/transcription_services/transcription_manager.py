@@ -1,11 +1,15 @@
+import asyncio
 import logging
 import tempfile
+import time
 import uuid
+from collections.abc import Callable, Collection
 from pathlib import Path
 
 import sentry_sdk
+from tenacity import RetryError
 
-from common.audio.ffmpeg import convert_to_mp3, get_duration, is_audio_ready_for_transcription
+from common.audio.ffmpeg import convert_to_draft_mp3, convert_to_mp3, get_duration, is_audio_ready_for_transcription
 from common.convert_american_to_british_spelling import convert_american_to_british_spelling
 from common.database.postgres_database import SessionLocal
 from common.database.postgres_models import Recording, Transcription
@@ -19,8 +23,11 @@ from common.services.transcription_services import (
     WhisplyLocalAdapter,
 )
 from common.services.transcription_services.adapter import AdapterType
+from common.services.transcription_services.circuit_breaker import circuit_breaker, is_provider_failure
+from common.services.transcription_services.hedging import hedge_metrics
+from common.services.transcription_services.router import RoutingDecision, TranscriptionRouter, is_throttling_error
 from common.settings import get_settings
-from common.types import TranscriptionJobMessageData
+from common.types import DialogueEntry, TranscriptionJobMessageData
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +44,9 @@ class TranscriptionServiceManager:
 
     def __init__(self) -> None:
         self._available_adapters = self.get_available_services()
+        self.router = TranscriptionRouter()
+        self.circuit_breaker = circuit_breaker
+        self.draft_adapter = self.get_draft_service()
 
     def get_available_services(self) -> dict[str, type[TranscriptionAdapter]]:
         """Get list of available (properly configured) services."""
@@ -55,12 +65,41 @@ class TranscriptionServiceManager:
 
         return adapters
 
+    def get_draft_service(self) -> type[TranscriptionAdapter] | None:
+        if not settings.TRANSCRIPTION_DRAFT_SERVICE:
+            return None
+        adapter = _adapters.get(settings.TRANSCRIPTION_DRAFT_SERVICE)
+        if not adapter or not adapter.is_available():
+            logger.warning("Draft transcription service %s is not available", settings.TRANSCRIPTION_DRAFT_SERVICE)
+            return None
+        if adapter.adapter_type != AdapterType.SYNCHRONOUS:
+            logger.warning("Draft transcription service %s must be synchronous", adapter.name)
+            return None
+        return adapter
+
+    def get_candidates(
+        self, duration_seconds: float, exclude: Collection[str] = ()
+    ) -> list[type[TranscriptionAdapter]]:
+        return [
+            adaptor
+            for adaptor in self._available_adapters.values()
+            if adaptor.max_audio_length >= duration_seconds and adaptor.name not in exclude
+        ]
+
+    def route(self, duration_seconds: float, exclude: Collection[str] = ()) -> RoutingDecision:
+        candidates = self.get_candidates(duration_seconds, exclude)
+        if not candidates:
+            msg = f"No transcription services are available. Available services: {self._available_adapters}"
+            raise RuntimeError(msg)
+        open_circuits = self.circuit_breaker.unavailable()
+        closed_candidates = [adapter for adapter in candidates if adapter.name not in open_circuits]
+        if not closed_candidates:
+            msg = f"All transcription services for this recording have open circuits: {[a.name for a in candidates]}"
+            raise RuntimeError(msg)
+        return self.router.route(closed_candidates, duration_seconds)
+
     def select_adaptor(self, duration_seconds: int) -> type[TranscriptionAdapter]:
-        for adaptor in self._available_adapters.values():
-            if adaptor.max_audio_length >= duration_seconds:
-                return adaptor
-        msg = f"No transcription services are available. Available services: {self._available_adapters}"
-        raise RuntimeError(msg)
+        return self.route(duration_seconds).adapter
 
     async def check_transcription(
         self, adapter_name: str, async_transcription_message_data: TranscriptionJobMessageData
@@ -69,13 +108,33 @@ class TranscriptionServiceManager:
         if not adapter or not adapter.is_available():
             msg = f"Transcription service {adapter_name} is not available"
             raise TranscriptionFailedError(msg)
-        transcription_job = await adapter.check(async_transcription_message_data)
+        try:
+            transcription_job = await adapter.check(async_transcription_message_data)
+        except Exception as e:
+            self.router.stats(adapter_name).record_failure(throttled=is_throttling_error(e))
+            raise
         if transcription_job.transcript:
             for entry in transcription_job.transcript:
                 entry["text"] = convert_american_to_british_spelling(entry["text"])
+            if (
+                adapter.adapter_type == AdapterType.ASYNC
+                and transcription_job.started_at is not None
+                and transcription_job.audio_duration_seconds
+            ):
+                self.router.stats(adapter_name).record_success(
+                    transcription_job.audio_duration_seconds, time.time() - transcription_job.started_at
+                )
         return transcription_job
 
-    async def perform_transcription_steps(self, transcription: Transcription) -> TranscriptionJobMessageData:
+    async def perform_transcription_steps(
+        self, transcription: Transcription, on_draft: Callable[[list[DialogueEntry]], None] | None = None
+    ) -> TranscriptionJobMessageData:
+        """Transcribe the transcription's recording, failing over between services if they are unhealthy.
+
+        If `on_draft` is given and a draft service is configured, a quick draft transcript is made in parallel and
+        passed to `on_draft`, unless the main transcript is ready first. Asynchronous jobs return before their
+        transcript is ready, so in that case the draft is awaited before returning.
+        """
         recording = transcription.recordings[0]
         file_extension = Path(recording.s3_file_key).suffix.lower()
         with tempfile.TemporaryDirectory() as tempdir:
@@ -90,20 +149,196 @@ class TranscriptionServiceManager:
                 transaction.set_data("file_size", file_path.stat().st_size)
                 transaction.set_data("file_type", file_path.suffix.lower())
 
-            adapter = self.select_adaptor(int(duration_seconds))
-            match adapter.adapter_type:
-                case AdapterType.SYNCHRONOUS:
-                    transcription_job = await adapter.start(audio_file_path_or_recording=file_path)
-                case AdapterType.ASYNC:
-                    transcription_job = await adapter.start(audio_file_path_or_recording=recording)
-                case _:
-                    msg = "adapter not recognised"
-                    raise RuntimeError(msg)
+            draft = self.start_draft(file_path, duration_seconds, on_draft) if on_draft else None
+            wait_for_draft = False
+            failed_over: set[str] = set()
+            try:
+                while True:
+                    decision = self.route(duration_seconds, exclude=failed_over)
+                    adapter = decision.adapter
+                    if not self.circuit_breaker.acquire(adapter.name):
+                        # the circuit opened, or another worker claimed its probe, since we routed
+                        failed_over.add(adapter.name)
+                        continue
+                    started_at = time.time()
+                    try:
+                        winner, transcription_job = await self.start_with_hedging(
+                            adapter, file_path, recording, duration_seconds, exclude=failed_over
+                        )
+                    except Exception as e:
+                        failed_over.add(adapter.name)
+                        if not is_provider_failure(e):
+                            raise
+                        # adapters that retry with tenacity have already recorded each failed attempt
+                        if not isinstance(e, RetryError):
+                            self.circuit_breaker.record_failure(adapter.name)
+                        if not self.get_candidates(duration_seconds, exclude=failed_over):
+                            raise
+                        logger.warning("Transcription service %s is failing, trying the next candidate", adapter.name)
+                    else:
+                        self.circuit_breaker.record_success(winner.name)
+                        break
+                wait_for_draft = not transcription_job.transcript
+            finally:
+                if draft is not None:
+                    await self.finish_draft(draft, wait=wait_for_draft)
+
+        routing_reason = decision.reason
+        if failed_over:
+            routing_reason = f"{routing_reason}; failed over from {', '.join(sorted(failed_over))}"
+        if winner is not adapter:
+            routing_reason = f"{routing_reason}; hedged to {winner.name}, which finished first"
+            adapter = winner
+        transcription_job = transcription_job.model_copy(
+            update={
+                "routing_reason": routing_reason,
+                "audio_duration_seconds": duration_seconds,
+                "started_at": started_at,
+            }
+        )
 
         if not transcription_job.transcript:
             transcription_job = await self.check_transcription(adapter.name, transcription_job)
         return transcription_job
 
+    def start_draft(
+        self, file_path: Path, duration_seconds: float, on_draft: Callable[[list[DialogueEntry]], None]
+    ) -> asyncio.Task[None] | None:
+        adapter = self.draft_adapter
+        if (
+            adapter is None
+            or adapter.max_audio_length < duration_seconds
+            or adapter.name in self.circuit_breaker.unavailable()
+        ):
+            return None
+        return asyncio.create_task(self.transcribe_draft(adapter, file_path, on_draft))
+
+    @staticmethod
+    async def transcribe_draft(
+        adapter: type[TranscriptionAdapter], file_path: Path, on_draft: Callable[[list[DialogueEntry]], None]
+    ) -> None:
+        """Transcribe a downsampled copy of the recording, passing the transcript to `on_draft`.
+
+        Errors are logged rather than raised, as a failed draft should not fail the main transcription.
+        """
+        started_at = time.time()
+        try:
+            draft_file_path = await asyncio.to_thread(convert_to_draft_mp3, file_path)
+            transcription_job = await adapter.start(audio_file_path_or_recording=draft_file_path)
+        except Exception:
+            logger.exception("Draft transcription with %s failed", adapter.name)
+            return
+        if not transcription_job.transcript:
+            return
+        for entry in transcription_job.transcript:
+            entry["text"] = convert_american_to_british_spelling(entry["text"])
+        on_draft(transcription_job.transcript)
+        logger.info("Draft transcript from %s ready after %.0fs", adapter.name, time.time() - started_at)
+
+    @staticmethod
+    async def finish_draft(draft: asyncio.Task[None], wait: bool) -> None:
+        if not wait:
+            draft.cancel()
+        await asyncio.gather(draft, return_exceptions=True)
+
+    def get_hedge(
+        self, primary: type[TranscriptionAdapter], duration_seconds: float, exclude: Collection[str] = ()
+    ) -> tuple[type[TranscriptionAdapter], float] | None:
+        """Choose a secondary adapter to hedge a job with, and how long to wait for the primary before starting it.
+
+        Only synchronous adapters can be hedged, as asynchronous adapters return as soon as the job is submitted. The
+        delay is the primary's latency percentile for recordings of a similar duration, so no hedge is returned until
+        enough jobs have completed to estimate it.
+        """
+        if (
+            not settings.TRANSCRIPTION_HEDGING
+            or primary.adapter_type != AdapterType.SYNCHRONOUS
+            or duration_seconds > settings.TRANSCRIPTION_HEDGE_MAX_DURATION_SECONDS
+        ):
+            return None
+        hedge_metrics.record_eligible()
+        delay = self.router.stats(primary.name).latency_percentile(
+            duration_seconds, settings.TRANSCRIPTION_HEDGE_PERCENTILE
+        )
+        if delay is None:
+            return None
+        open_circuits = self.circuit_breaker.unavailable()
+        secondaries = [
+            adapter
+            for adapter in self.get_candidates(duration_seconds, exclude={*exclude, *open_circuits, primary.name})
+            if adapter.adapter_type == AdapterType.SYNCHRONOUS
+        ]
+        if not secondaries:
+            return None
+        return self.router.route(secondaries, duration_seconds).adapter, delay
+
+    async def start_with_hedging(
+        self,
+        primary: type[TranscriptionAdapter],
+        file_path: Path,
+        recording: Recording,
+        duration_seconds: float,
+        exclude: Collection[str] = (),
+    ) -> tuple[type[TranscriptionAdapter], TranscriptionJobMessageData]:
+        """Start a job on the primary adapter, hedging it onto a secondary adapter if the primary is slow.
+
+        Whichever adapter finishes first wins and the other request is cancelled. Returns the winning adapter and its
+        result, or raises the primary's error if both fail.
+        """
+        hedge = self.get_hedge(primary, duration_seconds, exclude)
+        primary_task = asyncio.create_task(self.start_tracked(primary, file_path, recording, duration_seconds))
+        if hedge is None:
+            return primary, await primary_task
+
+        secondary, delay = hedge
+        done, _ = await asyncio.wait({primary_task}, timeout=delay)
+        if done or not self.circuit_breaker.acquire(secondary.name):
+            return primary, await primary_task
+
+        logger.info("%s has not finished after %.0fs, hedging with %s", primary.name, delay, secondary.name)
+        secondary_task = asyncio.create_task(self.start_tracked(secondary, file_path, recording, duration_seconds))
+        adapters = {primary_task: primary, secondary_task: secondary}
+        pending: set[asyncio.Task[TranscriptionJobMessageData]] = {primary_task, secondary_task}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = next((task for task in done if task.exception() is None), None)
+            if winner:
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                hedge_metrics.record_hedge(
+                    primary=primary.name,
+                    secondary=secondary.name,
+                    winner=adapters[winner].name,
+                    audio_seconds=duration_seconds,
+                    extra_cost=self.router.expected_cost(secondary, duration_seconds),
+                )
+                return adapters[winner], winner.result()
+            if secondary_task in done and (error := secondary_task.exception()) and is_provider_failure(error):
+                self.circuit_breaker.record_failure(secondary.name)
+        return primary, primary_task.result()
+
+    async def start_tracked(
+        self, adapter: type[TranscriptionAdapter], file_path: Path, recording: Recording, duration_seconds: float
+    ) -> TranscriptionJobMessageData:
+        with self.router.track(
+            adapter.name, duration_seconds, completes_job=adapter.adapter_type == AdapterType.SYNCHRONOUS
+        ):
+            return await self.start_transcription(adapter, file_path, recording)
+
+    @staticmethod
+    async def start_transcription(
+        adapter: type[TranscriptionAdapter], file_path: Path, recording: Recording
+    ) -> TranscriptionJobMessageData:
+        match adapter.adapter_type:
+            case AdapterType.SYNCHRONOUS:
+                return await adapter.start(audio_file_path_or_recording=file_path)
+            case AdapterType.ASYNC:
+                return await adapter.start(audio_file_path_or_recording=recording)
+            case _:
+                msg = "adapter not recognised"
+                raise RuntimeError(msg)
+
     @classmethod
     async def get_recording_to_process(
         cls, recording: Recording, temp_file_path: Path, file_extension: str
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import threading
+import uuid
+from collections import deque
+from collections.abc import Callable
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from common.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 30
+# each window ends at the quietest frame of its last few seconds, so that a word isn't cut across two windows
+SILENCE_SEARCH_SECONDS = 5
+SILENCE_FRAME_SECONDS = 0.1
+
+
+class _QueuedWindow:
+    __slots__ = ("audio", "enqueued_at", "future")
+
+    def __init__(self, audio: Any, future: asyncio.Future[str], enqueued_at: float) -> None:
+        self.audio = audio
+        self.future = future
+        self.enqueued_at = enqueued_at
+
+
+class WhisperBatchScheduler:
+    """Groups audio windows from concurrent transcription jobs into shared inference batches.
+
+    Windows are queued per job and drained round-robin, so one long recording cannot starve the others, while windows
+    belonging to the same job are always inferred in the order they were submitted. A batch is run as soon as it is
+    full, or once the oldest queued window has waited `max_latency_seconds`.
+
+    Inference is blocking (CPU/GPU bound), so it is run in a worker thread to keep the event loop free to accept
+    windows from other jobs while a batch is in flight.
+    """
+
+    def __init__(
+        self, infer_batch: Callable[[list[Any]], list[str]], batch_size: int, max_latency_seconds: float
+    ) -> None:
+        if batch_size < 1:
+            msg = "batch_size must be at least 1"
+            raise ValueError(msg)
+        self._infer_batch = infer_batch
+        self.batch_size = batch_size
+        self.max_latency_seconds = max_latency_seconds
+        self._queues: dict[str, deque[_QueuedWindow]] = {}
+        self._wakeup = asyncio.Event()
+        self._runner: asyncio.Task[None] | None = None
+
+    async def transcribe(self, job_id: str, windows: list[Any]) -> list[str]:
+        """Queue the windows for a job and wait for their transcripts, returned in window order."""
+        if not windows:
+            return []
+        loop = asyncio.get_running_loop()
+        queued = [_QueuedWindow(window, loop.create_future(), loop.time()) for window in windows]
+        self._queues.setdefault(job_id, deque()).extend(queued)
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run())
+        self._wakeup.set()
+        return list(await asyncio.gather(*(window.future for window in queued)))
+
+    def queued_windows(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._queues:
+            deadline = min(queue[0].enqueued_at for queue in self._queues.values()) + self.max_latency_seconds
+            while self.queued_windows() < self.batch_size and (remaining := deadline - loop.time()) > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=remaining)
+                except TimeoutError:
+                    break
+
+            batch = self._next_batch()
+            logger.info("Running Whisper batch of %s windows, %s still queued", len(batch), self.queued_windows())
+            try:
+                results = await asyncio.to_thread(self._infer_batch, [window.audio for window in batch])
+                if len(results) != len(batch):
+                    msg = f"Whisper batch returned {len(results)} results for {len(batch)} windows"
+                    raise RuntimeError(msg)
+            except Exception as e:  # noqa: BLE001
+                for window in batch:
+                    if not window.future.done():
+                        window.future.set_exception(e)
+            else:
+                for window, result in zip(batch, results, strict=True):
+                    if not window.future.done():
+                        window.future.set_result(result)
+
+    def _next_batch(self) -> list[_QueuedWindow]:
+        batch: list[_QueuedWindow] = []
+        while self._queues and len(batch) < self.batch_size:
+            for job_id in list(self._queues):
+                queue = self._queues.pop(job_id)
+                batch.append(queue.popleft())
+                if queue:
+                    # re-insert at the end so the next job gets the next slot
+                    self._queues[job_id] = queue
+                if len(batch) == self.batch_size:
+                    break
+        return batch
+
+
+def split_into_windows(
+    audio: Any, window_seconds: int = WINDOW_SECONDS, sample_rate: int = SAMPLE_RATE
+) -> list[tuple[float, Any]]:
+    """Split a 1-D array of audio samples into consecutive windows of up to `window_seconds`, each with its start time.
+
+    Like whisperx's own VAD-based chunking, windows are cut between words rather than at fixed times. Each window that
+    isn't the last ends at the quietest frame of its last SILENCE_SEARCH_SECONDS.
+    """
+    import numpy as np
+
+    window_length = window_seconds * sample_rate
+    frame_length = max(int(SILENCE_FRAME_SECONDS * sample_rate), 1)
+    search_length = SILENCE_SEARCH_SECONDS * sample_rate
+    windows: list[tuple[float, Any]] = []
+    start = 0
+    while len(audio) - start > window_length:
+        limit = start + window_length
+        search_start = max(limit - search_length, start + frame_length)
+        frames = (limit - search_start) // frame_length
+        samples = np.asarray(audio[search_start : search_start + frames * frame_length], dtype=np.float32)
+        energy = np.square(samples).reshape(frames, frame_length).mean(axis=1)
+        end = search_start + int(np.argmin(energy)) * frame_length + frame_length // 2
+        windows.append((start / sample_rate, audio[start:end]))
+        start = end
+    if start < len(audio):
+        windows.append((start / sample_rate, audio[start:]))
+    return windows
+
+
+def _whisperx_device() -> str:
+    match settings.WHISPLY_DEVICE:
+        case "gpu":
+            return "cuda"
+        case "auto":
+            import torch  # type: ignore[import-not-found]
+
+            return "cuda" if torch.cuda.is_available() else "cpu"
+        case _:
+            # mps/mlx are not supported by whisperx, so fall back to cpu
+            return "cpu"
+
+
+class WhisperXBatchBackend:
+    """Holds a single set of whisperx models per process and runs batched inference over pre-cut audio windows.
+
+    Alignment and diarization are run for one job at a time, so that jobs finishing together don't each hold their
+    own copy of the intermediate tensors in GPU memory.
+    """
+
+    def __init__(self) -> None:
+        # local-only dependency, not required in prod
+        import whisperx  # type: ignore[import-not-found]
+
+        self.device = _whisperx_device()
+        self.model = whisperx.load_model(
+            settings.WHISPLY_MODEL,
+            self.device,
+            compute_type="float16" if self.device == "cuda" else "int8",
+            language="en",
+        )
+        self.align_model, self.align_metadata = whisperx.load_align_model(language_code="en", device=self.device)
+        from whisperx.diarize import DiarizationPipeline  # type: ignore[import-not-found]
+
+        self.diarize_model = DiarizationPipeline(use_auth_token=settings.WHISPLY_HF_TOKEN, device=self.device)
+        self._align_and_diarize_lock = threading.Lock()
+
+    def infer_batch(self, windows: list[Any]) -> list[str]:
+        outputs = self.model([{"inputs": window} for window in windows], batch_size=len(windows))
+        texts = []
+        for output in outputs:
+            text = output["text"]
+            # the pipeline does not unbatch results when the batch size is 1
+            texts.append(text[0] if isinstance(text, list) else text)
+        return texts
+
+    def align_and_diarize(self, segments: list[dict[str, Any]], audio: Any) -> list[dict[str, Any]]:
+        import whisperx
+
+        with self._align_and_diarize_lock:
+            aligned = whisperx.align(
+                segments, self.align_model, self.align_metadata, audio, self.device, return_char_alignments=False
+            )
+            result = whisperx.assign_word_speakers(self.diarize_model(audio), aligned)
+        return result["segments"]
+
+
+@lru_cache
+def get_whisperx_batch_backend() -> WhisperXBatchBackend:
+    return WhisperXBatchBackend()
+
+
+@lru_cache
+def get_whisper_batch_scheduler() -> WhisperBatchScheduler:
+    return WhisperBatchScheduler(
+        infer_batch=get_whisperx_batch_backend().infer_batch,
+        batch_size=settings.WHISPLY_BATCH_SIZE,
+        max_latency_seconds=settings.WHISPLY_BATCH_MAX_LATENCY_SECONDS,
+    )
+
+
+async def transcribe_with_batching(audio_file_path: Path) -> list[dict[str, Any]]:
+    """Transcribe a file through the shared batch scheduler, then align and diarize it on its own.
+
+    Returns whisperx segments, each with word-level timings and speaker labels.
+    """
+    import whisperx
+
+    backend = get_whisperx_batch_backend()
+    audio = await asyncio.to_thread(whisperx.load_audio, str(audio_file_path))
+    windows = split_into_windows(audio)
+    texts = await get_whisper_batch_scheduler().transcribe(uuid.uuid4().hex, [window for _, window in windows])
+
+    segments = [
+        {"text": text, "start": start, "end": start + len(window) / SAMPLE_RATE}
+        for (start, window), text in zip(windows, texts, strict=True)
+        if text.strip()
+    ]
+    if not segments:
+        return []
+    return await asyncio.to_thread(backend.align_and_diarize, segments, audio)
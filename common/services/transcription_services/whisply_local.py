@@ -2,7 +2,7 @@ import logging
 import shutil
 import uuid
 from pathlib import Path
-from typing import TypedDict
+from typing import TypedDict, cast
 
 # local-only dependency, not required in prod, hence the ignores
 from whisply import models  # type: ignore[import-untyped]
@@ -10,6 +10,7 @@ from whisply.transcription import TranscriptionHandler  # type: ignore[import-un
 
 from common.database.postgres_models import DialogueEntry, Recording
 from common.services.transcription_services.adapter import AdapterType, TranscriptionAdapter
+from common.services.transcription_services.whisper_batching import transcribe_with_batching
 from common.settings import get_settings
 from common.types import TranscriptionJobMessageData
 
@@ -47,6 +48,9 @@ class WhisplyLocalAdapter(TranscriptionAdapter):
 
         audio_file_path = audio_file_path_or_recording
 
+        if settings.WHISPLY_BATCHING:
+            return await cls.start_batched(audio_file_path)
+
         project_temp_dir = Path.cwd() / ".whisply_temp"
         project_temp_dir.mkdir(exist_ok=True)
 
@@ -99,6 +103,30 @@ class WhisplyLocalAdapter(TranscriptionAdapter):
             except OSError as cleanup_error:
                 logger.warning("Failed to cleanup temp directory %s: %s", output_dir, cleanup_error)
 
+    @classmethod
+    async def start_batched(cls, audio_file_path: Path) -> TranscriptionJobMessageData:
+        """
+        Transcribe audio through the process-wide Whisper batch scheduler, so that windows from concurrent jobs share
+        inference calls. Alignment and diarization are still run per job.
+        """
+        if not settings.WHISPLY_HF_TOKEN:
+            msg = "HuggingFace token required for speaker diarization. Set WHISPLY_HF_TOKEN."
+            raise ValueError(msg)
+
+        segments = await transcribe_with_batching(audio_file_path)
+        chunks = [
+            {"words": [word for word in segment.get("words", []) if {"speaker", "start", "end"} <= word.keys()]}
+            for segment in segments
+        ]
+        dialogue_entries = cls.convert_to_dialogue_entries(
+            cast(WhisplyOutput, {"transcription": {"transcriptions": {"en": {"chunks": chunks}}}})
+        )
+        if not dialogue_entries:
+            msg = "Whisply transcription produced no dialogue entries"
+            raise RuntimeError(msg)
+
+        return TranscriptionJobMessageData(transcription_service=cls.name, transcript=dialogue_entries)
+
     @classmethod
     async def check(cls, data: TranscriptionJobMessageData) -> TranscriptionJobMessageData:
         return data
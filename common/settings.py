@@ -5,7 +5,7 @@ import dotenv
 from i_dot_ai_utilities.logging.structured_logger import StructuredLogger
 from i_dot_ai_utilities.logging.types.enrichment_types import ExecutionEnvironmentType
 from i_dot_ai_utilities.logging.types.log_output_format import LogOutputFormat
-from pydantic import Field
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from common.logger import setup_logger, setup_structured_logger
@@ -22,6 +22,21 @@ else:
     logger.info("No .env file was detected. Using environment variables as is")
 
 
+class LLMEndpoint(BaseModel):
+    """One of several endpoints an LLM deployment is served from, such as an Azure OpenAI deployment in each region."""
+
+    name: str = Field(description="Name of the endpoint in logs, such as its region")
+    tokens_per_minute: int | None = Field(
+        description="Quota of the endpoint. Endpoints get a share of the calls in proportion to it", default=None
+    )
+    weight: float | None = Field(description="Share of the calls the endpoint gets, instead of its quota", default=None)
+    settings: dict[str, str] = Field(
+        description="Settings the endpoint uses instead of the application's, such as AZURE_OPENAI_ENDPOINT, "
+        "AZURE_DEPLOYMENT, AZURE_APIM_URL or GOOGLE_CLOUD_LOCATION",
+        default={},
+    )
+
+
 class Settings(BaseSettings):
     POSTGRES_HOST: str = Field(description="PostgreSQL database host")
     POSTGRES_PORT: int = Field(description="PostgreSQL database port")
@@ -72,6 +87,11 @@ class Settings(BaseSettings):
     AZURE_OPENAI_API_KEY: str | None = Field(description="Azure API key for openAI", default=None)
     AZURE_OPENAI_ENDPOINT: str | None = Field(description="Azure OpenAI service endpoint URL", default=None)
     AZURE_OPENAI_API_VERSION: str | None = Field(description="Azure OpenAI API version", default=None)
+    AZURE_OPENAI_BATCH_DEPLOYMENT: str | None = Field(
+        description="Azure OpenAI Global Batch deployment of the BEST model, that minutes are written with when they "
+        "are batched. Minutes are only batched if it is set",
+        default=None,
+    )
 
     # if using Azure APIM
     AZURE_APIM_URL: str | None = Field(description="Base URL for Azure APIM LLM.", default=None)
@@ -97,6 +117,60 @@ class Settings(BaseSettings):
         description="List of service names to use for transcription. See backend/services/transcription_services",
         default_factory=list,
     )
+    TRANSCRIPTION_ROUTING_OBJECTIVE: str = Field(
+        description="How to choose between transcription services that can handle a recording. One of 'ordered' (first "
+        "in TRANSCRIPTION_SERVICES), 'fastest', 'cheapest' or 'fastest_under_budget'. Throttled services are skipped "
+        "whatever the objective",
+        default="ordered",
+    )
+    TRANSCRIPTION_PRICES_PER_AUDIO_HOUR: dict[str, float] = Field(
+        description='Price per hour of audio for each transcription service, e.g. {"aws_transcribe": 1.44}. Used by '
+        "the 'cheapest' and 'fastest_under_budget' routing objectives. Services without a price are treated as the "
+        "most expensive",
+        default_factory=dict,
+    )
+    TRANSCRIPTION_ROUTING_BUDGET_PER_AUDIO_HOUR: float | None = Field(
+        description="Maximum price per hour of audio for the 'fastest_under_budget' routing objective", default=None
+    )
+    TRANSCRIPTION_HEDGING: bool = Field(
+        description="If a synchronous transcription service has not finished within its usual latency, also send the "
+        "recording to a second synchronous service and use whichever finishes first",
+        default=False,
+    )
+    TRANSCRIPTION_HEDGE_MAX_DURATION_SECONDS: int = Field(
+        description="Only hedge recordings up to this long. Hedging long recordings doubles a large cost",
+        default=1800,
+    )
+    TRANSCRIPTION_HEDGE_PERCENTILE: int = Field(
+        description="Latency percentile, for recordings of a similar duration, after which a transcription is hedged",
+        default=90,
+        ge=1,
+        le=99,
+    )
+    TRANSCRIPTION_CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = Field(
+        description="Consecutive throttling, timeout or server errors from a transcription service, across all "
+        "workers, before new jobs are sent to the next service in TRANSCRIPTION_SERVICES",
+        default=5,
+    )
+    TRANSCRIPTION_CIRCUIT_BREAKER_RECOVERY_SECONDS: int = Field(
+        description="How long a transcription service is skipped after its circuit opens, before a probe job is sent",
+        default=60,
+    )
+
+    TRANSCRIPTION_DRAFT_SERVICE: str | None = Field(
+        description="Synchronous transcription service used to produce a quick draft transcript from downsampled "
+        "audio, shown to the user while the main transcription is in progress. Disabled if not set",
+        default=None,
+    )
+
+    LIVE_TRANSCRIPTION_SERVICE: str = Field(
+        description="Synchronous transcription service used to transcribe live meetings streamed to the backend. Note "
+        "that whisply_local runs in the backend process, so should only be used for local development",
+        default="azure_stt_synchronous",
+    )
+    LIVE_TRANSCRIPTION_WINDOW_SECONDS: int = Field(
+        description="Length of the rolling windows that live audio is transcribed in", default=30
+    )
 
     FAST_LLM_PROVIDER: str = Field(
         description="Fast LLM provider to use. Currently 'openai', 'azure_apim', and 'gemini' are supported. Note that "
@@ -118,6 +192,67 @@ class Settings(BaseSettings):
         "initial minute generation. Currently ignored by azure_apim as the apim controls model access.",
         default="gemini-2.5-flash",
     )
+    GEMINI_CONTEXT_CACHE: bool = Field(
+        description="Whether a long transcript at the start of a Gemini prompt is put in an explicit context cache, so "
+        "the calls made for the same meeting are billed for it at the cached rate. Other providers cache prompt "
+        "prefixes automatically",
+        default=True,
+    )
+    GEMINI_CONTEXT_CACHE_MIN_TOKENS: int = Field(
+        description="Smallest (estimated) number of tokens in the leading message of a prompt for it to be cached",
+        default=4096,
+    )
+    GEMINI_CONTEXT_CACHE_TTL_SECONDS: int = Field(
+        description="How long a Gemini context cache is kept after it is created", default=600
+    )
+    LLM_REQUESTS_PER_MINUTE: dict[str, int] = Field(
+        description="Requests per minute allowed by each LLM deployment, keyed by '<provider>/<model name>', for "
+        'example {"openai/gpt-4o": 300}. Shared by every worker. Deployments not listed are not limited',
+        default={},
+    )
+    LLM_TOKENS_PER_MINUTE: dict[str, int] = Field(
+        description="Prompt tokens per minute allowed by each LLM deployment, keyed like LLM_REQUESTS_PER_MINUTE",
+        default={},
+    )
+    LLM_ENDPOINTS: dict[str, list[LLMEndpoint]] = Field(
+        description="Endpoints of each LLM deployment that is served from more than one, keyed like "
+        'LLM_REQUESTS_PER_MINUTE, for example {"openai/gpt-4.1": [{"name": "uksouth", "tokens_per_minute": 450000}, '
+        '{"name": "swedencentral", "tokens_per_minute": 150000, "settings": {"AZURE_OPENAI_ENDPOINT": "..."}}]}. '
+        "Calls are balanced over the endpoints. Deployments not listed use the application's settings",
+        default={},
+    )
+    LLM_FAILOVER: dict[str, str] = Field(
+        description="Alternate deployment of each LLM deployment, both as '<provider>/<model name>', for example "
+        '{"azure_apim/gpt-4.1": "openai/gpt-4.1"}. A conversation switches to it when a call to its deployment fails '
+        "with an error worth retrying, instead of waiting to retry",
+        default={},
+    )
+    LLM_CASCADE: bool = Field(
+        description="Write minutes and edits with the FAST model first, and only write them again with the BEST model "
+        "if the FAST model's response fails cheap quality checks, instead of always using the model each call site "
+        "asks for",
+        default=False,
+    )
+    LLM_TELEMETRY: bool = Field(
+        description="Record the tokens and latency of every LLM call made for a job in the llm_call table", default=True
+    )
+    LLM_PRICES: dict[str, tuple[float, float, float]] = Field(
+        description="Price per million input, cached input and output tokens of each LLM deployment, keyed like "
+        'LLM_REQUESTS_PER_MINUTE, for example {"openai/gpt-4.1": [2.0, 0.5, 8.0]}. Used to report the cost of LLM '
+        "calls",
+        default={},
+    )
+    LLM_CACHE_BACKEND: str | None = Field(
+        description="Cache for LLM responses to identical requests at temperature 0. Currently supported are: memory, "
+        "disk, postgres. None disables the cache",
+        default=None,
+    )
+    LLM_CACHE_TTL_SECONDS: int = Field(description="How long a cached LLM response is kept", default=7 * 24 * 60 * 60)
+    LLM_CACHE_MAX_ENTRIES: int = Field(
+        description="Most LLM responses kept in the cache, the least recently used are evicted first", default=10000
+    )
+    # if using the disk cache
+    LLM_CACHE_DIR: str = Field(description="Directory of the disk LLM cache", default="/tmp/minute-llm-cache")  # noqa: S108
 
     STORAGE_SERVICE_NAME: str = Field(
         description="Storage service type to use for file uploads. Currently supported are: s3, azure-blob",
@@ -174,6 +309,70 @@ class Settings(BaseSettings):
         ),
     )
 
+    TRANSCRIPT_ANALYSIS_MAX_TOKENS: int = Field(
+        default=20000,
+        description="Transcripts with more (estimated) tokens than this are not sent in full to the transcript "
+        "analysis. Instead, speakers and the title are predicted from an excerpt of the transcript, and section "
+        "templates work out their own sections. Speech is around 12,500 tokens an hour, so the default sends meetings "
+        "of up to about an hour and a half in full",
+    )
+    SPEAKER_EXCERPT_MAX_TOKENS: int = Field(
+        default=8000, description="Token budget of the transcript excerpt used to identify speakers in long meetings"
+    )
+    SPEAKER_EXCERPT_OPENING_SECONDS: int = Field(
+        default=60,
+        description="How much of each speaker's first speech is always included in the speaker excerpt, as people "
+        "tend to introduce themselves when they first speak",
+    )
+
+    MINUTE_TRANSCRIPT_MAX_TOKENS: int = Field(
+        default=100000,
+        description="Transcripts with more (estimated) tokens than this are split into chunks, which are turned into "
+        "notes in parallel, and the minutes are written from the notes instead of the full transcript",
+    )
+    MINUTE_CHUNK_TOKENS: int = Field(default=25000, description="Token budget of each chunk of a long transcript")
+    MINUTE_CHUNK_OVERLAP_SECONDS: int = Field(
+        default=60, description="How much consecutive chunks of a long transcript overlap, so no point is cut in half"
+    )
+    MINUTE_CHUNK_CONCURRENCY: int = Field(
+        default=4, description="How many chunks of a long transcript are turned into notes at the same time"
+    )
+    MINUTE_SECTION_CONCURRENCY: int = Field(
+        default=8, description="How many sections of a section-based template are written at the same time"
+    )
+    MINUTE_SECTION_CONSISTENCY_CHECK: bool = Field(
+        default=False,
+        description="Whether the separately written sections of a section-based template get a final pass to make "
+        "names, terms and formatting consistent",
+    )
+    MINUTE_BATCH: bool = Field(
+        default=False,
+        description="Write the initial minutes of users who opt in, and of templates in MINUTE_BATCH_TEMPLATES, "
+        "with the BEST model's batch API, which is cheaper but can take up to a day, instead of straight away",
+    )
+    MINUTE_BATCH_TEMPLATES: list[str] = Field(
+        default=[], description="Templates whose initial minutes are always batched, when MINUTE_BATCH is on"
+    )
+    MINUTE_BATCH_SIZE: int = Field(
+        default=100, description="A batch is submitted as soon as this many minute prompts are waiting for one"
+    )
+    MINUTE_BATCH_MAX_WAIT_SECONDS: int = Field(
+        default=15 * 60, description="Longest a minute prompt waits for others to be submitted in a batch with it"
+    )
+    MINUTE_BATCH_POLL_SECONDS: int = Field(default=5 * 60, description="How often a submitted batch is checked")
+    MINUTE_BATCH_FINISH_CONCURRENCY: int = Field(
+        default=8,
+        description="How many minutes of a finished batch are checked for hallucinations and saved at the same time",
+    )
+    FORM_QUESTION_BATCH_SIZE: int = Field(
+        default=5,
+        description="How many independent questions of a form template are answered together in one structured "
+        "LLM call. 1 answers each question in its own call",
+    )
+    FORM_QUESTION_CONCURRENCY: int = Field(
+        default=4, description="How many LLM calls answering the questions of a form template are made at the same time"
+    )
+
     LOCAL_STORAGE_PATH: str = Field(
         default="/tmp",  # noqa: S108
         description="The folder where the data directory is mounted for the local storage service.",
@@ -191,7 +390,28 @@ class Settings(BaseSettings):
         default=None,
         description="HuggingFace token required for Whisply speaker diarization",
     )
+    WHISPLY_BATCHING: bool = Field(
+        default=False,
+        description="Group 30 second windows from concurrent whisply_local jobs into shared Whisper inference batches. "
+        "Only useful when MAX_CONCURRENT_TRANSCRIPTIONS_PER_WORKER is greater than 1",
+    )
+    WHISPLY_BATCH_SIZE: int = Field(
+        default=8,
+        description="Maximum number of 30 second windows in a single batched Whisper inference call",
+    )
+    WHISPLY_BATCH_MAX_LATENCY_SECONDS: float = Field(
+        default=0.5,
+        description="Maximum time a queued window waits for windows from other jobs before a partial batch is run",
+    )
+    MAX_CONCURRENT_TRANSCRIPTIONS_PER_WORKER: int = Field(
+        default=1,
+        description="Number of transcription messages each transcription worker receives and processes concurrently",
+    )
     OLLAMA_BASE_URL: str = Field(default="http://localhost:11434/v1")
+    CHAT_STREAM_SAVE_INTERVAL_SECONDS: float = Field(
+        default=0.25,
+        description="How often the answer to a chat is saved and sent to streaming clients while it is being written",
+    )
 
     # use a dotenv file for local development
     if dotenv_detected:
@@ -12,7 +12,7 @@ async def add_citations_to_minute(
     chatbot = create_default_chatbot(FastOrBestLLM.FAST)
     messages = get_citations_prompt(initial_draft, transcript)
 
-    minute = await chatbot.chat(messages)
+    minute = await chatbot.chat(messages, call_site="citations")
 
     minute = combine_consecutive_citations(minute)
 
@@ -1,13 +1,13 @@
 # flake8: noqa: E501, RUF001,
 from pydantic import BaseModel, Field
 
-from common.format_transcript import transcript_as_speaker_and_utterance
 from common.llm.client import FastOrBestLLM, create_default_chatbot
 from common.prompts import get_sections_from_transcript_prompt
 from common.templates.types import SectionTemplate
 from common.types import (
     AgendaUsage,
     DialogueEntry,
+    TranscriptAnalysis,
 )
 
 
@@ -131,10 +131,7 @@ class Cabinet(SectionTemplate):
     agenda_usage = AgendaUsage.OPTIONAL
 
     @classmethod
-    def system_prompt(
-        cls,
-        transcript: list[DialogueEntry],
-    ) -> str:
+    def system_prompt(cls) -> str:
         return rf"""You are producing part of a Cabinet Style minute for a UK government meeting based on the transcript of the meeting.
 
 The style you must follow is:
@@ -181,20 +178,24 @@ You are asked to contribute to an item of the minute given the transcript of the
     - Agenda announcements
     - Speaking procedure reminders
 
-The transcript for the item you are contributing to is:
-{transcript_as_speaker_and_utterance(transcript)}"""
+The transcript for the item you are contributing to is given above."""
 
     @classmethod
-    async def sections(cls, transcript: list[DialogueEntry] | None, agenda: str | None) -> list[str]:
+    async def sections(
+        cls, transcript: list[DialogueEntry] | None, agenda: str | None, analysis: TranscriptAnalysis | None = None
+    ) -> list[str]:
         if not transcript:
             msg = "Cannot generate sections without transcript"
             raise ValueError(msg)
+        if not agenda and analysis and analysis.sections:
+            return analysis.sections
         if not agenda:
             chatbot = create_default_chatbot(FastOrBestLLM.FAST)
             messages = get_sections_from_transcript_prompt(transcript=transcript)
             response = await chatbot.structured_chat(
                 messages=messages,
                 response_format=MeetingSections,
+                call_site="sections",
             )
             return response.sections_list
         else:
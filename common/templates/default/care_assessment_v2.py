@@ -1,6 +1,6 @@
 # flake8: noqa: E501, RUF001
 from common.database.postgres_models import DialogueEntry
-from common.format_transcript import transcript_as_speaker_and_utterance
+from common.prompts import get_transcript_messages
 from common.settings import get_settings
 from common.templates.types import SimpleTemplate
 from common.types import AgendaUsage
@@ -30,6 +30,7 @@ class CareAssessmentV2(SimpleTemplate):
     @classmethod
     def prompt(cls, transcript: list[DialogueEntry], agenda: str | None = None) -> list[dict[str, str]]:  # noqa: ARG003
         return [
+            get_transcript_messages(transcript),
             {
                 "role": "system",
                 "content": """You are an experienced social care worker in the UK. You are helping to complete a Care Assessment for a service user. The service user is a person who may be in need of care. You are helping to compile the information required to write a Care Assessment for the service user based on the transcript of the meeting.
@@ -119,5 +120,4 @@ Follow the following format, adding as much detail as possible under each headin
 
 """,
             },
-            {"role": "user", "content": transcript_as_speaker_and_utterance(transcript)},
         ]
@@ -5,6 +5,7 @@ from common.database.postgres_models import DialogueEntry, Minute
 from common.llm.client import FastOrBestLLM, create_default_chatbot
 from common.prompts import get_transcript_messages
 from common.templates.citations import add_citations_to_minute
+from common.templates.map_reduce import condense_transcript
 from common.templates.types import Template
 from common.types import AgendaUsage, MinuteAndHallucinations
 
@@ -49,11 +50,11 @@ class Delivery(Template):
     @classmethod
     def get_system_message_for_delivery(cls, transcript: list[DialogueEntry]) -> list[dict[str, str]]:
         return [
+            get_transcript_messages(transcript),
             {
                 "role": "system",
                 "content": """You are an AI meeting assistant. Your task is to extract and summarise different aspects of a meeting based on a transcript of a meeting.""",
             },
-            get_transcript_messages(transcript),
         ]
 
     @classmethod
@@ -79,15 +80,18 @@ The sections should be in the order they appear in the transcript. Typically you
         if not transcript:
             msg = f"Minute {minute.id} has no dialogue entries"
             raise ValueError(msg)
-        initial_messages = cls.get_system_message_for_delivery(transcript)
+        prompt_transcript = await condense_transcript(transcript)
+        initial_messages = cls.get_system_message_for_delivery(prompt_transcript)
         # meeting sections
         initial_messages.append(cls.get_messages_for_sections())
         sections: DeliveryMeetingSections = await chatbot.structured_chat(
-            initial_messages, response_format=DeliveryMeetingSections
+            initial_messages, response_format=DeliveryMeetingSections, call_site="sections"
         )
         hallucinations = await chatbot.hallucination_check()
         # attendees
-        attendee_list = await chatbot.structured_chat([cls.get_messages_for_attendees()], response_format=AttendeeList)
+        attendee_list = await chatbot.structured_chat(
+            [cls.get_messages_for_attendees()], response_format=AttendeeList, call_site="attendees"
+        )
 
         header = "### Attendees:\n"
         for attendee in attendee_list.attendees:
@@ -107,5 +111,6 @@ The sections should be in the order they appear in the transcript. Typically you
                 action_index += 1
 
         final = header + "\n\n" + initial_draft
-        final = await add_citations_to_minute(transcript=transcript, initial_draft=final)
+        if prompt_transcript is transcript:
+            final = await add_citations_to_minute(transcript=transcript, initial_draft=final)
         return final, hallucinations
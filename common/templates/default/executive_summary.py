@@ -24,9 +24,9 @@ Your summary should:
 
 Format the action items as a bulleted list for clarity."""
         return [
+            get_transcript_messages(transcript),
             {
                 "role": "system",
                 "content": prompt,
             },
-            get_transcript_messages(transcript),
         ]
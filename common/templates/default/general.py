@@ -92,9 +92,9 @@ You should structure the minutes with these sections (omit any that aren't relev
    - Note upcoming milestones or deadlines
    - List any pending items for future discussion"""
         return [
+            get_transcript_messages(transcript),
             {
                 "role": "system",
                 "content": prompt,
             },
-            get_transcript_messages(transcript),
         ]
@@ -1,9 +1,9 @@
 # flake8: noqa: E501, RUF001
-from common.format_transcript import transcript_as_speaker_and_utterance
 from common.templates.types import SectionTemplate
 from common.types import (
     AgendaUsage,
     DialogueEntry,
+    TranscriptAnalysis,
 )
 
 
@@ -15,15 +15,20 @@ class PlanningCommittee(SectionTemplate):
     agenda_usage = AgendaUsage.REQUIRED
 
     @classmethod
-    async def sections(cls, transcript: list[DialogueEntry] | None, agenda: str | None) -> list[str]:  # noqa: ARG003
+    async def sections(
+        cls,
+        transcript: list[DialogueEntry] | None,  # noqa: ARG003
+        agenda: str | None,
+        analysis: TranscriptAnalysis | None = None,  # noqa: ARG003
+    ) -> list[str]:
         if not agenda:
             msg = "Agenda is required"
             raise ValueError(msg)
         return agenda.splitlines()
 
     @classmethod
-    def system_prompt(cls, transcript: list[DialogueEntry]) -> str:
-        return f"""You are producing part of a Planning Committee minute for a local government meeting based on the transcript of the meeting.
+    def system_prompt(cls) -> str:
+        return """You are producing part of a Planning Committee minute for a local government meeting based on the transcript of the meeting.
 
 The style you must follow is:
 ### Structure and Format
@@ -153,5 +158,4 @@ Make sure you only follow the structure of the example if the section is specifi
 
 If the section is for a planning application, please follow the style, length and structure of the example. Obviously do not use any details from the example in your response as it is only for guidance.
 
-The transcript for the section you are contributing to is:
-{transcript_as_speaker_and_utterance(transcript)}"""
+The transcript for the section you are contributing to is given above."""
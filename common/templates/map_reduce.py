@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+
+from common.database.postgres_models import DialogueEntry
+from common.llm.client import FastOrBestLLM, create_default_chatbot
+from common.llm.tokens import estimate_transcript_tokens
+from common.llm.usage import collect_usage
+from common.prompts import get_chunk_notes_prompt
+from common.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def format_timestamp(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def split_transcript(
+    transcript: list[DialogueEntry], chunk_tokens: int, overlap_seconds: float
+) -> list[list[DialogueEntry]]:
+    """Split a transcript into chunks of roughly `chunk_tokens`, each starting `overlap_seconds` before the previous one
+    ended.
+
+    A single entry longer than `chunk_tokens` becomes a chunk on its own, so every chunk makes progress.
+    """
+    chunks: list[list[DialogueEntry]] = []
+    start = 0
+    while start < len(transcript):
+        end = start
+        tokens = 0
+        while end < len(transcript):
+            entry_tokens = estimate_transcript_tokens([transcript[end]])
+            if end > start and tokens + entry_tokens > chunk_tokens:
+                break
+            tokens += entry_tokens
+            end += 1
+        chunks.append(transcript[start:end])
+        if end == len(transcript):
+            break
+        overlap_from = transcript[end - 1]["end_time"] - overlap_seconds
+        next_start = end
+        while next_start - 1 > start and transcript[next_start - 1]["start_time"] >= overlap_from:
+            next_start -= 1
+        start = next_start
+    return chunks
+
+
+def notes_entry(chunk: list[DialogueEntry], notes: str) -> DialogueEntry:
+    return DialogueEntry(
+        speaker=f"Notes from {format_timestamp(chunk[0]['start_time'])} to {format_timestamp(chunk[-1]['end_time'])}",
+        text=notes,
+        start_time=chunk[0]["start_time"],
+        end_time=chunk[-1]["end_time"],
+    )
+
+
+async def chunk_notes(
+    chunk: list[DialogueEntry], part: int, total_parts: int, semaphore: asyncio.Semaphore
+) -> list[DialogueEntry]:
+    """Notes of a chunk, as a transcript entry.
+
+    Notes cut short at the maximum output tokens would lose the end of the chunk, so the chunk is split in two and
+    notes are taken of each half instead.
+    """
+    time_range = f"{format_timestamp(chunk[0]['start_time'])} to {format_timestamp(chunk[-1]['end_time'])}"
+    async with semaphore:
+        chatbot = create_default_chatbot(FastOrBestLLM.FAST)
+        with collect_usage() as usage:
+            notes = await chatbot.chat(
+                get_chunk_notes_prompt(chunk, part, total_parts, time_range), call_site=f"chunk_notes_{part}"
+            )
+    if not any(call.truncated for call in usage):
+        return [notes_entry(chunk, notes)]
+    if len(chunk) == 1:
+        msg = f"The notes of part {part} of {total_parts}, from {time_range}, are longer than the model can write"
+        raise ValueError(msg)
+    logger.warning("Notes of part %s of %s were cut short, taking notes of each half instead", part, total_parts)
+    middle = len(chunk) // 2
+    halves = await asyncio.gather(
+        chunk_notes(chunk[:middle], part, total_parts, semaphore),
+        chunk_notes(chunk[middle:], part, total_parts, semaphore),
+    )
+    return [entry for half in halves for entry in half]
+
+
+async def condense_transcript(transcript: list[DialogueEntry]) -> list[DialogueEntry]:
+    """Make a transcript fit in a single minute-writing prompt.
+
+    Transcripts within MINUTE_TRANSCRIPT_MAX_TOKENS are returned unchanged. Longer transcripts are split into
+    overlapping chunks by time, each chunk is turned into detailed notes in parallel, and the notes are returned as a
+    transcript with one entry per chunk, so that any template can write the minutes from them. This is repeated while
+    the notes are still too long, and getting shorter.
+    """
+    condensed = transcript
+    tokens = estimate_transcript_tokens(condensed)
+    while tokens > settings.MINUTE_TRANSCRIPT_MAX_TOKENS:
+        chunks = split_transcript(condensed, settings.MINUTE_CHUNK_TOKENS, settings.MINUTE_CHUNK_OVERLAP_SECONDS)
+        if len(chunks) == 1:
+            break
+        started_at = time.perf_counter()
+        semaphore = asyncio.Semaphore(settings.MINUTE_CHUNK_CONCURRENCY)
+        notes = await asyncio.gather(
+            *(chunk_notes(chunk, part, len(chunks), semaphore) for part, chunk in enumerate(chunks, start=1))
+        )
+        notes_transcript = [entry for chunk_notes_entries in notes for entry in chunk_notes_entries]
+        notes_tokens = estimate_transcript_tokens(notes_transcript)
+        logger.info(
+            "Condensed %s transcript entries of %s tokens into notes of %s chunks of %s tokens in %.0fs",
+            sum(len(chunk) for chunk in chunks),
+            tokens,
+            len(chunks),
+            notes_tokens,
+            time.perf_counter() - started_at,
+        )
+        if notes_tokens >= tokens:
+            # another pass would be no shorter, so the minutes are written from the shorter of the two
+            logger.warning(
+                "Notes of %s tokens are no shorter than the %s tokens they were taken from", notes_tokens, tokens
+            )
+            break
+        condensed, tokens = notes_transcript, notes_tokens
+    return condensed
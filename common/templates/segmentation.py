@@ -0,0 +1,110 @@
+import math
+import re
+from collections import Counter
+
+from common.database.postgres_models import DialogueEntry
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with item items "
+    "discussion update updates any other business".split()
+)
+# Phrases used in speech to move a meeting on to its next item
+HEADING_PATTERN = re.compile(
+    r"\b(?:next item|agenda item|item (?:number )?\w+|moving on|move on to|turning to|turn to|next on the agenda|"
+    r"let's (?:now )?(?:discuss|talk about|look at|turn to)|the next (?:topic|point|question))\b",
+    re.IGNORECASE,
+)
+# How much each signal counts towards where a section starts, relative to the lexical similarity of each entry
+HEADING_WEIGHT = 2.0
+BOUNDARY_SIMILARITY_WEIGHT = 2.0
+TIME_WEIGHT = 1.0
+# Entries either side of each span that are also included, in case a boundary is slightly out
+SPAN_MARGIN_ENTRIES = 2
+
+
+def _terms(text: str) -> set[str]:
+    return {word for word in WORD_PATTERN.findall(text.lower()) if word not in STOP_WORDS}
+
+
+def section_similarities(transcript: list[DialogueEntry], sections: list[str]) -> list[list[float]]:
+    """The share of each section title's terms, weighted by inverse document frequency, found in each entry."""
+    entry_terms = [_terms(entry["text"]) for entry in transcript]
+    document_frequency = Counter(term for terms in entry_terms for term in terms)
+    idf = {
+        term: math.log((len(transcript) + 1) / (frequency + 1)) + 1 for term, frequency in document_frequency.items()
+    }
+    similarities = []
+    for section in sections:
+        section_terms = _terms(section)
+        total = sum(idf.get(term, 1.0) for term in section_terms)
+        similarities.append(
+            [sum(idf[term] for term in section_terms & terms) / total if total else 0.0 for terms in entry_terms]
+        )
+    return similarities
+
+
+def find_section_starts(transcript: list[DialogueEntry], sections: list[str]) -> list[int]:
+    """Split a transcript into one contiguous, non-empty span per section, in order, returning where each span starts.
+
+    The split maximises, by dynamic programming, the lexical similarity of each entry to the title of the section it
+    is assigned to, plus a bonus for starting a section at an entry that sounds like a new agenda item or names the
+    section, minus a penalty for starting a section far from where it would be if the sections were evenly spread over
+    the meeting.
+    """
+    n, k = len(transcript), len(sections)
+    if k == 0:
+        return []
+    if n < k:
+        msg = f"Cannot split {n} transcript entries into {k} sections"
+        raise ValueError(msg)
+
+    similarities = section_similarities(transcript, sections)
+    headings = [1.0 if HEADING_PATTERN.search(entry["text"]) else 0.0 for entry in transcript]
+    meeting_start = transcript[0]["start_time"]
+    duration = max(transcript[-1]["end_time"] - meeting_start, 1e-6)
+
+    def start_bonus(section: int, index: int) -> float:
+        position = (transcript[index]["start_time"] - meeting_start) / duration
+        return (
+            HEADING_WEIGHT * headings[index]
+            + BOUNDARY_SIMILARITY_WEIGHT * similarities[section][index]
+            - TIME_WEIGHT * abs(position - section / k)
+        )
+
+    # best[s][i] is the best score of the entries up to i, with entry i in section s
+    best = [[-math.inf] * n for _ in range(k)]
+    starts_here = [[False] * n for _ in range(k)]
+    best[0][0] = similarities[0][0]
+    for i in range(1, n):
+        for s in range(min(i + 1, k)):
+            score = best[s][i - 1]
+            if s > 0 and (new_section := best[s - 1][i - 1] + start_bonus(s, i)) > score:
+                score = new_section
+                starts_here[s][i] = True
+            best[s][i] = score + similarities[s][i]
+
+    starts = [0] * k
+    s = k - 1
+    for i in range(n - 1, 0, -1):
+        if s == 0:
+            break
+        if starts_here[s][i]:
+            starts[s] = i
+            s -= 1
+    return starts
+
+
+def segment_transcript(transcript: list[DialogueEntry], sections: list[str]) -> list[list[DialogueEntry]]:
+    """The part of the transcript that each section covers, with a small margin either side.
+
+    If there are fewer entries than sections, every section gets the whole transcript.
+    """
+    if len(sections) <= 1 or len(transcript) < len(sections):
+        return [transcript for _ in sections]
+    starts = find_section_starts(transcript, sections)
+    ends = [*starts[1:], len(transcript)]
+    return [
+        transcript[max(start - SPAN_MARGIN_ENTRIES, 0) : end + SPAN_MARGIN_ENTRIES]
+        for start, end in zip(starts, ends, strict=True)
+    ]
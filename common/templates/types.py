@@ -1,13 +1,36 @@
+import asyncio
+import logging
 from typing import Protocol
 
 from common.database.postgres_models import DialogueEntry, Minute
-from common.llm.client import FastOrBestLLM, create_default_chatbot
-from common.prompts import get_section_for_agenda_prompt, string_to_system_message
+from common.llm.cascade import cascade_chat
+from common.llm.client import ChatBot, FastOrBestLLM, create_default_chatbot
+from common.prompts import (
+    get_meeting_outline_prompt,
+    get_section_consistency_prompt,
+    get_section_for_agenda_prompt,
+    get_transcript_messages,
+    string_to_system_message,
+)
+from common.quality_checks import (
+    MAX_CONSISTENCY_LENGTH_RATIO,
+    MIN_CONSISTENCY_LENGTH_RATIO,
+    MIN_MINUTES_LENGTH_RATIO,
+    check_headings,
+    check_length,
+    check_not_refusal,
+    first_failure,
+    transcript_word_count,
+    word_count,
+)
 from common.settings import get_settings
 from common.templates.citations import add_citations_to_minute
-from common.types import AgendaUsage, MinuteAndHallucinations
+from common.templates.map_reduce import condense_transcript
+from common.templates.segmentation import segment_transcript
+from common.types import AgendaUsage, LLMHallucination, MinuteAndHallucinations, TranscriptAnalysis
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
 class Template(Protocol):
@@ -93,14 +116,27 @@ class SimpleTemplate(Template, Protocol):
         cls,
         minute: Minute,
     ) -> MinuteAndHallucinations:
-        chatbot = create_default_chatbot(FastOrBestLLM.BEST)
         transcript = minute.transcription.dialogue_entries
         if not transcript:
             msg = f"Minute {minute.id} has no dialogue entries"
             raise ValueError(msg)
-        minutes = await chatbot.chat(cls.prompt(transcript, minute.agenda))
+        prompt_transcript = await condense_transcript(transcript)
+        minutes, chatbot = await cascade_chat(
+            cls.prompt(prompt_transcript, minute.agenda),
+            FastOrBestLLM.BEST,
+            [check_not_refusal, check_length(transcript_word_count(prompt_transcript), MIN_MINUTES_LENGTH_RATIO)],
+            call_site="minutes",
+        )
+        # citations refer to transcript entries, so cannot be added to minutes written from notes of a long transcript
+        return await cls.finish(transcript, minutes, chatbot, cite=prompt_transcript is transcript)
+
+    @classmethod
+    async def finish(
+        cls, transcript: list[DialogueEntry], minutes: str, chatbot: ChatBot, cite: bool
+    ) -> MinuteAndHallucinations:
+        """Check the minutes the chatbot wrote from the prompt for hallucinations, and add citations if required."""
         hallucinations = await chatbot.hallucination_check()
-        if cls.citations_required:
+        if cls.citations_required and cite:
             minutes = await add_citations_to_minute(transcript=transcript, initial_draft=minutes)
         return minutes, hallucinations
 
@@ -125,25 +161,22 @@ class SectionTemplate(Template, Protocol):
     citations_required: bool
 
     @classmethod
-    def system_prompt(cls, transcript: list[DialogueEntry]) -> str:
-        """Constructs the initial system prompt based on the dialogue transcript.
+    def system_prompt(cls) -> str:
+        """Constructs the system prompt with the instructions for writing a section.
 
-        This class method processes a list of dialogue entries and generates a
-        formatted string that can be used as a prompt for a system to initiate or
-        continue a conversation.
-
-        Args:
-            transcript: A chronological list of dialogue
-                entries representing the conversation history.
+        The transcript is not part of the system prompt. It is sent before it,
+        as the first message of the conversation, so that the start of the
+        prompt can be cached by the LLM provider.
 
         Returns:
-            str: A formatted string representing the system prompt constructed
-            from the given transcript.
+            str: The instructions for writing a section of the minute.
         """
         ...
 
     @classmethod
-    async def sections(cls, transcript: list[DialogueEntry] | None, agenda: str | None) -> list[str]:
+    async def sections(
+        cls, transcript: list[DialogueEntry] | None, agenda: str | None, analysis: TranscriptAnalysis | None = None
+    ) -> list[str]:
         """
         Generates a list of sections based on the provided transcript and agenda.
 
@@ -155,6 +188,9 @@ class SectionTemplate(Template, Protocol):
                 details for analysis. If not provided, defaults to None.
             agenda: An optional string describing the agenda of the conversation
                 or discussion.
+            analysis: The analysis made when the transcript was transcribed, if
+                there is one. Its section outline can be used instead of asking
+                the LLM for sections again.
 
         Returns:
             A list of strings representing the computed or categorized sections.
@@ -170,32 +206,65 @@ class SectionTemplate(Template, Protocol):
         if not transcript:
             msg = f"Minute {minute.id} has no dialogue entries"
             raise ValueError(msg)
-        sections = await cls.sections(transcript, minute.agenda)
-        # Generate content for each section
-        final_sections = []
-        all_hallucinations = []
-        chatbot = create_default_chatbot(FastOrBestLLM.BEST)
-        for i, section in enumerate(sections):
-            if i == 0:
-                # use system message exactly once
-                section_contents = await chatbot.chat(
-                    [
-                        string_to_system_message(cls.system_prompt(transcript)),
-                        get_section_for_agenda_prompt(section),
-                    ]
+        prompt_transcript = await condense_transcript(transcript)
+        analysis = minute.transcription.analysis
+        sections = await cls.sections(
+            prompt_transcript, minute.agenda, TranscriptAnalysis.model_validate(analysis) if analysis else None
+        )
+        # Each section is written from its own part of the transcript, with an outline of the meeting for context.
+        # The sections don't depend on each other, so they are written concurrently and kept in agenda order.
+        spans = segment_transcript(prompt_transcript, sections)
+        semaphore = asyncio.Semaphore(settings.MINUTE_SECTION_CONCURRENCY)
+        consistency_pass = settings.MINUTE_SECTION_CONSISTENCY_CHECK and len(sections) > 1
+
+        async def write_section(i: int, span: list[DialogueEntry]) -> tuple[str, list[LLMHallucination]]:
+            async with semaphore:
+                messages = [get_transcript_messages(span), string_to_system_message(cls.system_prompt())]
+                if len(sections) > 1:
+                    messages.append(get_meeting_outline_prompt(sections, i))
+                messages.append(get_section_for_agenda_prompt(sections[i]))
+                section, chatbot = await cascade_chat(
+                    messages,
+                    FastOrBestLLM.BEST,
+                    [check_not_refusal, check_length(transcript_word_count(span), MIN_MINUTES_LENGTH_RATIO)],
+                    call_site=f"section_{i}",
                 )
-                final_sections.append(section_contents)
-                all_hallucinations = await chatbot.hallucination_check()
-            else:
-                section_contents = await chatbot.chat([get_section_for_agenda_prompt(section)])
-                final_sections.append(section_contents)
-                hallucinations = await chatbot.hallucination_check()
-                all_hallucinations.extend(hallucinations)
-
-        initial_draft = "\n".join(final_sections)
-        if cls.citations_required:
+                # with a consistency pass, hallucinations are checked once, in the text that is kept
+                return section, [] if consistency_pass else await chatbot.hallucination_check()
+
+        results = await asyncio.gather(*(write_section(i, span) for i, span in enumerate(spans)))
+        initial_draft = "\n".join(section_text for section_text, _ in results)
+        all_hallucinations = [hallucination for _, hallucinations in results for hallucination in hallucinations]
+        if consistency_pass:
+            initial_draft, all_hallucinations = await cls.make_sections_consistent(initial_draft, prompt_transcript)
+
+        if cls.citations_required and prompt_transcript is transcript:
             final_minutes = await add_citations_to_minute(transcript=transcript, initial_draft=initial_draft)
         else:
             final_minutes = initial_draft
 
         return final_minutes, all_hallucinations
+
+    @classmethod
+    async def make_sections_consistent(
+        cls, draft: str, transcript: list[DialogueEntry]
+    ) -> tuple[str, list[LLMHallucination]]:
+        """Make the separately written sections of a draft consistent, and check the result for hallucinations.
+
+        The rewrite is only kept if it keeps the draft's length and headings, otherwise the draft is kept as it was.
+        """
+        checks = [
+            check_not_refusal,
+            check_length(word_count(draft), MIN_CONSISTENCY_LENGTH_RATIO, MAX_CONSISTENCY_LENGTH_RATIO),
+            check_headings(draft),
+        ]
+        rewrite, _ = await cascade_chat(
+            get_section_consistency_prompt(draft), FastOrBestLLM.FAST, checks, call_site="section_consistency"
+        )
+        # the checks only escalate the rewrite with LLM_CASCADE, so they are applied here either way
+        if (failure := first_failure(rewrite, checks)) is not None:
+            logger.warning("Keeping the sections as they were written, as the consistency pass failed: %s", failure)
+            rewrite = draft
+        chatbot = create_default_chatbot(FastOrBestLLM.BEST)
+        chatbot.messages = [get_transcript_messages(transcript), {"role": "assistant", "content": rewrite}]
+        return rewrite, await chatbot.hallucination_check()
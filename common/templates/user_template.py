@@ -1,10 +1,25 @@
+import asyncio
+import logging
+
 import markdownify
 
-from common.database.postgres_models import TemplateType, Transcription, UserTemplate
-from common.format_transcript import transcript_as_speaker_and_utterance
+from common.database.postgres_models import DialogueEntry, TemplateQuestion, TemplateType, Transcription, UserTemplate
+from common.llm.cascade import cascade_chat
 from common.llm.client import FastOrBestLLM, create_default_chatbot
 from common.prompts import get_transcript_messages
-from common.types import LLMHallucination
+from common.quality_checks import (
+    MIN_MINUTES_LENGTH_RATIO,
+    check_headings,
+    check_length,
+    check_not_refusal,
+    transcript_word_count,
+)
+from common.settings import get_settings
+from common.templates.map_reduce import condense_transcript
+from common.types import FormAnswerList, LLMHallucination
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
 
 document_prompt = """<task>
 You are an expert meeting minutes writer with extensive experience across various sectors. \
@@ -37,13 +52,9 @@ Do not add additonal sections if they are not specified.
 
 
 form_prompt = """
-You are helping to fill out a form based on the provided transcript of a meeting. \
+You are helping to fill out a form based on the transcript of a meeting above. \
 Answer the current question based only on information found in the document.
 
-<transcript>
-{transcript}
-</transcript>
-
 <style_guide>
 {style_guide}
 </style_guide>
@@ -59,6 +70,20 @@ Answer the current question based only on information found in the document.
 {question_description}
 """
 
+form_batch_prompt = """
+You are helping to fill out a form based on the transcript of a meeting above. \
+Answer each of the questions below based only on information found in the document, \
+giving one answer per question with the number of the question it answers.
+
+<style_guide>
+{style_guide}
+</style_guide>
+
+<questions>
+{questions}
+</questions>
+"""
+
 form_system_prompt = """Instructions:
 - Answer based solely on information in the transcript
 - Follow any specific instructions provided in the question description and style guide
@@ -73,10 +98,12 @@ or any other preamble. Simply provide the requested information."""
 async def generate_user_template(
     template: UserTemplate, transcription: Transcription
 ) -> tuple[str, list[LLMHallucination]]:
+    transcript = await condense_transcript(transcription.dialogue_entries or [])
     if template.type == TemplateType.DOCUMENT:
         markdown_template = markdownify.markdownify(template.content, heading_style=markdownify.ATX)
 
         messages = [
+            get_transcript_messages(transcript),
             {
                 "role": "system",
                 "content": document_prompt.format(
@@ -84,45 +111,143 @@ async def generate_user_template(
                     date=transcription.created_datetime.strftime("%A %d %B %Y %H:%M:%S"),
                 ),
             },
-            get_transcript_messages(transcription.dialogue_entries or []),
         ]
-        chatbot = create_default_chatbot(FastOrBestLLM.BEST)
-        response = await chatbot.chat(messages)
+        response, chatbot = await cascade_chat(
+            messages,
+            FastOrBestLLM.BEST,
+            [
+                check_not_refusal,
+                check_headings(markdown_template),
+                check_length(transcript_word_count(transcript), MIN_MINUTES_LENGTH_RATIO),
+            ],
+            call_site="document",
+        )
         hallucinations = await chatbot.hallucination_check()
         return response, hallucinations
     else:
-        qa_pairs: list[tuple[str, str]] = []
-        for question in template.questions:
-            chatbot = create_default_chatbot(FastOrBestLLM.FAST)
-            if len(qa_pairs) > 0:
-                previous_questions = "\n\n".join(f"## {q}\n{a}" for (q, a) in qa_pairs)
-            else:
-                previous_questions = "This is the first question."
-
-            if question.description.strip():
-                question_description = f"<question_description>{question.description.strip()}</question_description>"
-            else:
-                question_description = ""
-
-            messages = [
-                {
-                    "role": "user",
-                    "content": form_system_prompt,
-                },
-                {
-                    "role": "user",
-                    "content": form_prompt.format(
-                        transcript=transcript_as_speaker_and_utterance(transcription.dialogue_entries or []),
-                        style_guide=template.content,
-                        previous_questions=previous_questions,
-                        current_question=question.title,
-                        question_description=question_description,
-                    ),
-                },
-            ]
-            resp = await chatbot.chat(messages)
-            qa_pairs.append((question.title, resp))
-
+        qa_pairs = await answer_form(template, transcript)
         minute = "\n\n".join(f"## {q}\n{a}" for (q, a) in qa_pairs)
 
         return minute, []
+
+
+def format_question_description(question: TemplateQuestion) -> str:
+    if question.description.strip():
+        return f"<question_description>{question.description.strip()}</question_description>"
+    return ""
+
+
+async def answer_form_question(
+    transcript_message: dict[str, str],
+    style_guide: str,
+    question: TemplateQuestion,
+    qa_pairs: list[tuple[str, str]],
+    semaphore: asyncio.Semaphore,
+) -> str:
+    if qa_pairs:
+        previous_questions = "\n\n".join(f"## {q}\n{a}" for (q, a) in qa_pairs)
+    else:
+        previous_questions = "No previous answers are needed for this question."
+    messages = [
+        transcript_message,
+        {
+            "role": "user",
+            "content": form_system_prompt,
+        },
+        {
+            "role": "user",
+            "content": form_prompt.format(
+                style_guide=style_guide,
+                previous_questions=previous_questions,
+                current_question=question.title,
+                question_description=format_question_description(question),
+            ),
+        },
+    ]
+    async with semaphore:
+        chatbot = create_default_chatbot(FastOrBestLLM.FAST)
+        return await chatbot.chat(messages, call_site="form_question")
+
+
+async def answer_form_questions(
+    transcript_message: dict[str, str],
+    style_guide: str,
+    questions: list[TemplateQuestion],
+    semaphore: asyncio.Semaphore,
+) -> list[str]:
+    """Answer independent questions in one structured call.
+
+    Any question the response leaves out is answered on its own instead.
+    """
+    if len(questions) == 1:
+        return [await answer_form_question(transcript_message, style_guide, questions[0], [], semaphore)]
+
+    formatted_questions = "\n\n".join(
+        f'<question number="{number}">\n{question.title}\n{format_question_description(question)}\n</question>'
+        for number, question in enumerate(questions, start=1)
+    )
+    messages = [
+        transcript_message,
+        {
+            "role": "user",
+            "content": form_system_prompt,
+        },
+        {
+            "role": "user",
+            "content": form_batch_prompt.format(style_guide=style_guide, questions=formatted_questions),
+        },
+    ]
+    async with semaphore:
+        chatbot = create_default_chatbot(FastOrBestLLM.FAST)
+        result = await chatbot.structured_chat(messages, FormAnswerList, call_site="form_questions")
+    answers = {answer.question_number: answer.answer for answer in result.answers}
+
+    async def answer(number: int, question: TemplateQuestion) -> str:
+        if number in answers:
+            return answers[number]
+        logger.warning("Question %s was left out of a batched form answer, answering it on its own", number)
+        return await answer_form_question(transcript_message, style_guide, question, [], semaphore)
+
+    return await asyncio.gather(*(answer(number, question) for number, question in enumerate(questions, start=1)))
+
+
+async def answer_form(template: UserTemplate, transcript: list[DialogueEntry]) -> list[tuple[str, str]]:
+    """Answer the questions of a form template.
+
+    Questions that don't depend on earlier answers are answered concurrently, FORM_QUESTION_BATCH_SIZE at a time in
+    one structured call. A question marked `depends_on_previous` waits for every earlier question, and is answered
+    with their answers as context.
+    """
+    questions = list(template.questions)
+    transcript_message = get_transcript_messages(transcript)
+    semaphore = asyncio.Semaphore(settings.FORM_QUESTION_CONCURRENCY)
+    independent = [index for index, question in enumerate(questions) if index == 0 or not question.depends_on_previous]
+    batches = [
+        independent[i : i + settings.FORM_QUESTION_BATCH_SIZE]
+        for i in range(0, len(independent), settings.FORM_QUESTION_BATCH_SIZE)
+    ]
+    answers: dict[int, str] = {}
+
+    async def answer_batch(batch: list[int]) -> None:
+        batch_answers = await answer_form_questions(
+            transcript_message, template.content, [questions[index] for index in batch], semaphore
+        )
+        answers.update(zip(batch, batch_answers, strict=True))
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            batch_tasks = [(batch[0], group.create_task(answer_batch(batch))) for batch in batches]
+            for index, question in enumerate(questions):
+                if index == 0 or not question.depends_on_previous:
+                    continue
+                for first_index, task in batch_tasks:
+                    if first_index < index:
+                        await task
+                qa_pairs = [(questions[i].title, answers[i]) for i in range(index)]
+                answers[index] = await answer_form_question(
+                    transcript_message, template.content, question, qa_pairs, semaphore
+                )
+    except ExceptionGroup as e:
+        raise e.exceptions[0] from e
+
+    return [(question.title, answers[index]) for index, question in enumerate(questions)]
@@ -0,0 +1,48 @@
+import asyncio
+
+from common.audio.speakers import select_speaker_excerpts
+from common.llm.client import FastOrBestLLM, create_default_chatbot
+from common.llm.tokens import estimate_transcript_tokens
+from common.prompts import (
+    get_meeting_title_prompt,
+    get_speaker_excerpt_analysis_prompt,
+    get_transcript_analysis_prompt,
+)
+from common.settings import get_settings
+from common.types import DialogueEntry, MeetingTitle, SpeakerExcerptAnalysis, TranscriptAnalysis
+
+settings = get_settings()
+
+
+async def analyse_transcript(transcript: list[DialogueEntry]) -> TranscriptAnalysis:
+    """Predict speaker names, a title and a section outline with a single pass over the transcript.
+
+    Long transcripts are not sent in full to identify speakers. Their names are predicted from a bounded excerpt
+    instead, so the cost does not grow with the length of the meeting. The title is still predicted from the whole
+    transcript, in a call of its own, as the excerpt is mostly greetings and introductions. The section outline is left
+    to the templates that need it.
+    """
+    if estimate_transcript_tokens(transcript) <= settings.TRANSCRIPT_ANALYSIS_MAX_TOKENS:
+        return await create_default_chatbot(fast_or_best=FastOrBestLLM.FAST).structured_chat(
+            messages=get_transcript_analysis_prompt(transcript=transcript),
+            response_format=TranscriptAnalysis,
+            call_site="analysis",
+        )
+
+    excerpt = select_speaker_excerpts(
+        transcript,
+        max_tokens=settings.SPEAKER_EXCERPT_MAX_TOKENS,
+        opening_seconds=settings.SPEAKER_EXCERPT_OPENING_SECONDS,
+    )
+    # each call has a chatbot of its own, as a chatbot keeps the conversation it has had
+    speakers, title = await asyncio.gather(
+        create_default_chatbot(fast_or_best=FastOrBestLLM.FAST).structured_chat(
+            messages=get_speaker_excerpt_analysis_prompt(excerpt),
+            response_format=SpeakerExcerptAnalysis,
+            call_site="speakers",
+        ),
+        create_default_chatbot(fast_or_best=FastOrBestLLM.FAST).structured_chat(
+            messages=get_meeting_title_prompt(transcript), response_format=MeetingTitle, call_site="title"
+        ),
+    )
+    return TranscriptAnalysis(speakers=speakers.speakers, title=title.title, sections=None)
@@ -78,18 +78,50 @@ class ChatCreateResponse(BaseModel):
     id: uuid.UUID
 
 
+class ChatStreamNotification(BaseModel):
+    """Sent by the worker as it writes a chat answer, once the answer so far is saved.
+
+    content is the text added to the answer at offset, or None when the answer is complete or has failed.
+    """
+
+    offset: int
+    content: str | None
+
+
+class JobType(StrEnum):
+    TRANSCRIPTION = auto()
+    MINUTE_VERSION = auto()
+    CHAT = auto()
+
+
+class JobStatusEvent(BaseModel):
+    """Sent to the browsers of a job's user when the job changes status, or makes progress."""
+
+    job_type: JobType
+    id: uuid.UUID
+    status: JobStatus
+    # the stage the job is in, and the fraction of it that is done, while it is in progress
+    stage: str | None = None
+    progress: float | None = None
+
+
 class GetUserResponse(BaseModel):
     id: uuid.UUID
     created_datetime: datetime
     updated_datetime: datetime
     email: str
     data_retention_days: int | None
+    batch_minutes: bool
 
 
 class DataRetentionUpdateResponse(BaseModel):
     data_retention_days: int | None
 
 
+class BatchMinutesUpdateRequest(BaseModel):
+    batch_minutes: bool
+
+
 class TranscriptionGetResponse(BaseModel):
     id: uuid.UUID
     title: str | None
@@ -158,6 +190,28 @@ class SpeakerPredictionOutput(BaseModel):
     predictions: list[SpeakerPrediction]
 
 
+class SpeakerExcerptAnalysis(BaseModel):
+    speakers: list[SpeakerPrediction] = Field(description="Predicted name for each speaker label in the transcript")
+
+
+class MeetingTitle(BaseModel):
+    title: str = Field(description="A short title for the meeting")
+
+
+class TranscriptAnalysis(SpeakerExcerptAnalysis):
+    """The result of a single pass over a new transcript, stored on the transcription so later steps can reuse it.
+
+    Long meetings are not analysed in a single pass, so have no sections. Their templates work out their own.
+    """
+
+    title: str = Field(description="A short title for the meeting")
+    sections: list[str] | None = Field(
+        description="A list of distinct discussion topics or agenda items covered during the meeting, such as "
+        "'Opening Remarks', 'Previous Actions Review', 'Main Discussion Points', 'Action Items', or 'Closing Summary'. "
+        "Must be in the order they appear in the transcript."
+    )
+
+
 class MinutesResponse(BaseModel):
     minutes: str
 
@@ -185,6 +239,20 @@ class TranscriptionJobMessageData(BaseModel):
         default="synchronous",
     )
     transcript: list[DialogueEntry] | None = Field(description="Transcript of the transcription", default=None)
+    routing_reason: str | None = Field(
+        description="Why the transcription service was chosen for this recording", default=None
+    )
+    audio_duration_seconds: float | None = Field(description="Duration of the transcribed audio", default=None)
+    live: bool = Field(
+        description="Whether the audio was transcribed live, so the transcript is already saved in the transcription's "
+        "dialogue entries",
+        default=False,
+    )
+    started_at: float | None = Field(
+        description="Unix timestamp at which the transcription service was called. Used to measure the latency of "
+        "asynchronous services",
+        default=None,
+    )
 
 
 class WorkerMessage(BaseModel):
@@ -206,6 +274,15 @@ class LLMHallucinationList(BaseModel):
 MinuteAndHallucinations = tuple[str, list[LLMHallucination] | None]
 
 
+class FormAnswer(BaseModel):
+    question_number: int = Field(description="The number of the question being answered")
+    answer: str = Field(description="The answer to the question")
+
+
+class FormAnswerList(BaseModel):
+    answers: list[FormAnswer] = Field(description="One answer for each question, in the order they were asked")
+
+
 class MeetingType(StrEnum):
     too_short = auto()
     short = auto()
@@ -229,6 +306,7 @@ class CreateQuestion(BaseModel):
     position: int
     title: str
     description: str
+    depends_on_previous: bool = False
 
 
 class Question(CreateQuestion):
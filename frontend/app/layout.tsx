@@ -2,6 +2,7 @@ import { Footer } from '@/components/layout/footer'
 import { Header } from '@/components/layout/header'
 import { LockNavigationProvider } from '@/hooks/use-lock-navigation-context'
 import { TanstackQueryProvider } from '@/providers/TanstackQueryProvider'
+import { JobEventsProvider } from '@/providers/job-events-provider'
 import PosthogProvider from '@/providers/posthog'
 import { RecordingDbProvider } from '@/providers/transcription-db-provider'
 import type { Metadata } from 'next'
@@ -25,20 +26,22 @@ export default function RootLayout({
     <html lang="en" className={inter.className}>
       <body>
         <TanstackQueryProvider>
-          <PosthogProvider>
-            <LockNavigationProvider>
-              <RecordingDbProvider>
-                <div className="flex min-h-screen flex-col justify-between">
-                  <div>
-                    <Header />
-                    <main>{children}</main>
+          <JobEventsProvider>
+            <PosthogProvider>
+              <LockNavigationProvider>
+                <RecordingDbProvider>
+                  <div className="flex min-h-screen flex-col justify-between">
+                    <div>
+                      <Header />
+                      <main>{children}</main>
+                    </div>
+                    <Footer />
                   </div>
-                  <Footer />
-                </div>
-                <Toaster />
-              </RecordingDbProvider>
-            </LockNavigationProvider>
-          </PosthogProvider>
+                  <Toaster />
+                </RecordingDbProvider>
+              </LockNavigationProvider>
+            </PosthogProvider>
+          </JobEventsProvider>
         </TanstackQueryProvider>
       </body>
     </html>
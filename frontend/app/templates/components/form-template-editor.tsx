@@ -1,12 +1,13 @@
 'use client'
 
 import { Button } from '@/components/ui/button'
+import { Checkbox } from '@/components/ui/checkbox'
 import { Input } from '@/components/ui/input'
 import { Label } from '@/components/ui/label'
 import { Textarea } from '@/components/ui/textarea'
 import { TemplateData } from '@/types/templates'
 import { ArrowDown, ArrowUp, Save, Trash } from 'lucide-react'
-import { useFieldArray, useFormContext } from 'react-hook-form'
+import { Controller, useFieldArray, useFormContext } from 'react-hook-form'
 
 export const FormTemplateEditor = ({
   onSubmit,
@@ -156,6 +157,29 @@ export const FormTemplateEditor = ({
                   rows={3}
                   placeholder="(optional) Description of how to answer the question, what information to include, and style guidance."
                 />
+                {index > 0 ? (
+                  <div className="mt-2 flex items-center gap-2">
+                    <Controller
+                      control={form.control}
+                      name={`questions.${index}.depends_on_previous`}
+                      render={({ field }) => (
+                        <Checkbox
+                          id={`questions.${index}.depends_on_previous`}
+                          checked={field.value ?? false}
+                          onCheckedChange={(checked) =>
+                            field.onChange(checked === true)
+                          }
+                        />
+                      )}
+                    />
+                    <Label
+                      htmlFor={`questions.${index}.depends_on_previous`}
+                      className="text-sm font-normal"
+                    >
+                      Uses the answers to earlier questions
+                    </Label>
+                  </div>
+                ) : null}
               </div>
             </div>
           ))}
@@ -165,6 +189,7 @@ export const FormTemplateEditor = ({
               fieldArray.append({
                 title: '',
                 description: '',
+                depends_on_previous: false,
                 position: form.watch('questions')?.length || 0,
               })
             }
@@ -16,16 +16,15 @@ import { CitationPopoverWrapper } from '@/components/ui/citation-popover-wrapper
 import { Textarea } from '@/components/ui/textarea'
 import { useCitationPopover } from '@/hooks/use-citation-popover'
 import type { ChatGetResponse } from '@/lib/client'
-import * as api from '@/lib/client' // Import the API client for direct calls
 import { Transcription } from '@/lib/client'
 import {
   createChatTranscriptionsTranscriptionIdChatPostMutation,
   deleteChatsTranscriptionsTranscriptionIdChatDeleteMutation,
-  getChatTranscriptionsTranscriptionIdChatChatIdGetQueryKey,
   listChatTranscriptionsTranscriptionIdChatGetOptions,
   listChatTranscriptionsTranscriptionIdChatGetQueryKey,
 } from '@/lib/client/@tanstack/react-query.gen'
 import { CitationContent, linkCitations } from '@/utils/citation-renderer'
+import { API_PROXY_PATH } from '@/providers/TanstackQueryProvider'
 import { useMutation, useQuery, useQueryClient } from '@tanstack/react-query'
 import { Loader2, MessageCircle, SendHorizontal, Trash2 } from 'lucide-react'
 import { useEffect, useMemo, useRef, useState } from 'react'
@@ -98,85 +97,50 @@ export function ChatTab({ transcription }: { transcription: Transcription }) {
     }
   }, [chatItems, pollingChatId]) // Depend on chatItems and pollingChatId
 
-  // New useQuery for polling a single chat item
-  useQuery({
-    queryKey: getChatTranscriptionsTranscriptionIdChatChatIdGetQueryKey({
-      path: { transcription_id: transcriptionId, chat_id: pollingChatId! },
-    }),
-    queryFn: async () => {
-      // Direct API call using the client
-      const response =
-        await api.getChatTranscriptionsTranscriptionIdChatChatIdGet({
-          path: { transcription_id: transcriptionId, chat_id: pollingChatId! },
+  // Stream the answer to the pending chat message as the worker writes it
+  useEffect(() => {
+    if (!pollingChatId) return
+    const chatId = pollingChatId
+    const listQueryKey = listChatTranscriptionsTranscriptionIdChatGetQueryKey({
+      path: { transcription_id: transcriptionId },
+    })
+    const updateChatItem = (
+      update: (item: ChatGetResponse) => ChatGetResponse
+    ) =>
+      queryClient.setQueryData(
+        listQueryKey,
+        (old: { chat?: ChatGetResponse[] } | undefined) => ({
+          chat: ((old?.chat as ChatGetResponse[]) ?? []).map((item) =>
+            item.id === chatId ? update(item) : item
+          ),
         })
-      return response.data
-    },
-    enabled: !!pollingChatId, // Only run when pollingChatId is set
-    refetchInterval: (query) => {
-      const currentStatus = query.state.data?.status as string | undefined
-      // Continue polling while awaiting or in progress
-      if (
-        currentStatus === 'awaiting_start' ||
-        currentStatus === 'in_progress'
-      ) {
-        console.log(
-          `Polling individual chat: ${pollingChatId}, status: ${currentStatus}`
-        )
-        return 1000 // Poll every 1 second
-      }
-
-      // Stop polling on terminal states (completed/success/failed) or when status is defined and not pending
-      if (currentStatus) {
-        console.log(
-          `Individual chat ${pollingChatId} polling finished with status: ${currentStatus}`
-        )
-        if (query.state.data) {
-          const updatedItem = query.state.data as ChatGetResponse
-          queryClient.setQueryData(
-            listChatTranscriptionsTranscriptionIdChatGetQueryKey({
-              path: { transcription_id: transcriptionId },
-            }),
-            (old: { chat?: ChatGetResponse[] } | undefined) => {
-              const prevChat: ChatGetResponse[] =
-                (old?.chat as ChatGetResponse[]) ?? []
-
-              // Try to replace by id
-              const idxById = prevChat.findIndex((c) => c.id === updatedItem.id)
-              if (idxById !== -1) {
-                const next = prevChat.slice()
-                next[idxById] = updatedItem
-                return { chat: next }
-              }
-
-              // If not found by id (e.g., we had an optimistic item), remove any optimistic placeholder
-              // that matches the same user_content and is still pending, then append the real item.
-              const filtered = prevChat.filter(
-                (c) =>
-                  !(
-                    typeof c.id === 'string' &&
-                    c.id.startsWith('optimistic-') &&
-                    c.user_content === updatedItem.user_content
-                  )
-              )
-              return { chat: [...filtered, updatedItem] }
-            }
-          )
+      )
 
-          // Also ensure the list gets a fresh fetch in case other items changed on the server
-          queryClient.invalidateQueries({
-            queryKey: listChatTranscriptionsTranscriptionIdChatGetQueryKey({
-              path: { transcription_id: transcriptionId },
-            }),
-          })
-        }
-        setPollingChatId(null) // Stop polling this ID
-        return false // Stop refetching
+    // EventSource reconnects by itself if the connection drops, and the stream starts again from the answer so far
+    const events = new EventSource(
+      `${API_PROXY_PATH}/transcriptions/${transcriptionId}/chat/${chatId}/stream`
+    )
+    events.addEventListener('answer', (event) => {
+      const { offset, content } = JSON.parse(event.data) as {
+        offset: number
+        content: string
       }
-
-      // If we have no status yet, keep polling fast
-      return 1000
-    },
-  })
+      updateChatItem((item) => ({
+        ...item,
+        assistant_content:
+          (item.assistant_content ?? '').slice(0, offset) + content,
+      }))
+    })
+    events.addEventListener('done', (event) => {
+      events.close()
+      const updatedItem = JSON.parse(event.data) as ChatGetResponse
+      updateChatItem(() => updatedItem)
+      // Also ensure the list gets a fresh fetch in case other items changed on the server
+      queryClient.invalidateQueries({ queryKey: listQueryKey })
+      setPollingChatId(null)
+    })
+    return () => events.close()
+  }, [pollingChatId, transcriptionId, queryClient])
 
   // Flatten for rendering as chat messages (user then assistant if present)
   const messages: Array<{ role: 'user' | 'assistant'; content: string }> =
@@ -266,12 +230,17 @@ export function ChatTab({ transcription }: { transcription: Transcription }) {
   }
 
   const waitingForAssistant = (() => {
-    // If we are actively polling an individual chat item, it means the assistant is thinking.
-    if (!!pollingChatId) return true
+    // If we are streaming an individual chat item, the assistant is thinking until its answer starts.
+    if (!!pollingChatId)
+      return !chatItems.find((item) => item.id === pollingChatId)
+        ?.assistant_content
     // Otherwise, check the last item in the fetched chat list.
     if (chatItems.length === 0) return false
     const last = chatItems[chatItems.length - 1]
-    return last.status === 'awaiting_start' || last.status === 'in_progress'
+    return (
+      (last.status === 'awaiting_start' || last.status === 'in_progress') &&
+      !last.assistant_content
+    )
   })()
 
   return (
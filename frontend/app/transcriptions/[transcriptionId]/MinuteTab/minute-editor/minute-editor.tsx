@@ -20,6 +20,7 @@ import {
   listMinuteVersionsMinutesMinuteIdVersionsGetQueryKey,
 } from '@/lib/client/@tanstack/react-query.gen'
 import convertAIMinutesToWordDoc from '@/lib/download-word-doc'
+import { useJobEvents } from '@/providers/job-events-provider'
 import { useMutation, useQuery, useQueryClient } from '@tanstack/react-query'
 import {
   Download,
@@ -50,11 +51,14 @@ export function MinuteEditor({
 }) {
   const [version, setVersion] = useState(0)
   const [hideCitations, setHideCitations] = useState(false)
+  const jobEvents = useJobEvents()
   const { data: minuteVersions = [], isLoading } = useQuery({
     ...listMinuteVersionsMinutesMinuteIdVersionsGetOptions({
       path: { minute_id: minute.id! },
     }),
+    // Status changes are pushed while job events are connected
     refetchInterval: (query) =>
+      !jobEvents.connected &&
       query.state.data &&
       query.state.data.length > 0 &&
       ['awaiting_start', 'in_progress'].includes(
@@ -19,8 +19,11 @@ export type DialogueEntryForm = {
 
 export function TranscriptionTab({
   transcription,
+  readOnly = false,
 }: {
   transcription: Transcription
+  // Show the transcript without editing, such as a draft that the finished transcript will replace
+  readOnly?: boolean
 }) {
   const methods = useForm<DialogueEntryForm>({
     defaultValues: { entries: transcription.dialogue_entries || [] },
@@ -49,11 +52,11 @@ export function TranscriptionTab({
 
   const { saveTranscription } = useSaveTranscription(transcription.id!)
   useEffect(() => {
-    if (isDirty) {
+    if (isDirty && !readOnly) {
       handleSubmit(saveTranscription)()
       reset(watch())
     }
-  }, [handleSubmit, isDirty, saveTranscription, reset, watch])
+  }, [handleSubmit, isDirty, readOnly, saveTranscription, reset, watch])
 
   const { fields, update } = useFieldArray({ control, name: 'entries' })
 
@@ -81,6 +84,19 @@ export function TranscriptionTab({
   const delayedScroll = () =>
     new Promise((resolve) => setTimeout(resolve, 100)).then(scrollToPlaying)
 
+  if (readOnly) {
+    return (
+      <div className="flex flex-col gap-6">
+        {(transcription.dialogue_entries || []).map((entry, index) => (
+          <div className="flex items-start gap-2" key={index}>
+            <span className="font-bold">{entry.speaker}:</span>
+            <p className="whitespace-pre-wrap">{entry.text}</p>
+          </div>
+        ))}
+      </div>
+    )
+  }
+
   return (
     <div>
       <FormProvider {...methods}>
@@ -11,9 +11,11 @@ import {
   getTranscriptionTranscriptionsTranscriptionIdGetOptions,
 } from '@/lib/client/@tanstack/react-query.gen'
 import { FeatureFlags } from '@/lib/feature-flags'
+import { useJobEvents } from '@/providers/job-events-provider'
 import { useQuery } from '@tanstack/react-query'
 import { Clock, Frown, LoaderCircle, SearchX } from 'lucide-react'
 import { useFeatureFlagEnabled } from 'posthog-js/react'
+import { useEffect } from 'react'
 
 export default function TranscriptionPage({
   params: { transcriptionId },
@@ -21,17 +23,30 @@ export default function TranscriptionPage({
   params: { transcriptionId: string }
 }) {
   const isChatEnabled = useFeatureFlagEnabled(FeatureFlags.ChatEnabled)
+  const jobEvents = useJobEvents()
 
-  const { data: transcription, isLoading } = useQuery({
+  const {
+    data: transcription,
+    isLoading,
+    refetch,
+  } = useQuery({
     ...getTranscriptionTranscriptionsTranscriptionIdGetOptions({
       path: { transcription_id: transcriptionId },
     }),
+    // Status changes are pushed while job events are connected
     refetchInterval: (query) =>
+      !jobEvents.connected &&
       query.state.data?.status &&
       ['awaiting_start', 'in_progress'].includes(query.state.data.status)
         ? 2000
         : false,
   })
+  const transcriptionProgress = jobEvents.progress[transcriptionId]
+
+  // A draft transcript has been saved while the main transcription runs
+  useEffect(() => {
+    if (transcriptionProgress?.stage === 'draft') refetch()
+  }, [transcriptionProgress, refetch])
 
   if (isLoading) {
     return (
@@ -73,8 +88,26 @@ export default function TranscriptionPage({
           <p className="mb-4">
             Transcription being processed, you can close the tab.
           </p>
+          {transcriptionProgress?.progress != null && (
+            <p className="mb-4 text-sm text-slate-500">
+              Preparing transcript:{' '}
+              {Math.round(transcriptionProgress.progress * 100)}%
+            </p>
+          )}
           <AudioPlayer transcriptionId={transcription.id} />
         </div>
+        {!!transcription.dialogue_entries?.length && (
+          <div className="mx-auto w-full max-w-3xl">
+            <p className="mb-4 text-sm text-slate-500">
+              <span className="mr-2 rounded bg-slate-200 px-2 py-0.5 text-xs font-semibold uppercase text-slate-700">
+                Draft
+              </span>
+              A quick first transcript. It will be replaced, with speaker
+              names, when transcription finishes.
+            </p>
+            <TranscriptionTab transcription={transcription} readOnly />
+          </div>
+        )}
       </div>
     )
   }
@@ -7,6 +7,7 @@ import {
   getUserUsersMeGetOptions,
   listTranscriptionsTranscriptionsGetOptions,
 } from '@/lib/client/@tanstack/react-query.gen'
+import { useJobEvents } from '@/providers/job-events-provider'
 import { keepPreviousData, useQuery } from '@tanstack/react-query'
 import { ChevronLeft, ChevronRight, Info } from 'lucide-react'
 import Link from 'next/link'
@@ -14,6 +15,7 @@ import { usePathname, useRouter, useSearchParams } from 'next/navigation'
 
 export const PaginatedTranscriptions = () => {
   const { data: user } = useQuery({ ...getUserUsersMeGetOptions() })
+  const jobEvents = useJobEvents()
   const pathname = usePathname()
   const searchParams = useSearchParams()
   const router = useRouter()
@@ -27,7 +29,9 @@ export const PaginatedTranscriptions = () => {
     ...listTranscriptionsTranscriptionsGetOptions({
       query: { page: currentPage, page_size: pageSize },
     }),
+    // Status changes are pushed while job events are connected
     refetchInterval: (query) =>
+      !jobEvents.connected &&
       !!query.state.data &&
       query.state.data.items?.some((t) =>
         ['awaiting_start', 'in_progress'].includes(t.status)
@@ -35,6 +35,7 @@ import {
   listMinuteVersionsMinutesMinuteIdVersionsGet,
   listTranscriptionsTranscriptionsGet,
   saveTranscriptionTranscriptionsTranscriptionIdPatch,
+  updateBatchMinutesUsersBatchMinutesPatch,
   updateDataRetentionUsersDataRetentionPatch,
   type Options,
 } from '../sdk.gen'
@@ -90,6 +91,9 @@ import type {
   SaveTranscriptionTranscriptionsTranscriptionIdPatchData,
   SaveTranscriptionTranscriptionsTranscriptionIdPatchError,
   SaveTranscriptionTranscriptionsTranscriptionIdPatchResponse,
+  UpdateBatchMinutesUsersBatchMinutesPatchData,
+  UpdateBatchMinutesUsersBatchMinutesPatchError,
+  UpdateBatchMinutesUsersBatchMinutesPatchResponse,
   UpdateDataRetentionUsersDataRetentionPatchData,
   UpdateDataRetentionUsersDataRetentionPatchError,
   UpdateDataRetentionUsersDataRetentionPatchResponse,
@@ -525,6 +529,30 @@ export const updateDataRetentionUsersDataRetentionPatchMutation = (
   return mutationOptions
 }
 
+export const updateBatchMinutesUsersBatchMinutesPatchMutation = (
+  options?: Partial<Options<UpdateBatchMinutesUsersBatchMinutesPatchData>>
+): UseMutationOptions<
+  UpdateBatchMinutesUsersBatchMinutesPatchResponse,
+  UpdateBatchMinutesUsersBatchMinutesPatchError,
+  Options<UpdateBatchMinutesUsersBatchMinutesPatchData>
+> => {
+  const mutationOptions: UseMutationOptions<
+    UpdateBatchMinutesUsersBatchMinutesPatchResponse,
+    UpdateBatchMinutesUsersBatchMinutesPatchError,
+    Options<UpdateBatchMinutesUsersBatchMinutesPatchData>
+  > = {
+    mutationFn: async (localOptions) => {
+      const { data } = await updateBatchMinutesUsersBatchMinutesPatch({
+        ...options,
+        ...localOptions,
+        throwOnError: true,
+      })
+      return data
+    },
+  }
+  return mutationOptions
+}
+
 export const listMinutesForTranscriptionTranscriptionTranscriptionIdMinutesGetQueryKey =
   (
     options: Options<ListMinutesForTranscriptionTranscriptionTranscriptionIdMinutesGetData>
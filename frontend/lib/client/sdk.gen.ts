@@ -33,6 +33,9 @@ import type {
   UpdateDataRetentionUsersDataRetentionPatchData,
   UpdateDataRetentionUsersDataRetentionPatchResponses,
   UpdateDataRetentionUsersDataRetentionPatchErrors,
+  UpdateBatchMinutesUsersBatchMinutesPatchData,
+  UpdateBatchMinutesUsersBatchMinutesPatchResponses,
+  UpdateBatchMinutesUsersBatchMinutesPatchErrors,
   ListMinutesForTranscriptionTranscriptionTranscriptionIdMinutesGetData,
   ListMinutesForTranscriptionTranscriptionTranscriptionIdMinutesGetResponses,
   ListMinutesForTranscriptionTranscriptionTranscriptionIdMinutesGetErrors,
@@ -307,6 +310,33 @@ export const updateDataRetentionUsersDataRetentionPatch = <
   })
 }
 
+/**
+ * Update Batch Minutes
+ * Opt the current user in or out of having their initial minutes written in a batch, which can take up to a day.
+ *
+ * Args:
+ * data: Request body containing batch_minutes
+ * current_user: The current authenticated user
+ */
+export const updateBatchMinutesUsersBatchMinutesPatch = <
+  ThrowOnError extends boolean = false,
+>(
+  options: Options<UpdateBatchMinutesUsersBatchMinutesPatchData, ThrowOnError>
+) => {
+  return (options.client ?? _heyApiClient).patch<
+    UpdateBatchMinutesUsersBatchMinutesPatchResponses,
+    UpdateBatchMinutesUsersBatchMinutesPatchErrors,
+    ThrowOnError
+  >({
+    url: '/users/batch-minutes',
+    ...options,
+    headers: {
+      'Content-Type': 'application/json',
+      ...options.headers,
+    },
+  })
+}
+
 /**
  * List Minutes For Transcription
  */
@@ -239,6 +239,10 @@ export type Question = {
    * Description
    */
   description: string
+  /**
+   * Depends On Previous
+   */
+  depends_on_previous?: boolean
   /**
    * Id
    */
@@ -349,6 +353,10 @@ export type CreateQuestion = {
    * Description
    */
   description: string
+  /**
+   * Depends On Previous
+   */
+  depends_on_previous?: boolean
 }
 
 /**
@@ -600,6 +608,10 @@ export type GetUserResponse = {
    * Data Retention Days
    */
   data_retention_days: number | null
+  /**
+   * Batch Minutes
+   */
+  batch_minutes: boolean
 }
 
 /**
@@ -612,6 +624,16 @@ export type DataRetentionUpdateResponse = {
   data_retention_days: number | null
 }
 
+/**
+ * BatchMinutesUpdateRequest
+ */
+export type BatchMinutesUpdateRequest = {
+  /**
+   * Batch Minutes
+   */
+  batch_minutes: boolean
+}
+
 /**
  * CreateUserTemplateRequest
  */
@@ -1024,6 +1046,39 @@ export type UpdateDataRetentionUsersDataRetentionPatchResponses = {
 export type UpdateDataRetentionUsersDataRetentionPatchResponse =
   UpdateDataRetentionUsersDataRetentionPatchResponses[keyof UpdateDataRetentionUsersDataRetentionPatchResponses]
 
+export type UpdateBatchMinutesUsersBatchMinutesPatchData = {
+  body: BatchMinutesUpdateRequest
+  headers?: {
+    /**
+     * X-Amzn-Oidc-Accesstoken
+     */
+    'x-amzn-oidc-accesstoken'?: string | null
+  }
+  path?: never
+  query?: never
+  url: '/users/batch-minutes'
+}
+
+export type UpdateBatchMinutesUsersBatchMinutesPatchErrors = {
+  /**
+   * Validation Error
+   */
+  422: HttpValidationError
+}
+
+export type UpdateBatchMinutesUsersBatchMinutesPatchError =
+  UpdateBatchMinutesUsersBatchMinutesPatchErrors[keyof UpdateBatchMinutesUsersBatchMinutesPatchErrors]
+
+export type UpdateBatchMinutesUsersBatchMinutesPatchResponses = {
+  /**
+   * Successful Response
+   */
+  200: GetUserResponse
+}
+
+export type UpdateBatchMinutesUsersBatchMinutesPatchResponse =
+  UpdateBatchMinutesUsersBatchMinutesPatchResponses[keyof UpdateBatchMinutesUsersBatchMinutesPatchResponses]
+
 export type ListMinutesForTranscriptionTranscriptionTranscriptionIdMinutesGetData =
   {
     body?: never
@@ -0,0 +1,92 @@
+'use client'
+
+import { API_PROXY_PATH } from '@/providers/TanstackQueryProvider'
+import { useQueryClient } from '@tanstack/react-query'
+import {
+  createContext,
+  ReactNode,
+  useContext,
+  useEffect,
+  useState,
+} from 'react'
+
+type JobType = 'transcription' | 'minute_version' | 'chat'
+
+export type JobStatusEvent = {
+  job_type: JobType
+  id: string
+  status: 'awaiting_start' | 'in_progress' | 'completed' | 'failed'
+  stage?: string | null
+  progress?: number | null
+}
+
+// The generated queries that show each type of job, refetched when one of its jobs changes
+const QUERIES_BY_JOB_TYPE: Record<JobType, string[]> = {
+  transcription: [
+    'getTranscriptionTranscriptionsTranscriptionIdGet',
+    'listTranscriptionsTranscriptionsGet',
+  ],
+  minute_version: ['listMinuteVersionsMinutesMinuteIdVersionsGet'],
+  chat: ['listChatTranscriptionsTranscriptionIdChatGet'],
+}
+
+interface JobEventsContextType {
+  // Whether job status changes are being pushed, so queries don't need to poll for them
+  connected: boolean
+  // The latest event of each job in progress, by job id
+  progress: Record<string, JobStatusEvent>
+}
+
+const JobEventsContext = createContext<JobEventsContextType>({
+  connected: false,
+  progress: {},
+})
+
+export function JobEventsProvider({ children }: { children: ReactNode }) {
+  const queryClient = useQueryClient()
+  const [connected, setConnected] = useState(false)
+  const [progress, setProgress] = useState<Record<string, JobStatusEvent>>({})
+
+  useEffect(() => {
+    const invalidate = (jobTypes: JobType[]) =>
+      queryClient.invalidateQueries({
+        predicate: (query) => {
+          const key = query.queryKey[0] as { _id?: string } | undefined
+          return jobTypes.some((jobType) =>
+            QUERIES_BY_JOB_TYPE[jobType].includes(key?._id ?? '')
+          )
+        },
+      })
+
+    const events = new EventSource(`${API_PROXY_PATH}/events`)
+    events.onopen = () => {
+      setConnected(true)
+      // Catch up on anything that changed while we were not connected
+      invalidate(['transcription', 'minute_version', 'chat'])
+    }
+    // EventSource reconnects by itself after a network error, and gives up if the request is refused
+    events.onerror = () => setConnected(false)
+    events.addEventListener('job', (message) => {
+      const event = JSON.parse(message.data) as JobStatusEvent
+      setProgress((previous) => {
+        const next = { ...previous }
+        delete next[event.id]
+        if (event.status === 'in_progress') next[event.id] = event
+        return next
+      })
+      // Progress through a stage doesn't change anything the queries show
+      if (event.progress == null) invalidate([event.job_type])
+    })
+    return () => events.close()
+  }, [queryClient])
+
+  return (
+    <JobEventsContext.Provider value={{ connected, progress }}>
+      {children}
+    </JobEventsContext.Provider>
+  )
+}
+
+export function useJobEvents() {
+  return useContext(JobEventsContext)
+}
@@ -0,0 +1,125 @@
+import json
+import socket
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+import uvicorn
+from fastapi import FastAPI, Form, HTTPException, UploadFile
+from fastapi.responses import PlainTextResponse
+
+
+class FakeBatchAPI:
+    """A local stand-in for the files and batches endpoints of the OpenAI API.
+
+    Batches stay in progress until `finish` is called, which answers each of their requests with `respond`. Requests
+    that `respond` raises a ValueError for get an error response, like a request the provider rejected.
+    """
+
+    def __init__(self, respond: Callable[[list[dict[str, str]]], str]) -> None:
+        self.respond = respond
+        self.files: dict[str, str] = {}
+        self.batches: dict[str, dict[str, Any]] = {}
+        self.app = FastAPI()
+        self.app.post("/files")(self.create_file)
+        self.app.get("/files/{file_id}/content", response_class=PlainTextResponse)(self.file_content)
+        self.app.post("/batches")(self.create_batch)
+        self.app.get("/batches/{batch_id}")(self.get_batch)
+
+    def _add_file(self, content: str, purpose: str) -> dict[str, Any]:
+        file_id = f"file-{uuid.uuid4().hex}"
+        self.files[file_id] = content
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": f"{file_id}.jsonl",
+            "purpose": purpose,
+            "status": "processed",
+        }
+
+    async def create_file(self, file: UploadFile, purpose: str = Form()) -> dict[str, Any]:
+        return self._add_file((await file.read()).decode(), purpose)
+
+    async def file_content(self, file_id: str) -> str:
+        if file_id not in self.files:
+            raise HTTPException(status_code=404, detail="No such file")
+        return self.files[file_id]
+
+    async def create_batch(self, body: dict[str, Any]) -> dict[str, Any]:
+        if body["input_file_id"] not in self.files:
+            raise HTTPException(status_code=400, detail="No such file")
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        self.batches[batch_id] = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body["endpoint"],
+            "input_file_id": body["input_file_id"],
+            "completion_window": body["completion_window"],
+            "status": "in_progress",
+            "created_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+        }
+        return self.batches[batch_id]
+
+    async def get_batch(self, batch_id: str) -> dict[str, Any]:
+        if batch_id not in self.batches:
+            raise HTTPException(status_code=404, detail="No such batch")
+        return self.batches[batch_id]
+
+    def requests(self, batch_id: str) -> list[dict[str, Any]]:
+        """The requests submitted in a batch."""
+        return [json.loads(line) for line in self.files[self.batches[batch_id]["input_file_id"]].splitlines()]
+
+    def finish(self, batch_id: str) -> None:
+        outputs, errors = [], []
+        for request in self.requests(batch_id):
+            try:
+                content = self.respond(request["body"]["messages"])
+            except ValueError as e:
+                response = {"status_code": 400, "body": {"error": {"message": str(e), "type": "invalid_request_error"}}}
+                errors.append({"id": uuid.uuid4().hex, "custom_id": request["custom_id"], "response": response})
+                continue
+            body = {
+                "object": "chat.completion",
+                "model": request["body"]["model"],
+                "choices": [
+                    {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+                ],
+            }
+            outputs.append(
+                {
+                    "id": uuid.uuid4().hex,
+                    "custom_id": request["custom_id"],
+                    "response": {"status_code": 200, "body": body},
+                }
+            )
+        batch = self.batches[batch_id]
+        batch["status"] = "completed"
+        if outputs:
+            batch["output_file_id"] = self._add_file("\n".join(map(json.dumps, outputs)), "batch_output")["id"]
+        if errors:
+            batch["error_file_id"] = self._add_file("\n".join(map(json.dumps, errors)), "batch_output")["id"]
+
+
+@contextmanager
+def serve(app: FastAPI) -> Iterator[str]:
+    """Serve an app on a free local port for the duration of the context, yielding its base URL."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{sock.getsockname()[1]}"
+    finally:
+        server.should_exit = True
+        thread.join()
+        sock.close()
@@ -0,0 +1,60 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from common.llm.cascade import cascade_chat
+from common.llm.client import FastOrBestLLM
+from common.quality_checks import (
+    check_citations_kept,
+    check_headings,
+    check_length,
+    check_not_refusal,
+    first_failure,
+)
+
+messages = [{"role": "user", "content": "Write the minutes"}]
+template = "# Attendees\n\n# Decisions\n\n## Next steps"
+
+
+@pytest.mark.parametrize(
+    ("response", "passes"),
+    [
+        ("# Attendees\nAlice\n# Decisions\nNone\n## Next Steps\nMeet again", True),
+        ("# Attendees\nAlice\n# Decisions\nNone", False),
+        ("Alice attended and nothing was decided", False),
+    ],
+)
+def test_check_headings(response, passes):
+    assert (check_headings(template)(response) is None) == passes
+
+
+def test_checks():
+    assert check_not_refusal("I'm sorry, but I can't help with that.") is not None
+    assert check_not_refusal("Alice said she was sorry she missed the last meeting.") is None
+    assert check_length(1000, min_ratio=0.02)("too short") is not None
+    assert check_length(100, min_ratio=0.25, max_ratio=4)("just long enough " * 10) is None
+    # [2-4] cites 2, 3 and 4
+    assert check_citations_kept("Agreed [1][2-4]. Actions [5].")("Agreed [1][3]. Actions [5].") is None
+    assert check_citations_kept("Agreed [1][2-4]. Actions [5].")("Agreed. Actions [5].") is not None
+    assert first_failure("Fine minutes", [check_not_refusal, check_length(10, min_ratio=0.1)]) is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_cascade_only_escalates_responses_that_fail_a_check():
+    fast = MagicMock(chat=AsyncMock(side_effect=["I'm sorry, I can't do that", "Minutes"]))
+    best = MagicMock(chat=AsyncMock(return_value="Better minutes"))
+
+    def create_default_chatbot(fast_or_best):
+        return best if fast_or_best == FastOrBestLLM.BEST else fast
+
+    with (
+        patch("common.llm.cascade.create_default_chatbot", side_effect=create_default_chatbot),
+        patch("common.llm.cascade.settings") as mock_settings,
+    ):
+        mock_settings.LLM_CASCADE = True
+        escalated = await cascade_chat(messages, FastOrBestLLM.BEST, [check_not_refusal], call_site="minutes")
+        not_escalated = await cascade_chat(messages, FastOrBestLLM.BEST, [check_not_refusal], call_site="minutes")
+
+    assert escalated == ("Better minutes", best)
+    best.chat.assert_awaited_once_with(messages, call_site="minutes_escalated")
+    assert not_escalated == ("Minutes", fast)
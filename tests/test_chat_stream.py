@@ -0,0 +1,48 @@
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from common.llm.client import ChatBot
+from common.services.transcription_handler_service import stream_chat_answer
+
+chat_id = uuid.uuid4()
+messages = [{"role": "user", "content": "Who attended?"}]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_stream_chat_answer_saves_the_answer_as_it_is_written():
+    async def chat_stream(request):  # noqa: ARG001
+        for text in ["Alice", " and", " Bob"]:
+            yield text
+
+    with (
+        patch("common.services.transcription_handler_service.save_chat_answer_so_far", new=AsyncMock()) as save,
+        patch("common.services.transcription_handler_service.settings") as mock_settings,
+    ):
+        mock_settings.CHAT_STREAM_SAVE_INTERVAL_SECONDS = 0
+        answer = await stream_chat_answer(chat_id, ChatBot(MagicMock(chat_stream=chat_stream)), messages)
+
+    assert answer == "Alice and Bob"
+    # each save notifies clients of the text added since the last one
+    assert [call.args for call in save.await_args_list] == [
+        (chat_id, "Alice", 0),
+        (chat_id, "Alice and", 5),
+        (chat_id, "Alice and Bob", 9),
+    ]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_stream_chat_answer_retries_without_streaming_if_nothing_was_sent():
+    async def chat_stream(request):  # noqa: ARG001
+        msg = "Connection reset"
+        raise ConnectionError(msg)
+        yield
+
+    adapter = MagicMock(chat_stream=chat_stream, chat=AsyncMock(return_value="Alice and Bob"))
+
+    with patch("common.services.transcription_handler_service.save_chat_answer_so_far", new=AsyncMock()) as save:
+        answer = await stream_chat_answer(chat_id, ChatBot(adapter), messages)
+
+    assert answer == "Alice and Bob"
+    save.assert_not_awaited()
@@ -0,0 +1,102 @@
+import wave
+from pathlib import Path
+from typing import ClassVar
+
+import pytest
+
+from common.services.live_transcription_service import BYTES_PER_SECOND, LiveTranscriber
+from common.services.transcription_services.adapter import AdapterType, TranscriptionAdapter
+from common.types import DialogueEntry, TranscriptionJobMessageData
+
+
+class FakeLiveAdapter(TranscriptionAdapter):
+    name = "fake_live"
+    adapter_type = AdapterType.SYNCHRONOUS
+    max_audio_length = 3600
+    durations: ClassVar[list[float]] = []
+    fail_on_call: ClassVar[int | None] = None
+
+    @classmethod
+    async def start(cls, audio_file_path_or_recording: Path) -> TranscriptionJobMessageData:
+        with wave.open(str(audio_file_path_or_recording), "rb") as wav_file:
+            duration = wav_file.getnframes() / wav_file.getframerate()
+        cls.durations.append(duration)
+        if cls.fail_on_call == len(cls.durations):
+            msg = "provider error"
+            raise RuntimeError(msg)
+        return TranscriptionJobMessageData(
+            transcription_service=cls.name,
+            transcript=[DialogueEntry(speaker="SPEAKER_00", text="color", start_time=0.5, end_time=duration)],
+        )
+
+    @classmethod
+    async def check(cls, data: TranscriptionJobMessageData) -> TranscriptionJobMessageData:
+        return data
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return True
+
+
+@pytest.fixture
+def adapter():
+    FakeLiveAdapter.durations = []
+    FakeLiveAdapter.fail_on_call = None
+    return FakeLiveAdapter
+
+
+def silence(seconds: float) -> bytes:
+    return bytes(int(seconds * BYTES_PER_SECOND))
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_windows_are_transcribed_with_offsets(adapter, tmp_path):
+    received: list[list[DialogueEntry]] = []
+
+    async def on_entries(entries):
+        received.append(entries)
+
+    transcriber = LiveTranscriber(adapter=adapter, workdir=tmp_path, on_entries=on_entries, window_seconds=2)
+    # frames do not have to line up with windows
+    for _ in range(5):
+        transcriber.feed(silence(1.5))
+    entries = await transcriber.finish()
+
+    assert adapter.durations == [2, 2, 2, 1.5]
+    assert [entry["start_time"] for entry in entries] == [0.5, 2.5, 4.5, 6.5]
+    assert entries[-1]["end_time"] == 7.5
+    assert entries[0]["text"] == "colour"
+    assert [entry for batch in received for entry in batch] == entries
+    assert transcriber.received_seconds == 7.5
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_failed_window_is_skipped_and_recording_is_complete(adapter, tmp_path):
+    async def on_entries(entries):  # noqa: ARG001
+        return
+
+    adapter.fail_on_call = 2
+    transcriber = LiveTranscriber(adapter=adapter, workdir=tmp_path, on_entries=on_entries, window_seconds=2)
+    transcriber.feed(silence(6.5))
+    entries = await transcriber.finish()
+
+    # the trailing half second is too short to be worth transcribing on its own
+    assert adapter.durations == [2, 2, 2]
+    assert [entry["start_time"] for entry in entries] == [0.5, 4.5]
+
+    recording = transcriber.write_recording(tmp_path / "recording.wav")
+    with wave.open(str(recording), "rb") as wav_file:
+        assert wav_file.getnframes() / wav_file.getframerate() == 6.5
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_failure_to_handle_entries_does_not_stop_transcription(adapter, tmp_path):
+    async def on_entries(entries):  # noqa: ARG001
+        msg = "could not commit"
+        raise RuntimeError(msg)
+
+    transcriber = LiveTranscriber(adapter=adapter, workdir=tmp_path, on_entries=on_entries, window_seconds=2)
+    transcriber.feed(silence(6))
+    entries = await transcriber.finish()
+
+    assert [entry["start_time"] for entry in entries] == [0.5, 2.5, 4.5]
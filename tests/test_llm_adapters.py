@@ -0,0 +1,23 @@
+import asyncio
+
+import pytest
+
+from common.llm.client import create_chatbot, get_adapter
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_chatbots_share_an_adapter_per_model_and_event_loop():
+    first = create_chatbot("ollama", "llama3.2", temperature=0.0)
+    second = create_chatbot("ollama", "llama3.2", temperature=0.0)
+
+    assert first.adapter is second.adapter
+    assert first.messages is not second.messages
+    assert create_chatbot("ollama", "llama3.2", temperature=0.5).adapter is not first.adapter
+
+    # HTTP clients can't move between event loops, so another loop gets its own adapter
+    other_loop_adapter = await asyncio.to_thread(asyncio.run, get_adapter_on_new_loop())
+    assert other_loop_adapter is not first.adapter
+
+
+async def get_adapter_on_new_loop():
+    return get_adapter("ollama", "llama3.2", 0.0)
@@ -0,0 +1,111 @@
+import os
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from common.database.postgres_models import HallucinationType
+from common.llm.cache import DiskLLMCache, MemoryLLMCache, cache_metrics
+from common.llm.client import ChatBot
+from common.llm.usage import LLMUsage, record_usage
+from common.types import LLMHallucination, LLMHallucinationList
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_memory_cache_evicts_least_recently_used_and_expired_entries():
+    cache = MemoryLLMCache(ttl_seconds=60, max_entries=2)
+    await cache.set("a", "1")
+    await cache.set("b", "2")
+    assert await cache.get("a") == "1"
+    await cache.set("c", "3")
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == "1"
+    assert await cache.get("c") == "3"
+
+    expired = MemoryLLMCache(ttl_seconds=-1, max_entries=2)
+    await expired.set("a", "1")
+    assert await expired.get("a") is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_disk_cache_evicts_least_recently_used_files(tmp_path):
+    cache = DiskLLMCache(str(tmp_path), ttl_seconds=60, max_entries=2)
+    await cache.set("a", "1")
+    await cache.set("b", "2")
+    # "a" was last used before "b"
+    os.utime(tmp_path / "a.json", (0, 0))
+    await cache.set("c", "3")
+
+    assert await cache.get("a") is None
+    assert await cache.get("b") == "2"
+    assert await cache.get("c") == "3"
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_identical_requests_are_answered_from_the_cache():
+    adapter = AsyncMock()
+    adapter.chat.return_value = "minutes"
+    adapter.structured_chat.return_value = LLMHallucinationList(hallucinations=[])
+    messages = [{"role": "user", "content": "Write the minutes"}]
+
+    with patch("common.llm.client.get_llm_cache", return_value=MemoryLLMCache(ttl_seconds=60, max_entries=10)):
+        hits = cache_metrics.hits
+        for _ in range(2):
+            chatbot = ChatBot(adapter, model_id="gemini/gemini-2.5-flash", cache_responses=True)
+            assert await chatbot.chat(messages) == "minutes"
+            assert await chatbot.structured_chat(messages, LLMHallucinationList) == LLMHallucinationList(
+                hallucinations=[]
+            )
+        # models that aren't deterministic are never cached
+        await ChatBot(adapter, model_id="gemini/gemini-2.5-flash").chat(messages)
+
+    assert adapter.chat.call_count == 2
+    assert adapter.structured_chat.call_count == 1
+    assert cache_metrics.hits == hits + 2
+    # a cache hit still extends the conversation
+    assert chatbot.messages[-1] == {"role": "assistant", "content": '{"hallucinations":[]}'}
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_structured_requests_are_cached_with_the_conversation_they_follow():
+    hallucinations = {
+        "First meeting": LLMHallucinationList(
+            hallucinations=[
+                LLMHallucination(hallucination_type=HallucinationType.OTHER, hallucination_text="First meeting")
+            ]
+        ),
+        "Second meeting": LLMHallucinationList(hallucinations=[]),
+    }
+
+    async def structured_chat(messages, response_format):  # noqa: ARG001
+        return hallucinations[messages[0]["content"]]
+
+    adapter = AsyncMock()
+    adapter.structured_chat.side_effect = structured_chat
+    check = [{"role": "user", "content": "Check the minutes for hallucinations"}]
+
+    with patch("common.llm.client.get_llm_cache", return_value=MemoryLLMCache(ttl_seconds=60, max_entries=10)):
+        for meeting, expected in hallucinations.items():
+            chatbot = ChatBot(adapter, model_id="gemini/gemini-2.5-flash", cache_responses=True)
+            chatbot.messages = [{"role": "user", "content": meeting}, {"role": "assistant", "content": "Minutes"}]
+            assert await chatbot.structured_chat(check, LLMHallucinationList) == expected
+
+    assert adapter.structured_chat.call_count == 2
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_truncated_responses_are_not_cached():
+    async def chat(messages):  # noqa: ARG001
+        record_usage(LLMUsage("gpt-4.1", prompt_tokens=10, cached_tokens=0, completion_tokens=16384, truncated=True))
+        return "minutes cut"
+
+    adapter = AsyncMock(chat=chat)
+    messages = [{"role": "user", "content": "Write the minutes"}]
+
+    with patch("common.llm.client.get_llm_cache", return_value=MemoryLLMCache(ttl_seconds=60, max_entries=10)):
+        hits = cache_metrics.hits
+        for _ in range(2):
+            await ChatBot(adapter, model_id="openai/gpt-4.1", cache_responses=True).chat(messages)
+
+    assert cache_metrics.hits == hits
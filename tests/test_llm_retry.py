@@ -0,0 +1,86 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import openai
+import pytest
+
+from common.llm.client import ChatBot
+from common.llm.retry import is_retryable, retry_after_seconds
+
+request = httpx.Request("POST", "https://example.com/chat/completions")
+messages = [{"role": "user", "content": "Hello there"}]
+
+
+def status_error(error_class: type[openai.APIStatusError], status: int, headers: dict[str, str] | None = None):
+    return error_class("error", response=httpx.Response(status, headers=headers, request=request), body=None)
+
+
+@pytest.mark.parametrize(
+    ("headers", "expected"),
+    [
+        ({"retry-after-ms": "1500"}, 1.5),
+        ({"retry-after": "7"}, 7),
+        ({"retry-after": "not a date"}, None),
+        ({}, None),
+    ],
+)
+def test_retry_after_seconds(headers, expected):
+    assert retry_after_seconds(MagicMock(response=MagicMock(headers=headers))) == expected
+
+
+def test_retry_after_seconds_of_a_rate_limit_without_retry_after_is_when_it_resets():
+    headers = {"x-ratelimit-reset-requests": "1s", "x-ratelimit-reset-tokens": "6m0.5s"}
+
+    assert retry_after_seconds(status_error(openai.RateLimitError, 429, headers)) == pytest.approx(360.5)
+    # every response has the reset headers, only a rate limited one is waiting for them
+    assert retry_after_seconds(status_error(openai.BadRequestError, 400, headers)) is None
+
+
+@pytest.mark.parametrize(
+    ("error", "expected"),
+    [
+        (status_error(openai.BadRequestError, 400), False),
+        (status_error(openai.NotFoundError, 404), False),
+        (status_error(openai.RateLimitError, 429), True),
+        (status_error(openai.InternalServerError, 503), True),
+        (openai.APIConnectionError(request=request), True),
+        (ValueError("OpenAI response.content is None"), True),
+    ],
+)
+def test_is_retryable(error, expected):
+    assert is_retryable(error) == expected
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_chatbot_fails_fast_on_errors_that_will_not_go_away():
+    adapter = MagicMock(chat=AsyncMock(side_effect=status_error(openai.BadRequestError, 400)))
+
+    with pytest.raises(openai.BadRequestError):
+        await ChatBot(adapter).chat(messages)
+
+    adapter.chat.assert_awaited_once()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_chatbot_fails_over_to_its_alternate_deployment():
+    primary = MagicMock(chat=AsyncMock(side_effect=status_error(openai.RateLimitError, 429, {"retry-after": "60"})))
+    alternate = MagicMock(chat=AsyncMock(return_value="Hi"))
+    chatbot = ChatBot(primary, failover=(alternate, "openai/gpt-4.1"))
+
+    assert await chatbot.chat(messages) == "Hi"
+    assert chatbot.adapter is alternate
+    assert chatbot.model_id == "openai/gpt-4.1"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_chatbot_does_not_wait_longer_than_the_longest_backoff():
+    quota_exhausted = status_error(openai.RateLimitError, 429, {"retry-after": "3600"})
+    adapter = MagicMock(chat=AsyncMock(side_effect=quota_exhausted))
+
+    with pytest.raises(openai.RateLimitError):
+        await ChatBot(adapter).chat(messages)
+    adapter.chat.assert_awaited_once()
+
+    # a chatbot with an alternate deployment switches to it instead
+    alternate = MagicMock(chat=AsyncMock(return_value="Hi"))
+    assert await ChatBot(adapter, failover=(alternate, "openai/gpt-4.1")).chat(messages) == "Hi"
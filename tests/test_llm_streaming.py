@@ -0,0 +1,137 @@
+from contextlib import aclosing
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from google.genai.types import GenerateContentConfig, GenerateContentResponseUsageMetadata
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletionChunk
+from openai.types.chat.chat_completion_chunk import Choice, ChoiceDelta
+
+from common.llm.adapters.gemini import GeminiModelAdapter
+from common.llm.adapters.ollama import OllamaModelAdapter
+from common.llm.cache import MemoryLLMCache, cache_key
+from common.llm.client import ChatBot
+from common.llm.usage import LLMUsage, collect_usage
+
+messages = [{"role": "system", "content": "Be brief."}, {"role": "user", "content": "Who attended?"}]
+
+
+def text_chunk(text: str) -> ChatCompletionChunk:
+    return ChatCompletionChunk(
+        id="1",
+        choices=[Choice(delta=ChoiceDelta(content=text), index=0)],
+        created=0,
+        model="llama3.2",
+        object="chat.completion.chunk",
+    )
+
+
+class FakeStream:
+    def __init__(self, chunks: list[ChatCompletionChunk]) -> None:
+        self.chunks = chunks
+        self.closed = False
+        self._iterator = self._iterate()
+
+    def __aiter__(self):
+        return self._iterator
+
+    async def close(self) -> None:
+        self.closed = True
+        await self._iterator.aclose()
+
+    async def _iterate(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def ollama_adapter(stream: FakeStream) -> OllamaModelAdapter:
+    adapter = OllamaModelAdapter(model="llama3.2", base_url="http://localhost:11434/v1")
+    adapter.async_client = MagicMock()
+    adapter.async_client.chat.completions.create = AsyncMock(return_value=stream)
+    return adapter
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_openai_compatible_stream_yields_text_and_records_reported_usage():
+    usage_chunk = ChatCompletionChunk(
+        id="1",
+        choices=[],
+        created=0,
+        model="llama3.2",
+        object="chat.completion.chunk",
+        usage=CompletionUsage(prompt_tokens=20, completion_tokens=3, total_tokens=23),
+    )
+    stream = FakeStream([text_chunk("Alice"), text_chunk(" and Bob"), usage_chunk])
+
+    with collect_usage() as usage:
+        texts = [text async for text in ollama_adapter(stream).chat_stream(messages)]
+
+    assert texts == ["Alice", " and Bob"]
+    assert usage == [LLMUsage(model="llama3.2", prompt_tokens=20, cached_tokens=0, completion_tokens=3)]
+    assert stream.closed
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_stopping_a_stream_early_closes_it_and_records_estimated_usage():
+    stream = FakeStream([text_chunk("Alice"), text_chunk(" and Bob")])
+
+    with collect_usage() as usage:
+        async with aclosing(ollama_adapter(stream).chat_stream(messages)) as texts:
+            async for text in texts:
+                assert text == "Alice"
+                break
+
+    assert stream.closed
+    assert usage == [LLMUsage(model="llama3.2", prompt_tokens=7, cached_tokens=0, completion_tokens=2)]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_gemini_stream_records_the_usage_of_the_last_chunk():
+    async def generate_content_stream(**kwargs):  # noqa: ARG001
+        async def chunks():
+            for text, completion_tokens in [("Alice", 1), (" and Bob", 3)]:
+                yield MagicMock(
+                    text=text,
+                    usage_metadata=GenerateContentResponseUsageMetadata(
+                        prompt_token_count=20, candidates_token_count=completion_tokens
+                    ),
+                )
+
+        return chunks()
+
+    with patch("common.llm.adapters.gemini.genai.Client"):
+        adapter = GeminiModelAdapter(model="gemini-2.5-flash", generate_content_config=GenerateContentConfig())
+    adapter.client.aio.models.generate_content_stream = generate_content_stream
+
+    with collect_usage() as usage:
+        texts = [text async for text in adapter.chat_stream(messages)]
+
+    assert texts == ["Alice", " and Bob"]
+    assert usage == [LLMUsage(model="gemini-2.5-flash", prompt_tokens=20, cached_tokens=0, completion_tokens=3)]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_chatbot_adds_a_streamed_response_to_the_conversation():
+    async def chat_stream(request):  # noqa: ARG001
+        for text in ["Alice", " and Bob"]:
+            yield text
+
+    chatbot = ChatBot(MagicMock(chat_stream=chat_stream))
+
+    assert [text async for text in chatbot.chat_stream(messages)] == ["Alice", " and Bob"]
+    assert chatbot.messages == [*messages, {"role": "assistant", "content": "Alice and Bob"}]
+
+
+@pytest.mark.parametrize(("finish_reason", "cached"), [("stop", True), ("length", False)])
+@pytest.mark.asyncio(loop_scope="session")
+async def test_streamed_responses_cut_short_are_not_cached(finish_reason, cached):
+    last_chunk = text_chunk(" and Bob")
+    last_chunk.choices[0].finish_reason = finish_reason
+    stream = FakeStream([text_chunk("Alice"), last_chunk])
+    cache = MemoryLLMCache(ttl_seconds=60, max_entries=10)
+    chatbot = ChatBot(ollama_adapter(stream), model_id="ollama/llama3.2", cache_responses=True)
+
+    with patch("common.llm.client.get_llm_cache", return_value=cache):
+        assert "".join([text async for text in chatbot.chat_stream(messages)]) == "Alice and Bob"
+
+    assert (await cache.get(cache_key("ollama/llama3.2", messages, None)) is not None) == cached
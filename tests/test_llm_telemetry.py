@@ -0,0 +1,71 @@
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from tenacity import stop_after_attempt
+
+from common.llm.client import ChatBot
+from common.llm.telemetry import call_cost, llm_job
+from common.llm.usage import LLMUsage, collect_usage, record_usage
+from common.types import TaskType
+
+job_id = uuid.uuid4()
+messages = [{"role": "user", "content": "Summarise the meeting"}]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_calls_made_for_a_job_are_recorded_with_their_usage():
+    async def chat(messages):  # noqa: ARG001
+        record_usage(LLMUsage(model="gpt-4.1", prompt_tokens=100, cached_tokens=40, completion_tokens=20))
+        return "Minutes"
+
+    chatbot = ChatBot(MagicMock(chat=chat), model_id="openai/gpt-4.1")
+    with (
+        patch("common.llm.telemetry.save_llm_call", new=AsyncMock()) as save,
+        llm_job(job_id, TaskType.MINUTE, "General"),
+        collect_usage() as usage,
+    ):
+        await chatbot.chat(messages, call_site="section_0")
+
+    call = save.await_args.args[0]
+    assert (call.job_id, call.task_type, call.template, call.call_site, call.model) == (
+        job_id,
+        "minute",
+        "General",
+        "section_0",
+        "openai/gpt-4.1",
+    )
+    assert (call.prompt_tokens, call.cached_tokens, call.completion_tokens) == (100, 40, 20)
+    assert call.error is None
+    assert not call.cache_hit
+    # the job's own collector still sees the call
+    assert len(usage) == 1
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_failed_attempts_are_recorded_with_their_error():
+    chatbot = ChatBot(MagicMock(chat=AsyncMock(side_effect=TimeoutError)), model_id="openai/gpt-4.1")
+    with (
+        patch("common.llm.telemetry.save_llm_call", new=AsyncMock()) as save,
+        llm_job(job_id, TaskType.INTERACTIVE),
+        pytest.raises(TimeoutError),
+    ):
+        await ChatBot.chat.retry_with(stop=stop_after_attempt(1), reraise=True)(chatbot, messages, call_site="chat")
+
+    assert save.await_args.args[0].error == "TimeoutError"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_calls_made_outside_a_job_are_not_recorded():
+    chatbot = ChatBot(MagicMock(chat=AsyncMock(return_value="Hello")), model_id="openai/gpt-4.1")
+    with patch("common.llm.telemetry.save_llm_call", new=AsyncMock()) as save:
+        await chatbot.chat(messages)
+
+    save.assert_not_awaited()
+
+
+def test_call_cost_discounts_cached_prompt_tokens():
+    with patch("common.llm.telemetry.settings") as mock_settings:
+        mock_settings.LLM_PRICES = {"openai/gpt-4.1": (2.0, 0.5, 8.0)}
+        assert call_cost("openai/gpt-4.1", 1_000_000, 400_000, 100_000) == pytest.approx(1.2 + 0.2 + 0.8)
+        assert call_cost("gemini/gemini-2.5-flash", 1000, 0, 1000) is None
@@ -0,0 +1,75 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import openai
+import pytest
+
+from common.llm.adapters import LoadBalancedModelAdapter
+from common.llm.adapters.load_balanced import Endpoint
+from common.llm.client import create_adapter
+from common.settings import LLMEndpoint, get_settings
+
+messages = [{"role": "user", "content": "Summarise the meeting"}]
+request = httpx.Request("POST", "https://example.com/chat/completions")
+
+
+def endpoint(name: str, weight: float = 1, **adapter) -> Endpoint:
+    return Endpoint(name, MagicMock(**adapter), weight)
+
+
+def test_calls_go_to_the_endpoint_with_the_fewest_outstanding_tokens_for_its_weight():
+    big, small = endpoint("big", weight=3), endpoint("small", weight=1)
+    big.outstanding_tokens = 2000
+    small.outstanding_tokens = 1000
+
+    # 3000 / 3 is less than 2000 / 1
+    assert LoadBalancedModelAdapter([big, small]).choose_endpoint(1000) is big
+    big.outstanding_tokens = 8000
+    assert LoadBalancedModelAdapter([big, small]).choose_endpoint(1000) is small
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_a_rate_limited_endpoint_is_drained_and_the_call_moves_on():
+    rate_limited = openai.RateLimitError(
+        "Too many requests", response=httpx.Response(429, headers={"retry-after": "30"}, request=request), body=None
+    )
+    first = endpoint("first", weight=2, chat=AsyncMock(side_effect=rate_limited))
+    second = endpoint("second", chat=AsyncMock(return_value="Minutes"))
+    adapter = LoadBalancedModelAdapter([first, second])
+
+    assert await adapter.chat(messages) == "Minutes"
+    assert adapter.healthy_endpoints() == [second]
+    assert first.outstanding_tokens == second.outstanding_tokens == 0
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_errors_that_will_not_go_away_are_not_tried_on_other_endpoints():
+    bad_request = openai.BadRequestError("Too long", response=httpx.Response(400, request=request), body=None)
+    first = endpoint("first", weight=2, chat=AsyncMock(side_effect=bad_request))
+    second = endpoint("second", chat=AsyncMock(return_value="Minutes"))
+    adapter = LoadBalancedModelAdapter([first, second])
+
+    with pytest.raises(openai.BadRequestError):
+        await adapter.chat(messages)
+
+    second.adapter.chat.assert_not_awaited()
+    assert adapter.healthy_endpoints() == [first, second]
+
+
+def test_create_adapter_balances_over_the_endpoints_of_a_model():
+    settings = get_settings().model_copy(
+        update={
+            "LLM_ENDPOINTS": {
+                "ollama/llama3.2": [
+                    LLMEndpoint(name="local", tokens_per_minute=3000),
+                    LLMEndpoint(name="remote", weight=1, settings={"OLLAMA_BASE_URL": "http://remote:11434"}),
+                ]
+            }
+        }
+    )
+    with patch("common.llm.client.settings", settings):
+        adapter = create_adapter("ollama", "llama3.2", 0.0)
+
+    assert isinstance(adapter, LoadBalancedModelAdapter)
+    assert [(endpoint.name, endpoint.weight) for endpoint in adapter.endpoints] == [("local", 3000), ("remote", 1)]
+    assert str(adapter.endpoints[1].adapter.async_client.base_url).startswith("http://remote:11434")
@@ -0,0 +1,118 @@
+from itertools import pairwise
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from common.database.postgres_models import DialogueEntry
+from common.llm.usage import LLMUsage, record_usage
+from common.templates.map_reduce import condense_transcript, split_transcript
+
+
+def make_transcript(entries: int, words_per_entry: int = 50) -> list[DialogueEntry]:
+    return [
+        DialogueEntry(
+            speaker=f"Speaker {i % 3}",
+            text=" ".join(["word"] * words_per_entry),
+            start_time=i * 20,
+            end_time=i * 20 + 20,
+        )
+        for i in range(entries)
+    ]
+
+
+def test_split_transcript_overlaps_by_time():
+    transcript = make_transcript(100)
+
+    chunks = split_transcript(transcript, chunk_tokens=1000, overlap_seconds=30)
+
+    assert len(chunks) > 1
+    assert chunks[0][0] is transcript[0]
+    assert chunks[-1][-1] is transcript[-1]
+    for previous, chunk in pairwise(chunks):
+        # each chunk starts within the overlap before the previous one ended, and still moves forward
+        assert previous[-1]["end_time"] - 30 <= chunk[0]["start_time"] < previous[-1]["end_time"]
+        assert chunk[0]["start_time"] > previous[0]["start_time"]
+
+
+def test_split_transcript_always_makes_progress():
+    transcript = make_transcript(3, words_per_entry=2000)
+
+    chunks = split_transcript(transcript, chunk_tokens=100, overlap_seconds=600)
+
+    assert chunks == [[entry] for entry in transcript]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_condense_transcript_only_condenses_long_transcripts():
+    chatbot = AsyncMock()
+    chatbot.chat.return_value = "notes"
+    with (
+        patch("common.templates.map_reduce.settings") as mock_settings,
+        patch("common.templates.map_reduce.create_default_chatbot", return_value=chatbot),
+    ):
+        mock_settings.MINUTE_TRANSCRIPT_MAX_TOKENS = 5000
+        mock_settings.MINUTE_CHUNK_TOKENS = 2000
+        mock_settings.MINUTE_CHUNK_OVERLAP_SECONDS = 0
+        mock_settings.MINUTE_CHUNK_CONCURRENCY = 2
+
+        short = make_transcript(10)
+        assert await condense_transcript(short) is short
+        chatbot.chat.assert_not_called()
+
+        condensed = await condense_transcript(make_transcript(100))
+
+    assert chatbot.chat.call_count == len(condensed) > 1
+    assert all(entry["text"] == "notes" for entry in condensed)
+    assert condensed[0]["speaker"].startswith("Notes from 00:00:00 to ")
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_condense_transcript_splits_chunks_whose_notes_are_cut_short():
+    def chunk_prompt(chunk, part, total_parts, time_range):  # noqa: ARG001
+        return [{"role": "user", "content": str(len(chunk))}]
+
+    async def chat(messages, call_site):  # noqa: ARG001
+        # notes of more than 10 entries don't fit in the output
+        truncated = int(messages[-1]["content"]) > 10
+        record_usage(LLMUsage("gpt-4.1", prompt_tokens=0, cached_tokens=0, completion_tokens=0, truncated=truncated))
+        return "notes"
+
+    chatbot = AsyncMock(chat=chat)
+    with (
+        patch("common.templates.map_reduce.settings") as mock_settings,
+        patch("common.templates.map_reduce.create_default_chatbot", return_value=chatbot),
+        patch("common.templates.map_reduce.get_chunk_notes_prompt", side_effect=chunk_prompt),
+    ):
+        mock_settings.MINUTE_TRANSCRIPT_MAX_TOKENS = 5000
+        mock_settings.MINUTE_CHUNK_TOKENS = 2000
+        mock_settings.MINUTE_CHUNK_OVERLAP_SECONDS = 0
+        mock_settings.MINUTE_CHUNK_CONCURRENCY = 2
+
+        condensed = await condense_transcript(make_transcript(100))
+
+    assert all(entry["end_time"] - entry["start_time"] <= 10 * 20 for entry in condensed)
+    # the notes still cover the whole transcript, in order
+    assert condensed[0]["start_time"] == 0
+    assert condensed[-1]["end_time"] == 100 * 20
+    for previous, entry in pairwise(condensed):
+        assert entry["start_time"] == previous["end_time"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_condense_transcript_stops_when_the_notes_are_no_shorter():
+    chatbot = AsyncMock()
+    chatbot.chat.return_value = " ".join(["note"] * 2000)
+    with (
+        patch("common.templates.map_reduce.settings") as mock_settings,
+        patch("common.templates.map_reduce.create_default_chatbot", return_value=chatbot),
+    ):
+        mock_settings.MINUTE_TRANSCRIPT_MAX_TOKENS = 5000
+        mock_settings.MINUTE_CHUNK_TOKENS = 2000
+        mock_settings.MINUTE_CHUNK_OVERLAP_SECONDS = 0
+        mock_settings.MINUTE_CHUNK_CONCURRENCY = 2
+
+        transcript = make_transcript(100)
+        condensed = await condense_transcript(transcript)
+
+    assert condensed is transcript
+    assert chatbot.chat.call_count == len(split_transcript(transcript, 2000, 0))
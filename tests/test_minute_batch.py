@@ -0,0 +1,97 @@
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from openai import AsyncOpenAI
+
+from common.database.postgres_models import JobStatus
+from common.llm.batch import BatchResult, OpenAIBatchClient
+from common.services.minute_batch_service import BatchedMinutes, MinuteBatchService
+from common.services.minute_handler_service import MinuteHandlerService
+from common.templates.default.general import General
+from tests.fake_batch_api import FakeBatchAPI, serve
+
+
+def respond(messages: list[dict[str, str]]) -> str:
+    if "refuse" in messages[-1]["content"]:
+        msg = "The prompt was filtered"
+        raise ValueError(msg)
+    return f"# Minutes of {messages[-1]['content']}"
+
+
+@pytest.fixture
+def fake_batch_api():
+    fake = FakeBatchAPI(respond)
+    with serve(fake.app) as base_url:
+        fake.base_url = base_url
+        yield fake
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_batch_results_are_returned_once_it_finishes(fake_batch_api):
+    client = OpenAIBatchClient(AsyncOpenAI(base_url=fake_batch_api.base_url, api_key="test"), model="gpt-4.1-batch")
+    batch_id = await client.submit(
+        {
+            "first": [{"role": "user", "content": "the budget meeting"}],
+            "second": [{"role": "user", "content": "refuse this"}],
+        }
+    )
+
+    assert [request["body"]["model"] for request in fake_batch_api.requests(batch_id)] == ["gpt-4.1-batch"] * 2
+    assert await client.results(batch_id) is None
+
+    fake_batch_api.finish(batch_id)
+
+    assert sorted(await client.results(batch_id)) == [
+        BatchResult("first", "# Minutes of the budget meeting", None),
+        BatchResult("second", None, "The prompt was filtered"),
+    ]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_batched_minutes_are_checked_and_saved():
+    minute_version_id = uuid.uuid4()
+    minute_version = MagicMock()
+    minute_version.minute.template_name = "General"
+    messages = [{"role": "user", "content": "Write the minutes"}]
+    chatbot = MagicMock(hallucination_check=AsyncMock(return_value=[]))
+
+    with (
+        patch.object(MinuteHandlerService, "get_minute_version", new=AsyncMock(return_value=minute_version)),
+        patch.object(MinuteHandlerService, "update_minute_version") as update_minute_version,
+        patch.object(MinuteBatchService, "remove") as remove,
+        patch("common.services.minute_handler_service.TemplateManager.get_template", return_value=General),
+        patch("common.services.minute_handler_service.create_default_chatbot", return_value=chatbot),
+        patch(
+            "common.templates.types.add_citations_to_minute", new=AsyncMock(return_value="# Minutes [1]")
+        ) as add_citations,
+    ):
+        await MinuteHandlerService.finish_batched_minutes(
+            BatchedMinutes(minute_version_id, messages, BatchResult(str(minute_version_id), "# Minutes", None))
+        )
+
+    # the hallucination check follows on from the conversation the batch had
+    assert chatbot.messages == [*messages, {"role": "assistant", "content": "# Minutes"}]
+    assert add_citations.await_args.kwargs["initial_draft"] == "# Minutes"
+    update_minute_version.assert_called_once_with(
+        minute_version_id, html_content="<h1>Minutes [1]</h1>\n", hallucinations=[], status=JobStatus.COMPLETED
+    )
+    # the prompt is only removed once the minutes are saved
+    remove.assert_called_once_with(minute_version_id)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_batched_minutes_without_a_response_fail():
+    minute_version_id = uuid.uuid4()
+    with (
+        patch.object(MinuteHandlerService, "update_minute_version") as update_minute_version,
+        patch.object(MinuteBatchService, "remove") as remove,
+    ):
+        await MinuteHandlerService.finish_batched_minutes(
+            BatchedMinutes(minute_version_id, [], BatchResult(str(minute_version_id), None, "The prompt was filtered"))
+        )
+
+    update_minute_version.assert_called_once_with(
+        minute_version_id, status=JobStatus.FAILED, error="The prompt was filtered"
+    )
+    remove.assert_called_once_with(minute_version_id)
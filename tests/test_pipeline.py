@@ -0,0 +1,100 @@
+import asyncio
+from graphlib import CycleError
+
+import pytest
+
+from common.services.pipeline import FailurePolicy, Stage, run_pipeline
+
+
+def after(seconds, value):
+    async def run(inputs):  # noqa: ARG001
+        await asyncio.sleep(seconds)
+        return value
+
+    return run
+
+
+async def fail(inputs):  # noqa: ARG001
+    msg = "stage failed"
+    raise ValueError(msg)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_independent_stages_run_concurrently_and_dependencies_get_outputs():
+    async def combine(inputs):
+        return f"{inputs['a']}+{inputs['b']}"
+
+    loop = asyncio.get_running_loop()
+    started_at = loop.time()
+    result = await run_pipeline(
+        "test",
+        [
+            Stage("combined", combine, depends_on=["a", "b"]),
+            Stage("a", after(0.1, "a")),
+            Stage("b", after(0.1, "b")),
+        ],
+    )
+
+    assert result.outputs == {"a": "a", "b": "b", "combined": "a+b"}
+    assert loop.time() - started_at < 0.19
+    assert set(result.stage_seconds) == {"a", "b", "combined"}
+    assert result.fallbacks == []
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_fallback_policy_uses_fallback_value():
+    result = await run_pipeline(
+        "test",
+        [
+            Stage("a", fail, on_failure=FailurePolicy.FALLBACK, fallback="default"),
+            Stage("b", after(0, "b")),
+            Stage("slow", after(1, "slow"), on_failure=FailurePolicy.FALLBACK, timeout_seconds=0.01),
+        ],
+    )
+
+    assert result.outputs == {"a": "default", "b": "b", "slow": None}
+    assert sorted(result.fallbacks) == ["a", "slow"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_progress_is_reported_as_each_stage_finishes():
+    progress: list[float] = []
+
+    await run_pipeline(
+        "test",
+        [
+            Stage("a", after(0, "a")),
+            Stage("b", fail, on_failure=FailurePolicy.FALLBACK),
+            Stage("c", after(0, "c"), depends_on=["a", "b"]),
+            Stage("d", after(0.05, "d")),
+        ],
+        on_progress=progress.append,
+    )
+
+    assert progress == [0.25, 0.5, 0.75, 1.0]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_fail_policy_raises_stage_error_and_cancels_other_stages():
+    cancelled = asyncio.Event()
+
+    async def slow(inputs):  # noqa: ARG001
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(ValueError, match="stage failed"):
+        await run_pipeline("test", [Stage("a", fail), Stage("b", slow)])
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError, match="unknown stages"):
+        await run_pipeline("test", [Stage("a", after(0, "a"), depends_on=["missing"])])
+    with pytest.raises(CycleError):
+        await run_pipeline(
+            "test", [Stage("a", after(0, "a"), depends_on=["b"]), Stage("b", after(0, "b"), depends_on=["a"])]
+        )
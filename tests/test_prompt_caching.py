@@ -0,0 +1,72 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from google.genai.types import GenerateContentConfig, GenerateContentResponseUsageMetadata
+
+from common.database.postgres_models import DialogueEntry
+from common.llm.adapters.gemini import GeminiModelAdapter
+from common.llm.usage import collect_usage
+from common.prompts import (
+    get_ai_edit_initial_messages,
+    get_citations_prompt,
+    get_sections_from_transcript_prompt,
+    get_transcript_analysis_prompt,
+)
+
+transcript = [
+    DialogueEntry(speaker="Alice", text="We agreed to meet weekly.", start_time=0.0, end_time=5.0),
+    DialogueEntry(speaker="Bob", text="I'll book the room.", start_time=5.0, end_time=8.0),
+]
+
+
+def test_meeting_prompts_start_with_the_same_transcript_message():
+    prompts = [
+        get_transcript_analysis_prompt(transcript),
+        get_sections_from_transcript_prompt(transcript),
+        get_citations_prompt("Minutes", transcript),
+        get_ai_edit_initial_messages("<p>Minutes</p>", "Shorter", transcript),
+    ]
+
+    assert len({prompt[0]["content"] for prompt in prompts}) == 1
+    assert "[1] Bob: I'll book the room." in prompts[0][0]["content"]
+    # the instructions come after the transcript
+    assert all(len(prompt) > 1 for prompt in prompts)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_gemini_caches_the_leading_transcript_once_and_reports_cached_tokens():
+    with patch("common.llm.adapters.gemini.genai.Client"):
+        adapter = GeminiModelAdapter(model="gemini-2.5-flash", generate_content_config=GenerateContentConfig())
+    adapter.client.aio.caches.create = AsyncMock(return_value=MagicMock())
+    adapter.client.aio.caches.create.return_value.name = "cachedContents/1"
+    adapter.client.aio.models.generate_content = AsyncMock(
+        return_value=MagicMock(
+            text="Minutes",
+            usage_metadata=GenerateContentResponseUsageMetadata(
+                prompt_token_count=5000, cached_content_token_count=4800, candidates_token_count=100
+            ),
+        )
+    )
+    messages = [
+        {"role": "user", "content": "Here is the meeting transcript:\n" + "Alice: hello\n" * 2000},
+        {"role": "system", "content": "Write the minutes."},
+    ]
+
+    with patch("common.llm.adapters.gemini.settings") as mock_settings, collect_usage() as usage:
+        mock_settings.GEMINI_CONTEXT_CACHE = True
+        mock_settings.GEMINI_CONTEXT_CACHE_MIN_TOKENS = 1000
+        mock_settings.GEMINI_CONTEXT_CACHE_TTL_SECONDS = 600
+        assert await adapter.chat(messages) == "Minutes"
+        assert await adapter.chat([*messages, {"role": "user", "content": "Shorter please"}]) == "Minutes"
+        # short prompts are sent in full
+        await adapter.chat([{"role": "user", "content": "Hi"}, {"role": "system", "content": "Be brief."}])
+
+    adapter.client.aio.caches.create.assert_called_once()
+    calls = adapter.client.aio.models.generate_content.call_args_list
+    assert calls[0].kwargs["config"].cached_content == "cachedContents/1"
+    # the system instruction moves into the contents, as it can't be set alongside cached content
+    assert calls[0].kwargs["config"].system_instruction is None
+    assert calls[0].kwargs["contents"][0].parts[0].text == "Write the minutes."
+    assert calls[2].kwargs["config"].cached_content is None
+    assert calls[2].kwargs["config"].system_instruction.parts[0].text == "Be brief."
+    assert [call.cached_tokens for call in usage] == [4800, 4800, 4800]
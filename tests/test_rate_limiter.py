@@ -0,0 +1,65 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from tenacity import stop_after_attempt
+
+from common.llm.client import ChatBot
+from common.llm.rate_limiter import Bucket, take
+from common.llm.tokens import estimate_tokens
+
+now = datetime(2025, 1, 1, tzinfo=UTC)
+
+
+def test_take_refills_the_buckets_for_the_time_since_the_last_request():
+    bucket = Bucket(requests=0, tokens=0, refilled_at=now - timedelta(seconds=30), blocked_until=None)
+
+    bucket, wait = take(bucket, now, tokens=1000, requests_per_minute=10, tokens_per_minute=6000)
+
+    assert wait == 0
+    assert bucket == Bucket(requests=4, tokens=2000, refilled_at=now, blocked_until=None)
+
+
+def test_take_waits_for_enough_requests_and_tokens():
+    bucket = Bucket(requests=0.5, tokens=1000, refilled_at=now, blocked_until=None)
+
+    new_bucket, wait = take(bucket, now, tokens=4000, requests_per_minute=60, tokens_per_minute=6000)
+
+    # half a request is refilled in half a second, but 3000 tokens take 30 seconds
+    assert wait == pytest.approx(30)
+    assert new_bucket == bucket
+
+
+def test_take_waits_for_a_full_bucket_when_the_request_is_bigger_than_it():
+    bucket = Bucket(requests=10, tokens=5000, refilled_at=now, blocked_until=None)
+
+    _, wait = take(bucket, now, tokens=100_000, requests_per_minute=10, tokens_per_minute=6000)
+
+    assert wait == pytest.approx(10)
+
+
+def test_take_waits_until_the_deployment_is_unblocked():
+    bucket = Bucket(requests=10, tokens=6000, refilled_at=now, blocked_until=now + timedelta(seconds=20))
+
+    _, wait = take(bucket, now, tokens=10, requests_per_minute=10, tokens_per_minute=6000)
+
+    assert wait == pytest.approx(20)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_chatbot_blocks_the_deployment_when_asked_to_retry_later():
+    error = Exception("Too many requests")
+    error.response = MagicMock(headers={"retry-after": "12"})
+    adapter = MagicMock(chat=AsyncMock(side_effect=error))
+    chatbot = ChatBot(adapter, model_id="openai/gpt-4.1")
+
+    with patch("common.llm.client.rate_limiter") as mock_rate_limiter:
+        mock_rate_limiter.acquire = AsyncMock()
+        mock_rate_limiter.block = AsyncMock()
+        with pytest.raises(Exception, match="Too many requests"):
+            await ChatBot.chat.retry_with(stop=stop_after_attempt(1), reraise=True)(
+                chatbot, [{"role": "user", "content": "Hello there"}]
+            )
+
+    mock_rate_limiter.acquire.assert_awaited_once_with("openai/gpt-4.1", estimate_tokens("Hello there"))
+    mock_rate_limiter.block.assert_awaited_once_with("openai/gpt-4.1", 12)
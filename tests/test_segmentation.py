@@ -0,0 +1,125 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from common.database.postgres_models import DialogueEntry
+from common.templates.segmentation import SPAN_MARGIN_ENTRIES, find_section_starts, segment_transcript
+from common.templates.types import SectionTemplate
+
+texts = [
+    "Good morning everyone, thanks for joining.",
+    "Let's get started with the budget for next year.",
+    "The budget is tight, spending on staff has gone up.",
+    "We could cut the travel spending to balance the budget.",
+    "Agreed, I'll draft a revised budget.",
+    "Moving on, the office move.",
+    "The new office is ready in March.",
+    "We need to book removals for the move.",
+    "Next item, recruitment.",
+    "We have three vacancies to recruit for.",
+    "Interviews for the recruitment campaign start next week.",
+    "Thanks all.",
+]
+transcript = [
+    DialogueEntry(speaker=f"Speaker {i % 2}", text=text, start_time=i * 60, end_time=i * 60 + 60)
+    for i, text in enumerate(texts)
+]
+sections = ["Budget", "Office move", "Recruitment"]
+
+
+def test_section_starts_follow_spoken_headings_and_titles():
+    assert find_section_starts(transcript, sections) == [0, 5, 8]
+
+
+def test_spans_are_ordered_cover_the_transcript_and_include_a_margin():
+    spans = segment_transcript(transcript, sections)
+
+    assert len(spans) == len(sections)
+    assert spans[0][0] is transcript[0]
+    assert spans[-1][-1] is transcript[-1]
+    assert spans[1] == transcript[5 - SPAN_MARGIN_ENTRIES : 8 + SPAN_MARGIN_ENTRIES]
+
+
+def test_short_transcripts_are_given_to_every_section_in_full():
+    assert segment_transcript(transcript[:2], sections) == [transcript[:2]] * 3
+    assert segment_transcript(transcript, ["Everything"]) == [transcript]
+
+
+class AgendaTemplate(SectionTemplate):
+    name = "Agenda"
+    citations_required = False
+
+    @classmethod
+    def system_prompt(cls) -> str:
+        return "Write the minute"
+
+    @classmethod
+    async def sections(cls, transcript, agenda, analysis=None):  # noqa: ARG003
+        return sections
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_sections_are_written_concurrently_in_agenda_order():
+    call_sites = []
+
+    async def chat(messages, call_site=None):
+        call_sites.append(call_site)
+        # the first section is the slowest, so it finishes last
+        await asyncio.sleep(0.15 if "Budget" in messages[-1]["content"] else 0.1)
+        return messages[-1]["content"].rsplit(": ", 1)[-1]
+
+    chatbot = MagicMock(chat=chat, hallucination_check=AsyncMock(return_value=[]))
+    minute = MagicMock(agenda=None, transcription=MagicMock(dialogue_entries=transcript, analysis=None))
+    with (
+        patch("common.llm.cascade.create_default_chatbot", return_value=chatbot),
+        patch("common.templates.types.settings") as mock_settings,
+    ):
+        mock_settings.MINUTE_SECTION_CONCURRENCY = len(sections)
+        mock_settings.MINUTE_SECTION_CONSISTENCY_CHECK = False
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        minutes, hallucinations = await AgendaTemplate.generate(minute)
+
+    assert loop.time() - started_at < 0.25
+    assert minutes == "\n".join(sections)
+    assert hallucinations == []
+    # each section's calls are recorded by its position in the agenda
+    assert sorted(call_sites) == [f"section_{i}" for i in range(len(sections))]
+
+
+@pytest.mark.parametrize(
+    "rewrite,kept",  # noqa: PT006
+    [
+        (lambda draft: draft.replace("Discussed", "Covered"), "rewrite"),
+        # the rewrite lost all but the first section
+        (lambda draft: draft.split("\n## ")[0], "draft"),
+    ],
+)
+@pytest.mark.asyncio(loop_scope="session")
+async def test_consistency_pass_is_only_kept_if_it_keeps_the_sections(rewrite, kept):
+    async def chat(messages, call_site=None):
+        if call_site == "section_consistency":
+            return rewrite(messages[-1]["content"].rsplit("\n\n", 1)[-1])
+        section = messages[-1]["content"].rsplit(": ", 1)[-1]
+        return f"## {section}\nDiscussed {section.lower()} at length, and agreed what to do next."
+
+    hallucination_check = AsyncMock(return_value=[])
+    chatbot = MagicMock(chat=chat, hallucination_check=hallucination_check)
+    minute = MagicMock(agenda=None, transcription=MagicMock(dialogue_entries=transcript, analysis=None))
+    with (
+        patch("common.llm.cascade.create_default_chatbot", return_value=chatbot),
+        patch("common.templates.types.create_default_chatbot", return_value=chatbot),
+        patch("common.templates.types.settings") as mock_settings,
+    ):
+        mock_settings.MINUTE_SECTION_CONCURRENCY = len(sections)
+        mock_settings.MINUTE_SECTION_CONSISTENCY_CHECK = True
+        minutes, _ = await AgendaTemplate.generate(minute)
+
+    draft = "\n".join(
+        f"## {section}\nDiscussed {section.lower()} at length, and agreed what to do next." for section in sections
+    )
+    assert minutes == (rewrite(draft) if kept == "rewrite" else draft)
+    # the hallucinations are checked once, in the minutes that are kept
+    hallucination_check.assert_awaited_once()
+    assert chatbot.messages[-1] == {"role": "assistant", "content": minutes}
@@ -0,0 +1,109 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from common.audio.speakers import select_speaker_excerpts
+from common.llm.tokens import estimate_transcript_tokens
+from common.services.transcription_handler_service import TranscriptionHandlerService
+from common.transcript_analysis import analyse_transcript
+from common.types import (
+    DialogueEntry,
+    MeetingTitle,
+    SpeakerExcerptAnalysis,
+    SpeakerPrediction,
+    TranscriptAnalysis,
+)
+
+transcript = [
+    DialogueEntry(speaker="SPEAKER_01", text="Hello, I'm Alice.", start_time=0.0, end_time=1.0),
+    DialogueEntry(speaker="SPEAKER_01", text="Let's start.", start_time=1.0, end_time=2.0),
+    DialogueEntry(speaker="SPEAKER_00", text="Thanks Alice.", start_time=2.0, end_time=3.0),
+]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_enrich_transcript_uses_a_single_analysis():
+    analysis = TranscriptAnalysis(
+        speakers=[SpeakerPrediction(original_speaker="Unknown speaker 0", predicted_name="Alice", confidence=0.9)],
+        title="Kick-off",
+        sections=["Introductions"],
+    )
+    with patch(
+        "common.services.transcription_handler_service.analyse_transcript", return_value=analysis
+    ) as mock_analyse:
+        entries, result = await TranscriptionHandlerService.enrich_transcript(transcript)
+
+    mock_analyse.assert_called_once()
+    # consecutive entries from a speaker are grouped before the analysis
+    assert [entry["speaker"] for entry in mock_analyse.call_args.args[0]] == ["Unknown speaker 0", "Unknown speaker 1"]
+    assert [entry["speaker"] for entry in entries] == ["Alice", "Unknown speaker 1"]
+    assert entries[0]["text"] == "Hello, I'm Alice. Let's start."
+    assert result == analysis
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_enrich_transcript_keeps_labels_when_analysis_fails():
+    with patch(
+        "common.services.transcription_handler_service.analyse_transcript", side_effect=RuntimeError("content filter")
+    ):
+        entries, result = await TranscriptionHandlerService.enrich_transcript(transcript)
+
+    assert result is None
+    assert [entry["speaker"] for entry in entries] == ["Unknown speaker 0", "Unknown speaker 1"]
+
+
+def test_speaker_excerpt_is_bounded_and_keeps_names():
+    filler = "We went through the figures for the quarter in some detail. " * 20
+    long_transcript = [
+        DialogueEntry(speaker="Unknown speaker 0", text="Morning all. " + filler, start_time=0.0, end_time=60.0),
+        DialogueEntry(speaker="Unknown speaker 1", text=filler, start_time=60.0, end_time=120.0),
+    ]
+    for i in range(200):
+        long_transcript.append(
+            DialogueEntry(speaker=f"Unknown speaker {i % 2}", text=filler, start_time=120.0 + i, end_time=121.0 + i)
+        )
+    long_transcript[150]["text"] = filler + "So, Bob, what do you think?"
+    long_transcript[151]["text"] = "My name is Carol, I'm standing in for Bob. " + filler
+
+    excerpt = select_speaker_excerpts(long_transcript, max_tokens=1000, opening_seconds=10)
+
+    assert estimate_transcript_tokens(excerpt) <= 1000
+    text = " ".join(entry["text"] for entry in excerpt)
+    assert "My name is Carol" in text
+    assert "Bob, what do you think?" in text
+    # the opening of each speaker's first speech
+    assert excerpt[0]["text"].startswith("Morning all.")
+    assert excerpt[1]["speaker"] == "Unknown speaker 1"
+    assert excerpt[-1]["text"].endswith("...")
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_meetings_over_an_hour_and_a_half_are_analysed_from_an_excerpt():
+    # speech is around 150 words a minute
+    sentence = "We went through the figures for the quarter in some detail, and agreed to come back to them. "
+    minute_of_speech = sentence * 8
+    responses = {
+        TranscriptAnalysis: TranscriptAnalysis(speakers=[], title="Quarterly figures", sections=["Figures"]),
+        SpeakerExcerptAnalysis: SpeakerExcerptAnalysis(speakers=[]),
+        MeetingTitle: MeetingTitle(title="Quarterly figures"),
+    }
+
+    for minutes, call_sites in [(60, ["analysis"]), (120, ["speakers", "title"])]:
+        meeting = [
+            DialogueEntry(
+                speaker=f"Unknown speaker {i % 2}", text=minute_of_speech, start_time=i * 60.0, end_time=i * 60.0 + 60
+            )
+            for i in range(minutes)
+        ]
+        chatbot = AsyncMock()
+        chatbot.structured_chat.side_effect = lambda response_format, **_: responses[response_format]
+        with patch("common.transcript_analysis.create_default_chatbot", return_value=chatbot):
+            analysis = await analyse_transcript(meeting)
+
+        assert [call.kwargs["call_site"] for call in chatbot.structured_chat.await_args_list] == call_sites
+        assert analysis.title == "Quarterly figures"
+
+    # the title of a long meeting comes from all of it, not the excerpt, and it has no outline the model didn't write
+    title_call = chatbot.structured_chat.await_args_list[1]
+    assert sentence * 8 in title_call.kwargs["messages"][-1]["content"]
+    assert analysis.sections is None
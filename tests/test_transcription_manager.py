@@ -1,13 +1,17 @@
+import asyncio
 import tempfile
 from pathlib import Path
 from unittest.mock import Mock, patch
 
+import httpx
 import pytest
 
 from common.database.postgres_models import Recording, Transcription
 from common.services.exceptions import TranscriptionFailedError
 from common.services.storage_services import StorageService
 from common.services.transcription_services.adapter import AdapterType, TranscriptionAdapter
+from common.services.transcription_services.circuit_breaker import CircuitBreaker, is_provider_failure
+from common.services.transcription_services.router import RoutingDecision, RoutingObjective, TranscriptionRouter
 from common.services.transcription_services.transcription_manager import TranscriptionServiceManager
 from common.types import TranscriptionJobMessageData
 
@@ -63,6 +67,8 @@ def mock_settings():
         mock_settings.TRANSCRIPTION_SERVICES = ["MockAdapter1", "MockAdapter2"]
         mock_settings.DATA_S3_BUCKET = "test-bucket"
         mock_settings.AWS_REGION = "us-east-1"
+        mock_settings.TRANSCRIPTION_HEDGING = False
+        mock_settings.TRANSCRIPTION_DRAFT_SERVICE = None
         yield mock_settings
 
 
@@ -98,7 +104,11 @@ def mock_adapters():
 @pytest.fixture
 def manager(mock_settings, mock_adapters):  # noqa: ARG001
     """Create TranscriptionServiceManager instance for testing."""
-    return TranscriptionServiceManager()
+    manager = TranscriptionServiceManager()
+    manager.circuit_breaker = Mock(spec=CircuitBreaker)
+    manager.circuit_breaker.unavailable.return_value = set()
+    manager.circuit_breaker.acquire.return_value = True
+    return manager
 
 
 @pytest.fixture
@@ -293,7 +303,7 @@ class TestTranscriptionServiceManager:
         with (
             tempfile.NamedTemporaryFile(suffix=".mp3") as temp_file,
             patch.object(manager, "get_recording_to_process") as mock_get_recording,
-            patch.object(manager, "select_adaptor") as mock_select_adaptor,
+            patch.object(manager, "route") as mock_route,
         ):
             # Setup mocks
             mock_get_recording.return_value = (mock_recording, Path(temp_file.name), 1500)
@@ -301,7 +311,314 @@ class TestTranscriptionServiceManager:
             # Create adapter with unknown type
             mock_adapter = Mock()
             mock_adapter.adapter_type = "UNKNOWN_TYPE"
-            mock_select_adaptor.return_value = mock_adapter
+            mock_route.return_value = RoutingDecision(adapter=mock_adapter, reason="test")
 
             with pytest.raises(RuntimeError, match="adapter not recognised"):
                 await manager.perform_transcription_steps(mock_transcription)
+
+    @pytest.mark.asyncio
+    async def test_perform_transcription_steps_falls_back_when_throttled(
+        self,
+        mock_storage_service,  # noqa: ARG002
+        manager,
+        mock_recording,
+        mock_transcription,
+        mock_adapters,
+    ):
+        """Test that a 429 from the first adapter routes the job to the next candidate."""
+        throttled = httpx.HTTPStatusError("Too Many Requests", request=Mock(), response=httpx.Response(status_code=429))
+        with (
+            tempfile.NamedTemporaryFile(suffix=".mp3") as temp_file,
+            patch.object(manager, "get_recording_to_process") as mock_get_recording,
+            patch.object(mock_adapters["MockAdapter1"], "start", side_effect=throttled),
+            patch.object(mock_adapters["MockAdapter2"], "start") as mock_fallback_start,
+        ):
+            mock_get_recording.return_value = (mock_recording, Path(temp_file.name), 1500.0)
+            mock_fallback_start.return_value = TranscriptionJobMessageData(
+                job_name="test_job",
+                transcript=[{"text": "Test transcript", "speaker": "Speaker1", "start_time": 0.0, "end_time": 1.0}],
+                transcription_service="MockAdapter2",
+            )
+
+            result = await manager.perform_transcription_steps(mock_transcription)
+
+            assert result.transcription_service == "MockAdapter2"
+            assert "MockAdapter1" in result.routing_reason
+            assert manager.router.stats("MockAdapter1").is_throttling()
+            # the throttled adapter is skipped for subsequent jobs
+            assert manager.select_adaptor(1500).name == "MockAdapter2"
+            manager.circuit_breaker.record_failure.assert_called_once_with("MockAdapter1")
+            manager.circuit_breaker.record_success.assert_called_once_with("MockAdapter2")
+
+    def test_select_adaptor_skips_open_circuits(self, manager):
+        """Test that adapters with an open circuit are not routed to."""
+        manager.circuit_breaker.unavailable.return_value = {"MockAdapter1"}
+
+        assert manager.select_adaptor(1500).name == "MockAdapter2"
+
+    def test_select_adaptor_all_circuits_open(self, manager):
+        """Test adapter selection when every suitable adapter has an open circuit."""
+        manager.circuit_breaker.unavailable.return_value = {"MockAdapter1", "MockAdapter2"}
+
+        with pytest.raises(RuntimeError, match="open circuits"):
+            manager.select_adaptor(1500)
+
+    @pytest.mark.asyncio
+    async def test_perform_transcription_steps_does_not_fail_over_on_bad_input(
+        self,
+        mock_storage_service,  # noqa: ARG002
+        manager,
+        mock_recording,
+        mock_transcription,
+        mock_adapters,
+    ):
+        """Test that errors which are not provider failures are raised, and do not count towards the circuit."""
+        with (
+            tempfile.NamedTemporaryFile(suffix=".mp3") as temp_file,
+            patch.object(manager, "get_recording_to_process") as mock_get_recording,
+            patch.object(mock_adapters["MockAdapter1"], "start", side_effect=ValueError("bad audio")),
+        ):
+            mock_get_recording.return_value = (mock_recording, Path(temp_file.name), 1500.0)
+
+            with pytest.raises(ValueError, match="bad audio"):
+                await manager.perform_transcription_steps(mock_transcription)
+
+        manager.circuit_breaker.record_failure.assert_not_called()
+
+    @pytest.fixture
+    def hedged_manager(self, manager, mock_settings):
+        mock_settings.TRANSCRIPTION_HEDGING = True
+        mock_settings.TRANSCRIPTION_HEDGE_MAX_DURATION_SECONDS = 1800
+        mock_settings.TRANSCRIPTION_HEDGE_PERCENTILE = 90
+        manager._available_adapters = {  # noqa: SLF001
+            "primary": MockAdapter("primary"),
+            "secondary": MockAdapter("secondary"),
+        }
+        for _ in range(5):
+            manager.router.stats("primary").record_success(audio_seconds=600, elapsed_seconds=0.05)
+        return manager
+
+    @staticmethod
+    def job_from(adapter_name):
+        return TranscriptionJobMessageData(
+            transcript=[{"text": "Test transcript", "speaker": "Speaker1", "start_time": 0.0, "end_time": 1.0}],
+            transcription_service=adapter_name,
+        )
+
+    @pytest.mark.asyncio
+    async def test_start_with_hedging_uses_first_to_finish(self, hedged_manager, mock_recording):
+        """Test that a slow primary is hedged, the secondary wins and the primary is cancelled."""
+        primary = hedged_manager._available_adapters["primary"]  # noqa: SLF001
+        secondary = hedged_manager._available_adapters["secondary"]  # noqa: SLF001
+        primary_cancelled = asyncio.Event()
+
+        async def slow_start(**kwargs):  # noqa: ARG001
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                primary_cancelled.set()
+                raise
+            return self.job_from("primary")
+
+        with (
+            patch.object(primary, "start", side_effect=slow_start),
+            patch.object(secondary, "start", return_value=self.job_from("secondary")),
+        ):
+            winner, result = await hedged_manager.start_with_hedging(primary, Path("audio.mp3"), mock_recording, 600)
+
+        assert winner is secondary
+        assert result.transcription_service == "secondary"
+        assert primary_cancelled.is_set()
+        assert hedged_manager.router.stats("primary").in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_start_with_hedging_does_not_hedge_a_fast_primary(self, hedged_manager, mock_recording):
+        """Test that the secondary is not called when the primary finishes within the hedge delay."""
+        primary = hedged_manager._available_adapters["primary"]  # noqa: SLF001
+        secondary = hedged_manager._available_adapters["secondary"]  # noqa: SLF001
+
+        with (
+            patch.object(primary, "start", return_value=self.job_from("primary")),
+            patch.object(secondary, "start") as mock_secondary_start,
+        ):
+            winner, _ = await hedged_manager.start_with_hedging(primary, Path("audio.mp3"), mock_recording, 600)
+
+        assert winner is primary
+        mock_secondary_start.assert_not_called()
+
+    def test_get_hedge_needs_latency_history(self, hedged_manager):
+        """Test that jobs are not hedged until there is enough history to estimate the primary's latency."""
+        secondary = hedged_manager._available_adapters["secondary"]  # noqa: SLF001
+
+        assert hedged_manager.get_hedge(secondary, 600) is None
+
+    @pytest.mark.asyncio
+    async def test_draft_is_saved_while_async_job_runs(
+        self,
+        mock_storage_service,  # noqa: ARG002
+        manager,
+        mock_recording,
+        mock_transcription,
+    ):
+        """Test that a draft is made by the draft service while an async job is submitted."""
+        manager.draft_adapter = MockAdapter("draft", max_audio_length=3600)
+        on_draft = Mock()
+        draft = TranscriptionJobMessageData(
+            transcript=[{"text": "color", "speaker": "Speaker1", "start_time": 0.0, "end_time": 1.0}],
+            transcription_service="draft",
+        )
+        async_adapter = manager._available_adapters["MockAdapter2"]  # noqa: SLF001
+        with (
+            tempfile.NamedTemporaryFile(suffix=".mp3") as temp_file,
+            patch.object(manager, "get_recording_to_process") as mock_get_recording,
+            patch(
+                "common.services.transcription_services.transcription_manager.convert_to_draft_mp3",
+                side_effect=lambda path: path,
+            ),
+            patch.object(manager, "check_transcription") as mock_check_transcription,
+            patch.object(manager.draft_adapter, "start", return_value=draft),
+            patch.object(
+                async_adapter, "start", return_value=TranscriptionJobMessageData(transcription_service="MockAdapter2")
+            ),
+        ):
+            mock_get_recording.return_value = (mock_recording, Path(temp_file.name), 3500.0)
+            mock_check_transcription.return_value = TranscriptionJobMessageData(transcription_service="MockAdapter2")
+
+            result = await manager.perform_transcription_steps(mock_transcription, on_draft=on_draft)
+
+        assert result.transcript is None
+        on_draft.assert_called_once()
+        assert on_draft.call_args.args[0][0]["text"] == "colour"
+
+    @pytest.mark.asyncio
+    async def test_draft_is_cancelled_when_main_transcript_is_ready_first(
+        self,
+        mock_storage_service,  # noqa: ARG002
+        manager,
+        mock_recording,
+        mock_transcription,
+    ):
+        """Test that a slow draft is discarded once the final transcript is ready."""
+        manager.draft_adapter = MockAdapter("draft")
+        on_draft = Mock()
+        draft_cancelled = asyncio.Event()
+
+        async def slow_start(**kwargs):  # noqa: ARG001
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                draft_cancelled.set()
+                raise
+            return self.job_from("draft")
+
+        async def main_start(**kwargs):  # noqa: ARG001
+            await asyncio.sleep(0.01)
+            return self.job_from("main")
+
+        with (
+            tempfile.NamedTemporaryFile(suffix=".mp3") as temp_file,
+            patch.object(manager, "get_recording_to_process") as mock_get_recording,
+            patch(
+                "common.services.transcription_services.transcription_manager.convert_to_draft_mp3",
+                side_effect=lambda path: path,
+            ),
+            patch.object(manager.draft_adapter, "start", side_effect=slow_start),
+            patch.object(manager._available_adapters["MockAdapter1"], "start", side_effect=main_start),  # noqa: SLF001
+        ):
+            mock_get_recording.return_value = (mock_recording, Path(temp_file.name), 600.0)
+            result = await manager.perform_transcription_steps(mock_transcription, on_draft=on_draft)
+
+        assert result.transcript is not None
+        assert draft_cancelled.is_set()
+        on_draft.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "error,expected",  # noqa: PT006
+        [
+            (httpx.HTTPStatusError("", request=Mock(), response=httpx.Response(status_code=429)), True),
+            (httpx.HTTPStatusError("", request=Mock(), response=httpx.Response(status_code=503)), True),
+            (httpx.HTTPStatusError("", request=Mock(), response=httpx.Response(status_code=400)), False),
+            (httpx.ReadTimeout("timed out"), True),
+            (ValueError("bad audio"), False),
+        ],
+    )
+    def test_is_provider_failure(self, error, expected):
+        assert is_provider_failure(error) == expected
+
+
+class TestTranscriptionRouter:
+    """Test class for TranscriptionRouter."""
+
+    @pytest.fixture
+    def candidates(self):
+        return [MockAdapter("slow_cheap"), MockAdapter("fast_expensive")]
+
+    @pytest.fixture
+    def prices(self):
+        return {"slow_cheap": 0.2, "fast_expensive": 1.5}
+
+    def record_real_time_factors(self, router):
+        router.stats("slow_cheap").record_success(audio_seconds=600, elapsed_seconds=300)
+        router.stats("fast_expensive").record_success(audio_seconds=600, elapsed_seconds=60)
+
+    def test_ordered_objective_uses_configured_order(self, candidates, prices):
+        router = TranscriptionRouter(RoutingObjective.ORDERED, prices_per_hour=prices)
+        self.record_real_time_factors(router)
+
+        assert router.route(candidates, 600).adapter.name == "slow_cheap"
+
+    def test_fastest_objective(self, candidates, prices):
+        router = TranscriptionRouter(RoutingObjective.FASTEST, prices_per_hour=prices)
+        self.record_real_time_factors(router)
+
+        decision = router.route(candidates, 600)
+
+        assert decision.adapter.name == "fast_expensive"
+        assert decision.reason.startswith("fastest")
+
+    def test_fastest_objective_penalises_errors(self, candidates, prices):
+        router = TranscriptionRouter(RoutingObjective.FASTEST, prices_per_hour=prices)
+        self.record_real_time_factors(router)
+        for _ in range(10):
+            router.stats("fast_expensive").record_failure(throttled=False)
+
+        assert router.route(candidates, 600).adapter.name == "slow_cheap"
+
+    def test_cheapest_objective(self, candidates, prices):
+        router = TranscriptionRouter(RoutingObjective.CHEAPEST, prices_per_hour=prices)
+        self.record_real_time_factors(router)
+
+        assert router.route(candidates, 600).adapter.name == "slow_cheap"
+
+    @pytest.mark.parametrize(
+        "budget_per_hour,expected_adapter",  # noqa: PT006
+        [
+            (2.0, "fast_expensive"),
+            (1.0, "slow_cheap"),
+            (0.1, "slow_cheap"),  # nothing is affordable, so the cheapest is used
+        ],
+    )
+    def test_fastest_under_budget_objective(self, candidates, prices, budget_per_hour, expected_adapter):
+        router = TranscriptionRouter(
+            RoutingObjective.FASTEST_UNDER_BUDGET, prices_per_hour=prices, budget_per_hour=budget_per_hour
+        )
+        self.record_real_time_factors(router)
+
+        assert router.route(candidates, 600).adapter.name == expected_adapter
+
+    def test_throttled_adapters_are_skipped(self, candidates, prices):
+        router = TranscriptionRouter(RoutingObjective.ORDERED, prices_per_hour=prices)
+        router.stats("slow_cheap").record_failure(throttled=True)
+
+        decision = router.route(candidates, 600)
+
+        assert decision.adapter.name == "fast_expensive"
+        assert "slow_cheap" in decision.reason
+
+    def test_latency_percentiles_are_clamped(self):
+        stats = TranscriptionRouter(RoutingObjective.ORDERED).stats("adapter")
+        for elapsed in range(1, 11):
+            stats.record_success(600, elapsed)
+
+        assert stats.latency_percentile(600, 100) == stats.latency_percentile(600, 99)
+        assert stats.latency_percentile(600, 0) == stats.latency_percentile(600, 1) < 2
@@ -0,0 +1,65 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from common.database.postgres_models import DialogueEntry, TemplateQuestion, TemplateType, UserTemplate
+from common.templates.user_template import answer_form
+from common.types import FormAnswer, FormAnswerList
+
+transcript = [DialogueEntry(speaker="Alice", text="We agreed to meet weekly.", start_time=0.0, end_time=5.0)]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_answer_form_batches_independent_questions_and_chains_dependent_ones():
+    template = UserTemplate(
+        name="Care assessment",
+        content="Be brief.",
+        type=TemplateType.FORM,
+        questions=[
+            TemplateQuestion(position=0, title="Who attended?", description=""),
+            TemplateQuestion(position=1, title="What was agreed?", description=""),
+            TemplateQuestion(position=2, title="Summarise the above", description="", depends_on_previous=True),
+            TemplateQuestion(position=3, title="Next steps?", description=""),
+        ],
+    )
+
+    async def structured_chat(messages, response_format, call_site=None):  # noqa: ARG001
+        if "Who attended?" in messages[-1]["content"]:
+            # the second answer is left out, so it is answered on its own
+            return FormAnswerList(answers=[FormAnswer(question_number=1, answer="Alice")])
+        msg = "unexpected batch"
+        raise AssertionError(msg)
+
+    async def chat(messages, call_site=None):  # noqa: ARG001
+        content = messages[-1]["content"]
+        for question, answer in [
+            ("<current_question>\nWhat was agreed?", "Weekly meetings"),
+            ("<current_question>\nSummarise the above", "Summary"),
+            ("<current_question>\nNext steps?", "Meet next week"),
+        ]:
+            if question in content:
+                if question.endswith("Summarise the above"):
+                    assert "## Who attended?\nAlice" in content
+                    assert "## What was agreed?\nWeekly meetings" in content
+                return answer
+        msg = "unexpected question"
+        raise AssertionError(msg)
+
+    chatbot = MagicMock(chat=AsyncMock(side_effect=chat), structured_chat=AsyncMock(side_effect=structured_chat))
+    with (
+        patch("common.templates.user_template.create_default_chatbot", return_value=chatbot),
+        patch("common.templates.user_template.settings") as mock_settings,
+    ):
+        mock_settings.FORM_QUESTION_BATCH_SIZE = 2
+        mock_settings.FORM_QUESTION_CONCURRENCY = 4
+        qa_pairs = await answer_form(template, transcript)
+
+    assert qa_pairs == [
+        ("Who attended?", "Alice"),
+        ("What was agreed?", "Weekly meetings"),
+        ("Summarise the above", "Summary"),
+        ("Next steps?", "Meet next week"),
+    ]
+    # the first two questions are batched, the last independent question is answered on its own
+    assert chatbot.structured_chat.call_count == 1
+    assert chatbot.chat.call_count == 3
@@ -0,0 +1,83 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from common.services.transcription_services.whisper_batching import WhisperBatchScheduler, split_into_windows
+
+
+class RecordingInference:
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+
+    def __call__(self, windows: list[str]) -> list[str]:
+        self.batches.append(list(windows))
+        return [f"text:{window}" for window in windows]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_windows_from_concurrent_jobs_share_batches():
+    inference = RecordingInference()
+    scheduler = WhisperBatchScheduler(inference, batch_size=4, max_latency_seconds=0.5)
+
+    results = await asyncio.gather(
+        scheduler.transcribe("a", ["a0", "a1", "a2"]),
+        scheduler.transcribe("b", ["b0", "b1", "b2"]),
+    )
+
+    assert results == [["text:a0", "text:a1", "text:a2"], ["text:b0", "text:b1", "text:b2"]]
+    # round-robin draining interleaves jobs, and per-job order is preserved
+    assert inference.batches == [["a0", "b0", "a1", "b1"], ["a2", "b2"]]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_partial_batch_runs_after_max_latency():
+    inference = RecordingInference()
+    scheduler = WhisperBatchScheduler(inference, batch_size=8, max_latency_seconds=0.01)
+
+    result = await asyncio.wait_for(scheduler.transcribe("a", ["a0", "a1"]), timeout=1)
+
+    assert result == ["text:a0", "text:a1"]
+    assert inference.batches == [["a0", "a1"]]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_inference_errors_are_raised_for_every_job_in_the_batch():
+    def failing_inference(windows: list[str]) -> list[str]:  # noqa: ARG001
+        msg = "out of memory"
+        raise RuntimeError(msg)
+
+    scheduler = WhisperBatchScheduler(failing_inference, batch_size=2, max_latency_seconds=0.5)
+
+    results = await asyncio.gather(
+        scheduler.transcribe("a", ["a0"]), scheduler.transcribe("b", ["b0"]), return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert scheduler.queued_windows() == 0
+
+
+def test_split_into_windows_cuts_at_the_quietest_point():
+    sample_rate = 100
+    audio = np.ones(70 * sample_rate, dtype=np.float32)
+    audio[27 * sample_rate : 27 * sample_rate + 20] = 0
+    audio[55 * sample_rate : 55 * sample_rate + 20] = 0
+
+    windows = split_into_windows(audio, window_seconds=30, sample_rate=sample_rate)
+
+    starts = [start for start, _ in windows]
+    assert starts[0] == 0
+    assert 27 <= starts[1] <= 27.2
+    assert 55 <= starts[2] <= 55.2
+    assert sum(len(window) for _, window in windows) == len(audio)
+    assert all(len(window) <= 30 * sample_rate for _, window in windows)
+
+
+def test_split_into_windows_keeps_short_audio_whole():
+    audio = np.ones(100, dtype=np.float32)
+
+    windows = split_into_windows(audio, window_seconds=30, sample_rate=10)
+
+    assert len(windows) == 1
+    assert windows[0][0] == 0
+    assert np.array_equal(windows[0][1], audio)
@@ -6,6 +6,7 @@ import ray
 from azure.servicebus import ServiceBusReceivedMessage
 from ray.actor import ActorClass, ActorHandle
 
+from common.llm.batch import BatchClient, batch_supported, create_batch_client
 from common.services.exceptions import InteractionFailedError, TranscriptionFailedError
 from common.services.minute_handler_service import MinuteGenerationFailedError, MinuteHandlerService
 from common.services.queue_services.base import QueueService
@@ -21,6 +22,8 @@ settings = get_settings()
 
 
 ReceiptHandle = str | ServiceBusReceivedMessage
+# how often each LLM worker submits the minute prompts waiting for a batch, and checks the batches that are due a poll
+BATCH_CHECK_SECONDS = 60
 
 
 class _HasBeenStopped:
@@ -53,32 +56,44 @@ class _RayTranscriptionService:
     async def process(self) -> None:
         while not await self.stopped.get.remote():
             logger.info("Receiving transcription messages")
-            messages = self.transcription_queue_service.receive_message(max_messages=1)
-            for message, receipt_handle in messages:
-                try:
-                    logger.info("Received minute id for transcription: %s", message.id)
-                    data = message.data if isinstance(message.data, TranscriptionJobMessageData) else None
-                    transcription_job = await TranscriptionHandlerService.process_transcription(message.id, data)
-                except TranscriptionFailedError:
-                    logger.exception("Transcription failed for minute id: %s", message.id)
-                else:
-                    # sync jobs should have the transcript available immediately, async jobs may need to go on the queue
-                    if transcription_job.transcript:
-                        logger.info("Transcription complete for minute id %s complete", message.id)
-                        # create a default minute with the general template after every transcription
-                        minute_version = await MinuteHandlerService.get_only_minute_version_for_minute_id(message.id)
-                        self.llm_queue_service.publish_message(
-                            WorkerMessage(id=minute_version.id, type=TaskType.MINUTE)
-                        )
-                    else:
-                        logger.info("Async transcription job not ready yet. Re-queueing minute id: %s", message.id)
-                        self.transcription_queue_service.publish_message(
-                            WorkerMessage(id=message.id, type=TaskType.TRANSCRIPTION, data=transcription_job)
-                        )
-                # Delete the message to prevent repeated processing
-                self.transcription_queue_service.complete_message(receipt_handle)
+            messages = self.transcription_queue_service.receive_message(
+                max_messages=settings.MAX_CONCURRENT_TRANSCRIPTIONS_PER_WORKER
+            )
+            tasks = [
+                asyncio.create_task(self.process_transcription_task(message, receipt_handle))
+                for message, receipt_handle in messages
+            ]
+            if len(tasks) > 0:
+                done, pending = await asyncio.wait(tasks)
+                for task in done:
+                    try:
+                        task.result()
+                    except Exception:
+                        logger.exception("Unhandled error in transcription actor")
             self.heartbeat_path.touch()
 
+    async def process_transcription_task(self, message: WorkerMessage, receipt_handle: ReceiptHandle) -> None:
+        try:
+            logger.info("Received minute id for transcription: %s", message.id)
+            data = message.data if isinstance(message.data, TranscriptionJobMessageData) else None
+            transcription_job = await TranscriptionHandlerService.process_transcription(message.id, data)
+        except TranscriptionFailedError:
+            logger.exception("Transcription failed for minute id: %s", message.id)
+        else:
+            # sync jobs should have the transcript available immediately, async jobs may need to go on the queue
+            if transcription_job.transcript:
+                logger.info("Transcription complete for minute id %s complete", message.id)
+                # create a default minute with the general template after every transcription
+                minute_version = await MinuteHandlerService.get_only_minute_version_for_minute_id(message.id)
+                self.llm_queue_service.publish_message(WorkerMessage(id=minute_version.id, type=TaskType.MINUTE))
+            else:
+                logger.info("Async transcription job not ready yet. Re-queueing minute id: %s", message.id)
+                self.transcription_queue_service.publish_message(
+                    WorkerMessage(id=message.id, type=TaskType.TRANSCRIPTION, data=transcription_job)
+                )
+        # Delete the message to prevent repeated processing
+        self.transcription_queue_service.complete_message(receipt_handle)
+
 
 RayTranscriptionService: ActorClass = ray.remote(max_restarts=-1, max_task_retries=0)(_RayTranscriptionService)
 
@@ -87,6 +102,7 @@ class _RayLlmService:
     def __init__(self, queue_service: QueueService[Any], stopped: ActorHandle) -> None:
         self.stopped = stopped
         self.queue_service = queue_service
+        self.batch_client = create_batch_client() if settings.MINUTE_BATCH and batch_supported() else None
         actor_id = ray.get_runtime_context().get_actor_id()
         self.heartbeat_path = HEARTBEAT_DIR / f"worker_{actor_id}.heartbeat"
         self.heartbeat_path.touch()
@@ -94,6 +110,11 @@ class _RayLlmService:
 
     async def process(self) -> None:
         logger.info("receiving LLM messages from Ray queue")
+        batch_task = (
+            asyncio.create_task(self.process_minute_batches(self.batch_client))
+            if self.batch_client is not None
+            else None
+        )
         while not await self.stopped.get.remote():
             logger.info("Receiving LLM messages")
             messages = self.queue_service.receive_message(max_messages=10)
@@ -118,6 +139,18 @@ class _RayLlmService:
                         logger.exception("Unhandled error in LLM actor")
 
             self.heartbeat_path.touch()
+        if batch_task is not None:
+            # minutes being saved when the worker stops are collected again by another worker
+            batch_task.cancel()
+
+    async def process_minute_batches(self, client: BatchClient) -> None:
+        """Submit and check the minute batches in the background, so saving their minutes doesn't hold up messages."""
+        while not await self.stopped.get.remote():
+            try:
+                await MinuteHandlerService.process_minute_batches(client)
+            except Exception:
+                logger.exception("Unhandled error processing minute batches")
+            await asyncio.sleep(BATCH_CHECK_SECONDS)
 
     async def process_minute_task(self, message: WorkerMessage, receipt_handle: ReceiptHandle) -> None:
         try: